@@ -3,6 +3,29 @@
 __version__ = "1.1.0"
 __author__ = "David Guerra"
 
-from .sheet import GymSheet
-from .image import BadgeImage
-from .gym import GoldGym
+import importlib
+
+
+# Classes are loaded on first access. Importing them pulls in OpenCV,
+# pandas and gspread, which light modules like `utils` do not need.
+_LAZY = {
+    'GymSheet': '.sheet',
+    'BadgeImage': '.image',
+    'GoldGym': '.gym',
+    }
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name)
+            )
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,214 @@
+"""
+PokemonGo.analytics
+-------------------
+
+This module contains vectorized summaries of the gym database. Records
+from the sheet or its local snapshot are typed once by :func:`prepare`:
+numeric columns are coerced and the location and style columns become
+categoricals, so group-bys stay fast on large databases.
+
+Examples:
+
+.. code:: python
+
+    >>> df = load_snapshot('requirements/snapshot.csv')
+    >>> totals(df, by=['state', 'county']).head()
+    >>> near_long_term(df, within=5)
+    >>> growth(read_log('requirements/pogo.log'))
+"""
+
+
+import os
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .gym import LONG_TERM_DEFENDING
+from . import dataset
+
+
+NUMERIC_FIELDS = (
+    'uid', 'victories', 'days', 'hours', 'minutes', 'defended', 'treats'
+    )
+CATEGORY_FIELDS = ('style', 'city', 'county', 'state')
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+# Entries written by `utils.log_entry`.
+LOG_RE = r'^(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\s+ID: (?P<uid>\d+)'
+
+_cache = dict()   # (path, columns) -> (modification time, dataframe).
+
+
+def prepare(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Type gym records for analysis. Rows without a uid (gyms not yet
+    scanned) are dropped.
+
+    :param pandas.DataFrame records: The sheet records, e.g.
+        :attr:`sheet.GymSheet.processed`.
+    :returns: A new dataframe with numeric and categorical columns.
+    """
+
+    uid  = pd.to_numeric(records['uid'], errors='coerce')
+    keep = uid.notna().to_numpy()
+
+    # Build every typed column first; frames copy on each assignment.
+    columns = dict()
+    for col in records:
+        values = records[col][keep]
+        if col in NUMERIC_FIELDS:
+            values = pd.to_numeric(values, errors='coerce')
+            # Counts stay integers unless a scanned gym has an empty cell.
+            if col != 'defended' and values.notna().all():
+                values = values.astype(np.int64)
+        elif col in CATEGORY_FIELDS:
+            values = values.astype('category')
+        columns[col] = values
+
+    return pd.DataFrame(columns)
+
+
+def load_snapshot(
+        path: str,
+        columns: Optional[list] = None
+        ) -> pd.DataFrame:
+    """
+    Load and prepare a csv snapshot or dataset file of the sheet (see
+    :meth:`sheet.GymSheet.save_snapshot` and
+    :meth:`sheet.GymSheet.save_dataset`). The result is cached until
+    the file changes.
+
+    :param str path: The path to the csv snapshot or dataset file.
+    :param list columns: (optional) The columns to load. Must include
+        ``uid``.
+    :returns: The prepared dataframe. Do not modify it in place.
+    """
+
+    key = (path, None if columns is None else tuple(columns))
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    if dataset.is_dataset(path):
+        records = dataset.read(path, columns).to_pandas()
+    else:
+        # Keep empty cells as text; `prepare` decides what is missing.
+        records = pd.read_csv(path, usecols=columns, keep_default_na=False)
+    df = prepare(records)
+    _cache[key] = (mtime, df)
+    return df
+
+
+def totals(
+        df: pd.DataFrame,
+        by: Union[str, list] = 'state'
+        ) -> pd.DataFrame:
+    """
+    Sum badge statistics per location.
+
+    :param pandas.DataFrame df: The prepared records.
+    :param by: (optional) The column or columns to group by, e.g.
+        ``['state', 'county']``.
+    :returns: The number of gyms, total victories, treats and days
+        defended, and median days defended per group, largest first.
+    """
+
+    out = df.groupby(by, observed=True).agg(
+        gyms=('uid', 'size'),
+        victories=('victories', 'sum'),
+        treats=('treats', 'sum'),
+        defended=('defended', 'sum'),
+        median_defended=('defended', 'median')
+        )
+    return out.sort_values('gyms', ascending=False)
+
+
+def distribution(
+        df: pd.DataFrame,
+        column: str,
+        quantiles: Optional[Iterable[float]] = QUANTILES
+        ) -> pd.Series:
+    """
+    Summarize the spread of a numeric column.
+
+    :param pandas.DataFrame df: The prepared records.
+    :param str column: The column, e.g. ``treats``.
+    :param iterable quantiles: (optional) The quantiles to report.
+    :returns: The mean, quantiles and maximum indexed by name.
+    """
+
+    values = df[column]
+    out = values.quantile(list(quantiles))
+    out.index = ['p{:g}'.format(100 * q) for q in out.index]
+
+    return pd.concat([
+        pd.Series({'mean': values.mean()}),
+        out,
+        pd.Series({'max': values.max()})
+        ])
+
+
+def near_long_term(
+        df: pd.DataFrame,
+        within: Optional[int] = 10
+        ) -> pd.DataFrame:
+    """
+    Find gold gyms close to the 100+ days style.
+
+    :param pandas.DataFrame df: The prepared records.
+    :param int within: (optional) The maximum days missing.
+    :returns: The matching gyms, closest first.
+    """
+
+    mask  = df['days'] < LONG_TERM_DEFENDING
+    mask &= df['days'] >= LONG_TERM_DEFENDING - within
+
+    columns = [c for c in ('uid', 'title', 'city', 'state', 'defended') if c in df]
+    return df.loc[mask, columns].sort_values('defended', ascending=False)
+
+
+def read_log(path: str) -> pd.DataFrame:
+    """
+    Read the scan times of each uid from the package log (see
+    :meth:`utils.log_entry`). Updates log the same uid again.
+
+    :param str path: The path to the log file.
+    :returns: The ``time`` and ``uid`` of every entry.
+    """
+
+    with open(path) as f:
+        lines = pd.Series(f.read().splitlines(), dtype=object)
+
+    log = lines.str.extract(LOG_RE).dropna()
+    return pd.DataFrame({
+        'time': pd.to_datetime(log['time']),
+        'uid': log['uid'].astype(np.int64)
+        })
+
+
+def growth(
+        log: pd.DataFrame,
+        freq: Optional[str] = 'M'
+        ) -> pd.DataFrame:
+    """
+    Count gyms added per period from their first log entry.
+
+    :param pandas.DataFrame log: The output of :func:`read_log`.
+    :param str freq: (optional) The pandas period alias, e.g. ``W``,
+        ``M`` or ``Y``.
+    :returns: The ``new`` and cumulative ``total`` gyms per period.
+
+    .. note::
+        Gyms scanned before logging began are not counted.
+    """
+
+    first = log.sort_values('time').drop_duplicates('uid')
+    new = first.groupby(first['time'].dt.to_period(freq)).size()
+    if not new.empty:
+        # Include quiet periods.
+        periods = pd.period_range(new.index.min(), new.index.max(), freq=freq)
+        new = new.reindex(periods, fill_value=0)
+
+    return pd.DataFrame({'new': new, 'total': new.cumsum()})
@@ -0,0 +1,333 @@
+"""
+PokemonGo.archive
+-----------------
+
+This module contains the BadgeArchive class for storing badge images
+by content. Each screenshot is kept once under its SHA-256 hash and an
+index maps gym uids to hashes. Optionally, the title and activity
+regions are kept as losslessly compressed crops next to the original,
+so rescans decode a small fraction of the pixels.
+
+Layout of the badges directory:
+
+.. code::
+
+    badges
+    ├── index.json                 # uid -> hash and image dimensions
+    └── objects
+         └── 3f
+              ├── 3f9a...c1.png           # Original screenshot.
+              ├── 3f9a...c1.title.png     # Optional crops.
+              └── 3f9a...c1.activity.png
+"""
+
+
+import os
+import re
+import json
+import errno
+import shutil
+import hashlib
+import threading
+from typing import Optional
+
+import cv2
+
+from .image import BadgeImage, TWO_LINE_OFFSET
+
+
+LEGACY_RE = re.compile(r'IMG_(?P<uid>\d{4,})\.PNG')
+REGIONS = ('title', 'activity')
+CHUNK_SIZE = 1 << 20   # Unit = bytes.
+
+
+def file_hash(path: str) -> str:
+    """Compute the SHA-256 hex digest of a file."""
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def move_file(src: str, dest: str) -> None:
+    """
+    Move a file atomically, even across filesystems. Across devices the
+    file is copied next to `dest` and renamed into place, so `dest`
+    is either absent or complete.
+
+    :param str src: The file to move.
+    :param str dest: The new path. Replaced if it exists.
+    """
+
+    try:
+        os.replace(src, dest)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    tmpPath = dest + '.tmp'
+    with open(src, 'rb') as fsrc, open(tmpPath, 'wb') as fdest:
+        shutil.copyfileobj(fsrc, fdest, CHUNK_SIZE)
+        fdest.flush()
+        os.fsync(fdest.fileno())
+    os.replace(tmpPath, dest)
+    os.remove(src)
+
+
+def free_path(path: str) -> str:
+    """
+    Get `path` if no file has that name yet, else the first free 
+    ``stem_N.ext`` next to it.
+    """
+
+    stem, ext = os.path.splitext(path)
+    n = 1
+    while os.path.exists(path):
+        path = '{}_{}{}'.format(stem, n, ext)
+        n += 1
+    return path
+
+
+def badge_crops(img: BadgeImage) -> dict:
+    """
+    Get the regions of a badge kept by the archive: the title crop
+    expanded for two lines, and the activity crop.
+
+    :param BadgeImage img: The badge image.
+    :returns: The crops keyed by region.
+    """
+
+    params = img.params
+    return {
+        'title': img.image[params.titleStart - TWO_LINE_OFFSET : params.titleEnd],
+        'activity': img.image[params.activStart : params.activEnd],
+        }
+
+
+class BadgeArchive:
+    """
+    A content-addressed store of badge images.
+
+    :param str directory: The path to the badges directory.
+    :param bool crops: (optional) If True, keep region crops of newly
+        stored badges.
+
+    Examples:
+
+    .. code:: python
+
+        >>> archive = BadgeArchive('badges', crops=True)
+        >>> archive.store('Downloads/IMG_5120.PNG', 1410, img)
+        >>> archive.path(1410)
+        'badges/objects/3f/3f9a...c1.png'
+        >>> archive.crop_path(1410, 'activity')
+        'badges/objects/3f/3f9a...c1.activity.png'
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            crops: Optional[bool] = False
+            ) -> None:
+        self.directory = directory
+        self.objects   = os.path.join(directory, 'objects')
+        self.indexPath = os.path.join(directory, 'index.json')
+        self.crops     = crops
+        self.entries   = dict()   # uid -> {'sha256': ..., 'shape': [h, w]}
+        self._lock     = threading.Lock()
+
+        if os.path.isfile(self.indexPath):
+            with open(self.indexPath) as f:
+                self.entries = {int(k):v for k,v in json.load(f).items()}
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self.entries
+
+
+    def uids(self) -> list:
+        """List stored uids in increasing order."""
+        return sorted(self.entries)
+
+
+    @staticmethod
+    def name(uid: int) -> str:
+        """The display name of a stored badge, e.g. `IMG_0042.PNG`."""
+        return 'IMG_{:04d}.PNG'.format(uid)
+
+
+    def _object(self, sha: str, suffix: str = '.png') -> str:
+        return os.path.join(self.objects, sha[:2], sha + suffix)
+
+
+    def path(self, uid: int) -> str:
+        """
+        Get the path to the original image of a badge.
+
+        :raises KeyError: if `uid` is not stored.
+        """
+
+        return self._object(self.entries[uid]['sha256'])
+
+
+    def crop_path(self, uid: int, region: str) -> Optional[str]:
+        """
+        Get the path to a region crop of a badge.
+
+        :param int uid: The gym uid.
+        :param str region: The region, ``title`` or ``activity``.
+        :returns: The path, or ``None`` if no crop was kept.
+        :raises KeyError: if `uid` is not stored.
+        """
+
+        path = self._object(self.entries[uid]['sha256'], '.{}.png'.format(region))
+        return path if os.path.isfile(path) else None
+
+
+    def shape(self, uid: int) -> tuple:
+        """Get the ``(height, width)`` of the original image of a badge."""
+        return tuple(self.entries[uid]['shape'])
+
+
+    def store(
+            self,
+            srcPath: str,
+            uid: int,
+            img: Optional[BadgeImage] = None
+            ) -> str:
+        """
+        Move an image into the archive and index it under `uid`. An
+        image whose content is already stored is removed instead. The
+        image previously stored under `uid` is deleted unless another
+        uid still refers to it.
+
+        :param str srcPath: The image to store.
+        :param int uid: The gym uid.
+        :param BadgeImage img: (optional) The loaded image, needed to
+            keep crops and to record its dimensions.
+        :returns: The path of the stored original.
+        """
+
+        sha  = file_hash(srcPath)
+        dest = self._object(sha)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        if img is None:
+            img = BadgeImage(srcPath)
+
+        if os.path.isfile(dest):
+            os.remove(srcPath)   # Same content already stored.
+        else:
+            self._store_crops(sha, img)
+            move_file(srcPath, dest)
+
+        self._index(uid, sha, img)
+        return dest
+
+
+    def store_image(self, img: BadgeImage, uid: int) -> str:
+        """
+        Encode a badge held only in memory, e.g. a video frame (see 
+        :mod:`video`), into the archive and index it under `uid`, like 
+        :meth:`BadgeArchive.store`.
+
+        :param BadgeImage img: The badge image.
+        :param int uid: The gym uid.
+        :returns: The path of the stored original.
+        :raises ValueError: if the image cannot be encoded.
+        """
+
+        ok, buffer = cv2.imencode(
+            '.png', img.image, [cv2.IMWRITE_PNG_COMPRESSION, 9]
+            )
+        if not ok:
+            raise ValueError('image could not be encoded')
+        data = buffer.tobytes()
+        sha  = hashlib.sha256(data).hexdigest()
+        dest = self._object(sha)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        if not os.path.isfile(dest):
+            self._store_crops(sha, img)
+            tmpPath = dest + '.tmp'
+            with open(tmpPath, 'wb') as f:
+                f.write(data)
+            os.replace(tmpPath, dest)
+
+        self._index(uid, sha, img)
+        return dest
+
+
+    def _store_crops(self, sha: str, img: BadgeImage) -> None:
+        if not self.crops:
+            return
+        for region, crop in badge_crops(img).items():
+            cropPath = self._object(sha, '.{}.png'.format(region))
+            tmpPath = cropPath + '.tmp.png'
+            cv2.imwrite(tmpPath, crop, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+            os.replace(tmpPath, cropPath)
+
+
+    def _index(self, uid: int, sha: str, img: BadgeImage) -> None:
+        with self._lock:
+            old = self.entries.get(uid, {}).get('sha256')
+            self.entries[uid] = {
+                'sha256': sha, 'shape': list(img.image.shape[:2])
+                }
+            shared = any(x['sha256'] == old for x in self.entries.values())
+        self.save()
+
+        # An update replaced the image; drop the old one once unindexed.
+        if old is not None and old != sha and not shared:
+            self._remove(old)
+
+
+    def _remove(self, sha: str) -> None:
+        """Delete a stored original and its crops."""
+
+        suffixes = ['.png'] + ['.{}.png'.format(x) for x in REGIONS]
+        for suffix in suffixes:
+            try:
+                os.remove(self._object(sha, suffix))
+            except FileNotFoundError:
+                pass
+
+
+    def import_legacy(self, verbose: Optional[bool] = False) -> int:
+        """
+        Move `IMG_####.PNG` files from the top of the badges directory
+        into the archive.
+
+        :param bool verbose: (optional) If True, print progress statements.
+        :returns: The number of images imported.
+        """
+
+        names = sorted(
+            x for x in os.listdir(self.directory) if LEGACY_RE.fullmatch(x)
+            )
+        for name in names:
+            uid = int(LEGACY_RE.fullmatch(name)['uid'])
+            self.store(os.path.join(self.directory, name), uid)
+
+        if verbose and names:
+            print('INFO - Archived {} stored badge(s).'.format(len(names)))
+        return len(names)
+
+
+    def save(self) -> None:
+        """Write the index to disk."""
+
+        with self._lock:
+            data = {str(k):v for k,v in sorted(self.entries.items())}
+
+        tmpPath = self.indexPath + '.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmpPath, self.indexPath)
@@ -0,0 +1,146 @@
+"""
+PokemonGo.calibration
+---------------------
+
+This module finds the title and activity bands of an unknown device
+from sample badge screenshots, so its profile can be cached in the
+device registry (see :class:`phones.DeviceRegistry`). Each sample is
+read once with word boxes. The activity band spans the stat labels
+(victories, time defended, treats) and the values below them. The
+title band is the first line of text below the status bar. Bands are
+padded by one line height and the median over samples is kept, so an
+odd sample (e.g. a two-line title) does not skew the profile.
+"""
+
+
+import re
+import statistics
+from typing import Iterable, Optional
+
+import cv2
+import numpy as np
+import pytesseract
+
+from .exceptions import CalibrationError
+from .image import binarize
+from .ocr import ENGINES
+
+
+LABELS = {'victories', 'defended', 'treats'}
+STATUS_RE = re.compile(r'\d{1,2}:\d\d|\d+%')   # Clock or battery.
+STATUS_MAX = 0.08      # Status bar lies within this fraction of height.
+TARGET_WIDTH = 1250    # Width, in pixels, the built-in devices are read at.
+
+
+def read_lines(image: np.ndarray) -> list:
+    """
+    Read the lines of text of a screenshot with their bounding rows.
+
+    :param numpy.ndarray image: The BGR screenshot.
+    :returns: ``(top, bottom, words)`` for each line, top to bottom.
+    """
+
+    with ENGINES:
+        data = pytesseract.image_to_data(
+            binarize(image, 1), lang="eng",
+            output_type=pytesseract.Output.DICT
+            )
+
+    lines = dict()
+    for i, word in enumerate(data['text']):
+        word = word.strip().lower()
+        if float(data['conf'][i]) < 0 or not word:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        top = data['top'][i]
+        bottom = top + data['height'][i]
+        if key in lines:
+            prevTop, prevBottom, words = lines[key]
+            lines[key] = (min(prevTop, top), max(prevBottom, bottom), words)
+        else:
+            lines[key] = (top, bottom, list())
+        lines[key][2].append(word)
+
+    return sorted(lines.values(), key=lambda x: x[0])
+
+
+def find_bands(
+        lines: list,
+        height: int,
+        path: Optional[str] = ''
+        ) -> tuple[tuple, tuple]:
+    """
+    Locate the title and activity bands from the lines of a screenshot.
+
+    :param list lines: The output of :func:`read_lines`.
+    :param int height: The screenshot height.
+    :param str path: (optional) The sample path used in errors.
+    :returns: The title and activity bands as ``(start, end)`` rows.
+    :raises CalibrationError: if a band is not found.
+    """
+
+    labels = None
+    for i, (top, bottom, words) in enumerate(lines):
+        if LABELS & set(words):
+            labels = i
+            break
+    # Values are the next line below the labels.
+    if labels is None or labels + 1 == len(lines):
+        raise CalibrationError(path, 'activity')
+    labelTop, labelBottom, _ = lines[labels]
+    pad = labelBottom - labelTop
+    activity = (labelTop - pad, lines[labels + 1][1] + pad)
+
+    statusBottom = 0
+    for top, bottom, words in lines:
+        if top < STATUS_MAX * height and any(STATUS_RE.search(w) for w in words):
+            statusBottom = max(statusBottom, bottom)
+
+    title = None
+    for top, bottom, words in lines[:labels]:
+        if top > statusBottom and any(w.isalpha() for w in words):
+            pad = bottom - top
+            title = (max(0, top - pad), bottom + pad)
+            break
+    if title is None:
+        raise CalibrationError(path, 'title')
+
+    return title, activity
+
+
+def calibrate(paths: Iterable[str]) -> dict:
+    """
+    Measure a device profile from sample screenshots of the same size.
+
+    :param iterable paths: The sample badge images.
+    :returns: The ``dimensions``, OCR ``scale`` and ``title`` and
+        ``activity`` bands. See :meth:`phones.DeviceRegistry.add`.
+    :raises ValueError: if no samples are given or their sizes differ.
+    :raises CalibrationError: if a band is not found in a sample.
+    """
+
+    dimensions = None
+    titles, activities = list(), list()
+    for path in paths:
+        image = cv2.imread(path)
+        if dimensions is None:
+            dimensions = image.shape[:2]
+        elif image.shape[:2] != dimensions:
+            raise ValueError('Samples must come from one device')
+
+        title, activity = find_bands(read_lines(image), dimensions[0], path)
+        titles.append(title)
+        activities.append(activity)
+
+    if dimensions is None:
+        raise ValueError('No samples given')
+
+    def median(bands):
+        return tuple(round(statistics.median(x)) for x in zip(*bands))
+
+    return {
+        'dimensions': tuple(dimensions),
+        'scale': round(TARGET_WIDTH / dimensions[1], 2),
+        'title': median(titles),
+        'activity': median(activities)
+        }
@@ -0,0 +1,119 @@
+"""
+PokemonGo.dataset
+-----------------
+
+This module contains helpers for keeping a local copy of the gym
+database in a typed columnar file. Arrow IPC files (``.arrow``) are read
+memory-mapped, so local tools load the whole database, or only the
+columns they need, in milliseconds without the Sheets API. Parquet
+files (``.parquet``) are smaller and suit backups.
+"""
+
+
+import os
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+
+INT_COLUMNS      = ('uid', 'victories', 'days', 'hours', 'minutes', 'treats')
+FLOAT_COLUMNS    = ('defended',)
+CATEGORY_COLUMNS = ('model', 'style', 'city', 'county', 'state')
+SUFFIXES = ('.arrow', '.parquet')
+
+
+def is_dataset(path: str) -> bool:
+    """Check `path` names a dataset file rather than a csv."""
+    return path.endswith(SUFFIXES)
+
+
+def to_table(records: pd.DataFrame) -> pa.Table:
+    """
+    Convert sheet records to a typed table. Counts are 64-bit integers,
+    repeated text is dictionary encoded and empty cells become nulls.
+
+    :param pandas.DataFrame records: The records in spreadsheet row order.
+    :returns: The table.
+    """
+
+    arrays = dict()
+    for col in records:
+        values = records[col]
+        if col in INT_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce').astype('Int64')
+            arrays[col] = pa.array(values, type=pa.int64())
+        elif col in FLOAT_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce')
+            arrays[col] = pa.array(values, type=pa.float64(), from_pandas=True)
+        else:
+            values = values.astype(str)
+            arrays[col] = pa.array(values, type=pa.string())
+            if col in CATEGORY_COLUMNS:
+                arrays[col] = arrays[col].dictionary_encode()
+
+    return pa.table(arrays)
+
+
+def to_records(table: pa.Table) -> list:
+    """
+    Convert a table back to records typed like
+    :meth:`gspread.models.Worksheet.get_all_records`.
+
+    :param pyarrow.Table table: The table.
+    :returns: One dictionary per row; nulls are empty strings.
+    """
+
+    return [
+        {k: ('' if v is None else v) for k,v in row.items()}
+        for row in table.to_pylist()
+        ]
+
+
+def write(records: pd.DataFrame, path: str) -> None:
+    """
+    Write sheet records to a dataset file. The file is replaced
+    atomically, so readers never see a partial write.
+
+    :param pandas.DataFrame records: The records in spreadsheet row order.
+    :param str path: The file path ending in ``.arrow`` or ``.parquet``.
+    :raises ValueError: if the suffix is not supported.
+    """
+
+    if not is_dataset(path):
+        raise ValueError("Unsupported dataset file '{}'".format(path))
+
+    table = to_table(records)
+    tmpPath = path + '.tmp'
+    if path.endswith('.parquet'):
+        pq.write_table(table, tmpPath)
+    else:
+        with pa.OSFile(tmpPath, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmpPath, path)
+
+
+def read(path: str, columns: Optional[list] = None) -> pa.Table:
+    """
+    Read a dataset file memory-mapped.
+
+    :param str path: The file path ending in ``.arrow`` or ``.parquet``.
+    :param list columns: (optional) The columns to load. Others are
+        never read from disk.
+    :returns: The table.
+    :raises ValueError: if the suffix is not supported.
+    """
+
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    if not path.endswith('.arrow'):
+        raise ValueError("Unsupported dataset file '{}'".format(path))
+
+    # Buffers point into the mapping; nothing is copied until used.
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table
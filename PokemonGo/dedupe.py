@@ -0,0 +1,204 @@
+"""
+PokemonGo.dedupe
+----------------
+
+This module contains helpers for detecting badge images which were
+already scanned. A perceptual difference hash (dHash) of the title and
+activity regions is compared against a persistent index of the badges
+directory, so duplicates are caught before any text is read.
+"""
+
+
+import os
+import re
+import json
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .image import BadgeImage
+
+
+TITLE_HASH_SIZE    = 8    # 64 bits.
+ACTIVITY_HASH_SIZE = 16   # 256 bits; small stat changes must show.
+DUPLICATE_MAX = 4         # Max differing bits for a duplicate.
+NEAR_MAX      = 16        # Max differing bits for a near duplicate.
+
+STORED_RE = re.compile(r'IMG_\d{4,}\.PNG')
+
+
+def dhash(image, size: int) -> int:
+    """
+    Compute the difference hash of an image region.
+
+    :param numpy.ndarray image: The BGR image region.
+    :param int size: The hash width and height. The hash has
+        ``size * size`` bits.
+    :returns: The hash as an integer.
+
+    .. seealso::
+        https://www.hackerfactor.com/blog/index.php?/archives/529-Kind-of-Like-That.html
+    """
+
+    gray  = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits  = small[:, 1:] > small[:, :-1]
+
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def badge_hash(img: BadgeImage) -> int:
+    """
+    Compute the perceptual hash of a badge from its title and activity
+    regions. Sets the default crops on `img` as a side effect.
+
+    :param BadgeImage img: The badge image.
+    :returns: The combined hash as an integer.
+    """
+
+    img.set_title_crop()
+    img.set_activity_crop()
+
+    titleHash    = dhash(img.titleCrop, TITLE_HASH_SIZE)
+    activityHash = dhash(img.activityCrop, ACTIVITY_HASH_SIZE)
+
+    return (titleHash << ACTIVITY_HASH_SIZE ** 2) | activityHash
+
+
+def distance(x: int, y: int) -> int:
+    """Count the differing bits of two hashes."""
+    return (x ^ y).bit_count()
+
+
+class HashIndex:
+    """
+    A persistent index of badge hashes stored as `hashes.json` inside
+    the badges directory.
+
+    :param str directory: The path to the badges directory.
+    :param BadgeArchive archive: (optional) The archive holding stored 
+        badges. If omitted, `IMG_####.PNG` files in `directory` are used.
+
+    Examples:
+
+    .. code:: python
+
+        >>> index = HashIndex('badges')
+        >>> index.refresh()
+        >>> name, dist = index.nearest(badge_hash(img))
+    """
+
+    def __init__(self, directory: str, archive=None) -> None:
+        self.directory = directory
+        self.archive   = archive
+        self.path      = os.path.join(directory, 'hashes.json')
+        self.hashes    = dict()   # File name -> hash.
+        self.pending   = dict()   # Source path -> hash, not yet stored.
+        self._lock     = threading.Lock()
+
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                self.hashes = {k:int(v, 16) for k,v in json.load(f).items()}
+
+
+    def refresh(self, verbose: Optional[bool] = False) -> None:
+        """
+        Hash stored badges missing from the index and drop entries
+        whose file no longer exists.
+
+        :param bool verbose: (optional) If True, print progress statements.
+        """
+
+        if self.archive is not None:
+            stored = {
+                self.archive.name(uid): self.archive.path(uid) 
+                for uid in self.archive.uids()
+                }
+        else:
+            stored = {
+                x: os.path.join(self.directory, x) 
+                for x in os.listdir(self.directory) if STORED_RE.fullmatch(x)
+                }
+        missing = set(stored) - set(self.hashes)
+
+        for name in set(self.hashes) - set(stored):
+            del self.hashes[name]
+        for name in sorted(missing):
+            img = BadgeImage(stored[name])
+            self.hashes[name] = badge_hash(img)
+
+        if missing:
+            self.save()
+        if verbose:
+            print('INFO - Hash index holds {} badge(s).'.format(len(self.hashes)))
+
+
+    def nearest(self, value: int) -> tuple[str, int]:
+        """
+        Find the closest stored or pending badge.
+
+        :param int value: The hash to look up.
+        :returns: The file name and bit distance of the closest badge,
+            or ``('', -1)`` if the index is empty.
+        """
+
+        with self._lock:
+            candidates = list(self.hashes.items()) + list(self.pending.items())
+
+        best = ('', -1)
+        for name, other in candidates:
+            dist = distance(value, other)
+            if best[1] == -1 or dist < best[1]:
+                best = (name, dist)
+                if dist == 0:
+                    break
+
+        return best
+
+
+    def reserve(self, path: str, value: int) -> None:
+        """
+        Hold the hash of a badge being scanned so later copies in the
+        same run are detected.
+        """
+
+        with self._lock:
+            self.pending[path] = value
+
+
+    def release(self, path: str) -> None:
+        """
+        Drop the reserved hash of a badge which was not stored, e.g. 
+        one deferred for review or skipped after an error.
+        """
+
+        with self._lock:
+            self.pending.pop(path, None)
+
+
+    def add(self, path: str, name: str) -> None:
+        """
+        Move a reserved hash into the index once the badge is stored as
+        `name` and save the index.
+        """
+
+        with self._lock:
+            value = self.pending.pop(path, None)
+            if value is None:
+                return
+            self.hashes[name] = value
+        self.save()
+
+
+    def save(self) -> None:
+        """Write the index to disk."""
+
+        with self._lock:
+            data = {k:format(v, 'x') for k,v in self.hashes.items()}
+
+        tmpPath = self.path + '.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmpPath, self.path)
@@ -17,4 +17,41 @@ class InputError(Exception):
 class TitleNotFound(Exception):
     def __str__(self) -> str:
         msg = 'title not found; search possibly over incorrect DataFrame'
-        return msg
\ No newline at end of file
+        return msg
+
+class ReviewRequired(Exception):
+    """
+    Raised instead of prompting the user when prompts are deferred 
+    (see :func:`utils.defer_prompts`).
+
+    :param str reason: The error code e.g. ``TITLE`` or ``CITY``.
+    :param str prompt: The prompt that would have been shown.
+    :param list candidates: (optional) The possible answers found.
+    """
+
+    def __init__(self, reason, prompt, candidates=None):
+        super().__init__(reason)
+        self.reason     = reason
+        self.prompt     = prompt
+        self.candidates = candidates or list()
+
+    def __str__(self) -> str:
+        msg = '{} requires manual review'.format(self.reason)
+        return msg
+
+class CalibrationError(Exception):
+    """
+    Raised when badge regions cannot be located in a sample screenshot.
+
+    :param str path: The sample image.
+    :param str region: The region not found, ``title`` or ``activity``.
+    """
+
+    def __init__(self, path, region):
+        super().__init__(path, region)
+        self.path   = path
+        self.region = region
+
+    def __str__(self) -> str:
+        msg = '{} region not found in {}'.format(self.region, self.path)
+        return msg
@@ -0,0 +1,110 @@
+"""
+PokemonGo.geo
+-------------
+
+This module contains helpers for ordering gym records by location.
+A Hilbert curve key is computed from the `latlon` column so that
+records close on the map are also close once sorted.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+HILBERT_ORDER = 16   # Grid of 2^16 x 2^16 cells.
+ORDERS = ('address', 'hilbert')
+
+
+def parse_latlon(latlon: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split a column of `lat,long` strings into numeric arrays. Invalid
+    or missing coordinates are returned as NaN.
+
+    :param pandas.Series latlon: The coordinates in `lat,long` format.
+    :returns: The latitude and longitude arrays.
+    """
+
+    parts = latlon.astype(str).str.split(',', n=1, expand=True)
+    # Every value failed to split i.e. no coordinates at all.
+    if parts.shape[1] < 2:
+        empty = np.full(len(latlon), np.nan)
+        return empty, empty.copy()
+
+    lat = pd.to_numeric(parts[0].str.strip(), errors='coerce')
+    lon = pd.to_numeric(parts[1].str.strip(), errors='coerce')
+
+    return lat.to_numpy(dtype=float), lon.to_numpy(dtype=float)
+
+
+def hilbert_keys(
+        latlon: pd.Series,
+        order: int = HILBERT_ORDER
+        ) -> np.ndarray:
+    """
+    Compute the Hilbert curve index of each coordinate in a single
+    vectorized pass. Rows with invalid coordinates receive the largest
+    possible key so they sort last.
+
+    :param pandas.Series latlon: The coordinates in `lat,long` format.
+    :param int order: (optional) The curve order i.e. bits per axis.
+    :returns: An array of :class:`numpy.int64` keys.
+
+    .. seealso::
+        https://en.wikipedia.org/wiki/Hilbert_curve
+    """
+
+    lat, lon = parse_latlon(latlon)
+    invalid = (
+        np.isnan(lat) | np.isnan(lon)
+        | (np.abs(lat) > 90) | (np.abs(lon) > 180)
+        )
+
+    n = 1 << order
+    # Scale each axis onto the integer grid [0, n).
+    x = np.floor((np.nan_to_num(lon) + 180) / 360 * (n - 1)).astype(np.int64)
+    y = np.floor((np.nan_to_num(lat) + 90) / 180 * (n - 1)).astype(np.int64)
+    x = np.clip(x, 0, n - 1)
+    y = np.clip(y, 0, n - 1)
+
+    keys = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+
+        # Rotate quadrant so the curve stays continuous.
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+
+    keys[invalid] = np.iinfo(np.int64).max
+    return keys
+
+
+def sort_records(
+        df: pd.DataFrame,
+        order: str = 'hilbert'
+        ) -> pd.DataFrame:
+    """
+    Sort gym records geographically.
+
+    :param pandas.DataFrame df: The gym records.
+    :param str order: (optional) The ordering mode. Allowed values are
+        ``address`` (state, county, city, title) and ``hilbert``.
+    :returns: The sorted records.
+    :raises ValueError: if `order` is not an allowed value.
+    """
+
+    if order == 'address':
+        cols = ['state', 'county', 'city', 'title']
+        return df.sort_values(cols, kind='stable')
+    elif order == 'hilbert':
+        keys = hilbert_keys(df['latlon'])
+        return df.iloc[np.argsort(keys, kind='stable')]
+    else:
+        raise ValueError("Invalid order value '{}'".format(order))
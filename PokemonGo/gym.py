@@ -3,23 +3,403 @@ PokemonGo.gym
 -------------
 
 This module contains the GoldGym class for storing a gold gym's data 
-values in one location.
+values in one location. Values are held by a columnar GymBatch so 
+derived fields of many gyms are computed in one vectorized call, and 
+each GoldGym is a compact view onto one row of its batch. Addresses 
+are geocoded through a cache and rate limiter shared by every gym and 
+player in the process. The public Nominatim service is used unless 
+another endpoint is given, e.g. a self-hosted instance or the fake 
+service in `tests/nominatim.py`.
 """
 
 
+import os
+import time
+import threading
 from typing import Optional
+from functools import lru_cache
+from urllib.parse import urlsplit
 
+import numpy as np
 from geopy.geocoders import Nominatim
 
+from .utils import ask
 
-HRS_IN_DAY  = 24
-MINS_IN_DAY = 1440
+
+HRS_IN_DAY   = 24
+MINS_IN_HOUR = 60
+MINS_IN_DAY  = 1440
 LONG_TERM_DEFENDING = 100   # Unit = days.
+GEOCODE_INTERVAL = 1.0      # Unit = seconds. Nominatim usage policy.
+
+INT_FIELDS  = ('victories', 'days', 'hours', 'minutes', 'treats')
+TEXT_FIELDS = ('title', 'style', 'latlon', 'city', 'county', 'state')
+LOCATION_FIELDS = ('latlon', 'city', 'county', 'state')
+# Gym values in spreadsheet column order (after uid and model).
+FIELDS = (
+    'title', 'style', 'victories', 'days', 'hours', 'minutes', 
+    'defended', 'treats', 'latlon', 'city', 'county', 'state'
+    )
+
+
+@lru_cache(maxsize=None)
+def get_geolocator(email: str, endpoint: Optional[str] = None) -> Nominatim:
+    """
+    Get a geolocator for `email`. Instances are cached so long-running 
+    processes reuse the same HTTP session.
+
+    :param str email: The user email required by third party ToS.
+    :param str endpoint: (optional) The base url of a Nominatim service, 
+        e.g. ``http://localhost:8080``. Defaults to the public service.
+    """
+
+    if endpoint is None:
+        # Increase timeout to handle slow responses from Nominatim.
+        return Nominatim(user_agent=email, timeout=5)
+
+    url = urlsplit(endpoint)
+    return Nominatim(
+        user_agent=email, timeout=5, 
+        domain=url.netloc + url.path.rstrip('/'), scheme=url.scheme or 'http'
+        )
+
+
+class RateLimiter:
+    """
+    Space calls shared by several threads at least `interval` seconds 
+    apart.
+
+    :param float interval: The minimum seconds between calls.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next    = 0.0   # Earliest time of the next call.
+        self._lock    = threading.Lock()
+
+
+    def wait(self) -> None:
+        """Block until the next call is allowed."""
+
+        with self._lock:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = time.monotonic() + self.interval
+
+
+_limiter  = RateLimiter(GEOCODE_INTERVAL)
+_geocodes = dict()   # (endpoint, (lat, long)) -> address dictionary.
+_geocodesLock = threading.Lock()
+
+
+def default_endpoint() -> Optional[str]:
+    """The Nominatim base url set by `NOMINATIM_URL`, if any."""
+    return os.environ.get('NOMINATIM_URL') or None
+
+
+def reverse_geocode(
+        latlon: str, 
+        email: str, 
+        endpoint: Optional[str] = None
+        ) -> dict:
+    """
+    Get the address of coordinates from Nominatim. Answers are cached 
+    for the life of the process. Requests to the public service from 
+    all threads are spaced by :data:`GEOCODE_INTERVAL`; other endpoints 
+    are not rate limited.
+
+    :param str latlon: The coordinates in `lat,long` format.
+    :param str email: The user email required by third party ToS.
+    :param str endpoint: (optional) The base url of a Nominatim service.
+    :returns: The address dictionary, possibly empty.
+    :raises AttributeError: if no location is found.
+    """
+
+    geolocator = get_geolocator(email, endpoint)
+    # (Latitude, Longitude)
+    coordinates = tuple( x.strip() for x in latlon.split(',') )
+    key = (endpoint, coordinates)
+
+    with _geocodesLock:
+        address = _geocodes.get(key)
+    if address is not None:
+        return address
+
+    if endpoint is None:
+        _limiter.wait()
+    location = geolocator.reverse(coordinates)
+    address  = location.raw['address']
+
+    with _geocodesLock:
+        _geocodes[key] = address
+    return address
+
+
+class GymBatch:
+    """
+    Columnar storage for the values of many gyms. Badge statistics are 
+    held in typed NumPy arrays so :meth:`GymBatch.set_time_defended` and 
+    :meth:`GymBatch.set_style` run once for the whole batch.
+
+    :param int size: (optional) The number of gyms with default values.
+
+    Examples:
+
+    .. code:: python
+
+        >>> batch = GymBatch.from_records([
+        ...     {'title': 'starbucks', 'victories': 8, 'days': 21, 
+        ...      'hours': 19, 'minutes': 0, 'treats': 13},
+        ...     {'title': 'big ben', 'days': 104, 'hours': 2}
+        ...     ])
+        >>> batch.set_time_defended()
+        >>> batch.set_style()
+        >>> batch.column('style')
+        array(['gold', '100+ days'], dtype=object)
+        >>> batch[0].defended
+        21.7917
+    """
+
+    def __init__(self, size: Optional[int] = 0) -> None:
+        self._size   = size
+        self._data   = dict()
+        self._errors = dict()   # Gym index to its error list.
+        self._allocate(size)
+
+
+    @classmethod
+    def from_records(cls, records: list) -> 'GymBatch':
+        """
+        Build a batch from gym values, e.g. the dictionaries returned by 
+        :meth:`image.BadgeImage.get_activity_vals`. Missing fields keep 
+        their defaults and unknown keys are ignored.
+
+        :param list records: The dictionaries of gym values.
+        :raises TypeError: if a statistic is not an **int**.
+        """
+
+        batch = cls(len(records))
+        for name in batch._data:
+            values = [r[name] for r in records if name in r]
+            if not values:
+                continue
+            if len(values) < len(records):
+                # Rare; fill gym by gym to keep defaults.
+                for i, r in enumerate(records):
+                    if name in r:
+                        batch.set(i, name, r[name])
+                continue
+            if name in INT_FIELDS:
+                for value in values:
+                    _check_int(name, value)
+            batch._data[name][:] = values
+        return batch
+
+
+    def _allocate(self, capacity: int) -> None:
+        """Grow every column to hold `capacity` gyms."""
+
+        old = self._data
+        self._data = {
+            name: np.zeros(capacity, np.int64) for name in INT_FIELDS
+            }
+        self._data['defended'] = np.zeros(capacity, np.float64)
+        for name in TEXT_FIELDS:
+            self._data[name] = np.full(capacity, None, dtype=object)
+        self._data['title'][:] = ''
+
+        for name, column in old.items():
+            self._data[name][:len(column)] = column
+
+
+    def __len__(self) -> int:
+        return self._size
+
+
+    def __getitem__(self, index: int) -> 'GoldGym':
+        if not -self._size <= index < self._size:
+            raise IndexError('gym index out of range')
+        return GoldGym.view(self, index % self._size)
+
+
+    def __iter__(self):
+        return (GoldGym.view(self, i) for i in range(self._size))
+
+
+    def append(self, **values) -> int:
+        """
+        Add a gym to the batch.
+
+        :param values: The gym values keyed by field name.
+        :returns: The index of the new gym.
+        :raises TypeError: if a statistic is not an **int**.
+        """
+
+        capacity = len(self._data['title'])
+        if self._size == capacity:
+            self._allocate(max(2 * capacity, 8))
+
+        index = self._size
+        self._size += 1
+        for name, value in values.items():
+            self.set(index, name, value)
+        return index
+
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get the values of one field for every gym.
+
+        :param str name: The field name, e.g. ``victories``.
+        :returns: A view of the column; writes go to the batch.
+        """
+
+        return self._data[name][:self._size]
+
+
+    def get(self, index: int, name: str):
+        """Get one gym value as a python type."""
+
+        value = self._data[name][index]
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+
+    def errors(self, index: int) -> list:
+        """
+        Get the errors of one gym, e.g. fields entered by the user. The 
+        list is kept by the batch, so every view of the gym shares it.
+        """
+
+        return self._errors.setdefault(index, list())
+
+
+    def set(self, index: int, name: str, value) -> None:
+        """
+        Set one gym value.
+
+        :raises TypeError: if a statistic is not an **int**.
+        :raises KeyError: if `name` is not a batch field.
+        """
+
+        if name in INT_FIELDS:
+            _check_int(name, value)
+        self._data[name][index] = value
+
+
+    def _span(self, index: Optional[int]) -> slice:
+        if index is None:
+            return slice(0, self._size)
+        return slice(index, index + 1)
+
+
+    def set_time_defended(self, index: Optional[int] = None) -> None:
+        """
+        Compute the total time defended (in days) from defending 
+        attributes, rounded to 4 decimals.
+
+        :param int index: (optional) Compute only this gym.
+        """
+
+        span = self._span(index)
+        days    = self._data['days'][span]
+        hours   = self._data['hours'][span]
+        minutes = self._data['minutes'][span]
+
+        # Round in integer minutes so results equal python's `round`.
+        total = days * MINS_IN_DAY + hours * MINS_IN_HOUR + minutes
+        quotient, remainder = np.divmod(total * 10**4, MINS_IN_DAY)
+        defended = (quotient + (remainder > MINS_IN_DAY // 2)) / 10**4
+
+        # Exact ties are decided by the float sum, as `round` does.
+        for i in np.flatnonzero(remainder == MINS_IN_DAY // 2):
+            totalDays = int(days[i])
+            totalDays += int(hours[i]) / HRS_IN_DAY
+            totalDays += int(minutes[i]) / MINS_IN_DAY
+            defended[i] = round(totalDays, 4)
+
+        self._data['defended'][span] = defended
+
+
+    def set_style(self, index: Optional[int] = None) -> None:
+        """
+        Determine gym style from number of days defended.
+
+        :param int index: (optional) Compute only this gym.
+        """
+
+        span = self._span(index)
+        self._data['style'][span] = np.where(
+            self._data['days'][span] < LONG_TERM_DEFENDING, 
+            'gold', '100+ days'
+            )
+
+
+    def row(self, index: int) -> dict:
+        """
+        Get the values of one gym in spreadsheet column order. Location 
+        fields are omitted until set.
+        """
+
+        return {
+            name: self.get(index, name) for name in FIELDS
+            if name not in LOCATION_FIELDS 
+            or self._data[name][index] is not None
+            }
+
+
+    def to_rows(self) -> list:
+        """Get the values of every gym, see :meth:`GymBatch.row`."""
+
+        columns = {name: self.column(name).tolist() for name in FIELDS}
+        rows = list()
+        for i in range(self._size):
+            rows.append({
+                name: columns[name][i] for name in FIELDS
+                if name not in LOCATION_FIELDS 
+                or columns[name][i] is not None
+                })
+        return rows
+
+
+    def to_frame(self):
+        """
+        Get the batch as a :class:`pandas.DataFrame` with one column 
+        per field.
+        """
+
+        import pandas as pd
+
+        return pd.DataFrame({name: self.column(name) for name in FIELDS})
+
+
+def _check_int(name: str, value) -> None:
+    if not isinstance(value, (int, np.integer)):
+        msg = "Attribute '{}' must be an <class 'int'>".format(name)
+        raise TypeError(msg)
+
+
+class _Column:
+    """A GoldGym attribute stored in the gym's batch."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, gym, owner=None):
+        if gym is None:
+            return self
+        return gym.batch.get(gym.index, self.name)
+
+    def __set__(self, gym, value) -> None:
+        gym.batch.set(gym.index, self.name, value)
 
 
 class GoldGym:
     """
-    Class to manage PokemonGo gym-related attributes.
+    Class to manage PokemonGo gym-related attributes. Values are stored 
+    in a :class:`GymBatch`; a gym created directly owns a batch of one.
 
     :param str title: (optional) The gym title.
     :param int victories: (optional) The number of victories.
@@ -46,11 +426,25 @@ class GoldGym:
         ...     'hours': 3, 'minutes': 40, 'treats': 369
         ...     }
         >>> cc = GoldGym(**params)
+
+        >>> # View onto a gym of a batch.
+        >>> dd = batch[0]
     """
 
-    _intFields = {
-        "victories", "days", "hours", "minutes", "treats"
-        }
+    __slots__ = ('batch', 'index', 'address')
+
+    title     = _Column()
+    style     = _Column()
+    victories = _Column()
+    days      = _Column()
+    hours     = _Column()
+    minutes   = _Column()
+    defended  = _Column()
+    treats    = _Column()
+    latlon    = _Column()
+    city      = _Column()
+    county    = _Column()
+    state     = _Column()
     
     def __init__(
         self, 
@@ -61,24 +455,42 @@ class GoldGym:
         minutes:   Optional[int] = 0,
         treats:    Optional[int] = 0
         ) -> None:
-        self.title     = title
-        self.style     = None
-        self.victories = victories
-        self.days      = days
-        self.hours     = hours
-        self.minutes   = minutes
-        self.defended  = 0
-        self.treats    = treats
-        self.errors    = list()
-    
+        batch = GymBatch()
+        self.index = batch.append(
+            title=title, victories=victories, days=days, hours=hours, 
+            minutes=minutes, treats=treats
+            )
+        self.batch = batch
+
+
+    @classmethod
+    def view(cls, batch: GymBatch, index: int) -> 'GoldGym':
+        """
+        Get the gym stored at `index` of `batch` without copying.
+
+        :param GymBatch batch: The batch holding the gym.
+        :param int index: The row of the gym in the batch.
+        """
+
+        gym = cls.__new__(cls)
+        gym.batch = batch
+        gym.index = index
+        return gym
 
-    def __setattr__(self, name, value):
-        """Check integer attributes for typing."""
 
-        if name in self._intFields and not isinstance(value, int):
-            msg = "Attribute '{}' must be an <class 'int'>".format(name)
-            raise TypeError(msg)
-        super().__setattr__(name, value)
+    @property
+    def errors(self) -> list:
+        """The errors of the gym, kept by its batch."""
+        return self.batch.errors(self.index)
+
+
+    def to_dict(self) -> dict:
+        """
+        Get the gym values in spreadsheet column order. Location fields 
+        are omitted until set.
+        """
+
+        return self.batch.row(self.index)
 
 
     def set_time_defended(self) -> None:
@@ -86,11 +498,7 @@ class GoldGym:
         Compute the total time defended (in days) from defending attributes.
         """
 
-        totalDays = self.days
-        totalDays += self.hours / HRS_IN_DAY
-        totalDays += self.minutes / MINS_IN_DAY
-
-        self.defended = round(totalDays, 4)
+        self.batch.set_time_defended(self.index)
 
 
     def set_style(self) -> None:
@@ -98,16 +506,14 @@ class GoldGym:
         Determine gym style from number of days defended.
         """
 
-        if self.days < LONG_TERM_DEFENDING:
-            self.style = 'gold'
-        else:
-            self.style = '100+ days'
+        self.batch.set_style(self.index)
 
 
     def set_address(
             self, 
             latlon: str, 
-            email: str
+            email: str, 
+            endpoint: Optional[str] = None
             ) -> None:
         """
         Set address dictionary from coordinates using 
@@ -115,17 +521,16 @@ class GoldGym:
 
         :param str latlon: The known coordinates in `lat,long` format.
         :param str email: The user email required by third party ToS.
+        :param str endpoint: (optional) The base url of a Nominatim 
+            service. Defaults to :func:`default_endpoint`, else the 
+            public service.
         """
 
-        self.latlon = latlon
-
-        # Increase timeout to handle slow responses from Nominatim.
-        geolocator  = Nominatim(user_agent=email, timeout=5)
-        # (Latitude, Longitude)
-        coordinates = tuple( x.strip() for x in self.latlon.split(',') )
+        if endpoint is None:
+            endpoint = default_endpoint()
 
-        location     = geolocator.reverse(coordinates)
-        self.address = location.raw['address']
+        self.latlon  = latlon
+        self.address = reverse_geocode(latlon, email, endpoint)
 
         if not self.address:
             self.errors.append('ADDRESS')
@@ -150,7 +555,7 @@ class GoldGym:
             self.errors.append('CITY')
             # Manually enter city name.
             prompt = 'Enter CITY for `{}`:\t'.format(self.latlon)
-            city   = input(prompt).strip()
+            city   = ask(prompt, 'CITY').strip()
 
         self.city = city.lower()
 
@@ -169,7 +574,7 @@ class GoldGym:
             self.errors.append('COUNTY')
             # Manually enter county name.
             prompt = 'Enter COUNTY for `{}`:\t'.format(self.latlon)
-            county = input(prompt).strip()
+            county = ask(prompt, 'COUNTY').strip()
         
         county = county.lower()
         self.county = county.removesuffix(' county')
@@ -189,6 +594,6 @@ class GoldGym:
             self.errors.append('STATE')
             # Manually enter state name (rare in US).
             prompt = 'Enter STATE for `{}`:\t'.format(self.latlon)
-            state = input(prompt).strip()
+            state = ask(prompt, 'STATE').strip()
 
         self.state = state.lower()
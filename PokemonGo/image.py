@@ -10,15 +10,18 @@ by first preprocessing.
 """
 
 
-import os
 import re
-from typing import Optional
+import math
+from typing import Optional, Union
 
 import cv2
 import numpy as np
 import pytesseract
 
 from .exceptions import UnsupportedPhoneModel, InputError
+from .utils import ask
+from .ocr import OcrResult, rank, read_all, ENGINES, MIN_CONFIDENCE
+from .phones import get_registry
 
 
 TOTAL_ACTIVITY_RE = re.compile(r"""
@@ -32,42 +35,243 @@ TOTAL_ACTIVITY_RE = re.compile(r"""
     (?P<treats>\d{1,4})              # Treats.
     """, re.X|re.S)
 
-iSE_DIMENSIONS = (1334, 750)
-i11_DIMENSIONS = (1792, 828)
-i15_DIMENSIONS = (2556, 1179)
+# A single stat cell, e.g. ``23d 6h 16m``.
+DEFENDED_RE = re.compile(r"""
+    ((?P<days>\d{1,3})d)?           # Days.
+    ((?P<hours>\d{1,2})h)?          # Hours.
+    ((?P<minutes>\d{1,2})m)?        # Minutes.
+    (\d{1,2}s)?                     # Seconds (very rare).
+    """, re.X)
+
+TWO_LINE_OFFSET = 40   # Expands title crop north to fit two lines.
+UPSCALE = 2            # Extra scaling on the costliest reads.
+THRESHOLD = 200        # Gray level separating text from background.
+VALUE_THRESHOLD = 120  # Only stat values, not labels, are darker.
+CELL_GAP = 0.05        # Fraction of width separating stat cells.
+WORD_CONFIG = '--psm 8'   # Tesseract mode reading a single word.
+
+# Stat cells of the activity band, left to right, and the characters 
+# tesseract may read in each.
+CELL_CHARS = {
+    'victories': '0123456789',
+    'defended': '0123456789dhms',
+    'treats': '0123456789',
+    }
+
+# Preprocessing of hard titles read concurrently then voted on.
+# Each is (soften overlay, scale factor, threshold).
+TITLE_VARIANTS = (
+    (True,  1,       THRESHOLD),
+    (True,  1,       170),
+    (True,  1,       225),
+    (True,  UPSCALE, THRESHOLD),
+    (False, 1,       THRESHOLD),
+    (False, UPSCALE, THRESHOLD),
+    )
+
+
+def parse_activity(activityText: str) -> Optional[dict]:
+    """
+    Parse badge statistics from activity text without prompting.
+
+    :param str activityText: The text to parse badge statistics.
+    :returns: A dictionary containing badge statistics, or ``None`` if 
+        the text does not match.
+    """
+
+    match = re.search(TOTAL_ACTIVITY_RE, activityText)
+    if match is None:
+        return None
+
+    d = match.groupdict(default=0)
+    return {k:int(v) for k,v in d.items()}
+
+
+def value_columns(band: np.ndarray) -> list:
+    """
+    Locate the stat values of an activity band by vertical projection 
+    of their dark pixels. Values are separated by wide gaps, while 
+    words within a value are close.
+
+    :param numpy.ndarray band: The BGR activity band.
+    :returns: The ``(left, right)`` columns of each value, left to right.
+    """
+
+    gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY)
+    cols = np.flatnonzero((gray < VALUE_THRESHOLD).any(axis=0))
+    if not cols.size:
+        return list()
+
+    breaks = np.flatnonzero(np.diff(cols) > CELL_GAP * gray.shape[1])
+    starts = np.concatenate(([cols[0]], cols[breaks + 1]))
+    ends   = np.concatenate((cols[breaks], [cols[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def split_cells(band: np.ndarray) -> list:
+    """
+    Locate the values of the three stat cells in an activity band (see 
+    :func:`value_columns`). If three values are not found, the band is 
+    split into fixed thirds.
+
+    :param numpy.ndarray band: The BGR activity band.
+    :returns: ``(top, bottom, left, right)`` of each cell, left to right.
+    """
+
+    gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY)
+    ink = gray < VALUE_THRESHOLD
+    height, width = gray.shape
+
+    groups = value_columns(band)
+    if len(groups) != len(CELL_CHARS):
+        groups = [
+            (i * width // 3, (i + 1) * width // 3 - 1) for i in range(3)
+            ]
+
+    cells = list()
+    for left, right in groups:
+        rows = np.flatnonzero(ink[:, left : right + 1].any(axis=1))
+        top, bottom = (rows[0], rows[-1]) if rows.size else (0, height - 1)
+        # Tesseract reads best with a margin around the text.
+        pad = max(2, (bottom - top) // 2)
+        cells.append((
+            max(0, top - pad), min(height, bottom + pad + 1),
+            max(0, left - pad), min(width, right + pad + 1)
+            ))
+    return cells
+
+
+def parse_cells(texts: dict) -> Optional[dict]:
+    """
+    Convert the text of each stat cell to badge statistics.
+
+    :param dict texts: The text read from each cell, keyed as 
+        :data:`CELL_CHARS`.
+    :returns: A dictionary containing badge statistics, or ``None`` if 
+        a cell is not a valid value.
+    """
+
+    victories = texts['victories'].replace(' ', '')
+    treats    = texts['treats'].replace(' ', '')
+    defended  = texts['defended'].replace(' ', '')
+    if not (victories.isdigit() and treats.isdigit()):
+        return None
+
+    match = DEFENDED_RE.fullmatch(defended)
+    if match is None or not defended:
+        return None
+
+    d = match.groupdict(default=0)
+    return {
+        'victories': int(victories), 'days': int(d['days']), 
+        'hours': int(d['hours']), 'minutes': int(d['minutes']), 
+        'treats': int(treats)
+        }
+
+
+def word_crop(
+        image: np.ndarray, 
+        box: tuple, 
+        scale: float
+        ) -> np.ndarray:
+    """
+    Cut a word out of an image region, with a margin.
+
+    :param numpy.ndarray image: The region the word was read from.
+    :param tuple box: The ``(left, top, width, height)`` of the word in 
+        the region resized by `scale`.
+    :param float scale: The resize factor of the read.
+    :returns: The word, at the size of `image`.
+    """
+
+    left, top, width, height = box
+    pad = height / 2
+    x0 = max(0, math.floor((left - pad) / scale))
+    y0 = max(0, math.floor((top - pad) / scale))
+    x1 = min(image.shape[1], math.ceil((left + width + pad) / scale))
+    y1 = min(image.shape[0], math.ceil((top + height + pad) / scale))
+    return image[y0:y1, x0:x1]
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """
+    Decode an encoded image held in memory, e.g. an uploaded PNG.
+
+    :param bytes data: The file contents.
+    :returns: The BGR image.
+    :raises ValueError: if `data` is not a readable image.
+    """
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('data is not a readable image')
+    return image
+
+
+def soften_overlay(image: np.ndarray) -> np.ndarray:
+    """
+    Reconstruct the darkest pixels of an image, i.e. the phone status 
+    bar, using inpainting. See :meth:`BadgeImage.soften_title_overlay`.
+
+    :param numpy.ndarray image: The BGR image region.
+    :returns: A new image.
+    """
+
+    lowerBound = np.array([0, 0, 0], dtype=np.uint8)
+    upperBound = np.array([100, 100, 100], dtype=np.uint8)
+    mask = cv2.inRange(image, lowerBound, upperBound)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    mask = cv2.dilate(mask, kernel, iterations=1)
+
+    return cv2.inpaint(image, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA)
+
+
+def binarize(
+        image: np.ndarray, 
+        scale: float, 
+        threshold: Optional[int] = THRESHOLD
+        ) -> np.ndarray:
+    """
+    Resize, grayscale and threshold an image region for OCR.
+
+    :param numpy.ndarray image: The BGR image region.
+    :param float scale: The resize factor.
+    :param int threshold: (optional) The gray level separating text 
+        from background.
+    :returns: The binary image.
+    """
+
+    height = round(image.shape[0] * scale)
+    width  = round(image.shape[1] * scale)
+    resized   = cv2.resize(image, (width, height))
+    grayscale = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(grayscale, threshold, 230, cv2.THRESH_BINARY)
+
+    return thresh
+
 
 
 class ModelParams:
     """
-    Class to store model dependent parameters for a BadgeImage.
-    Cannot be used on unknown models.
+    Class to store model dependent parameters for a BadgeImage. 
+    Screenshots of unknown sizes are normalized to a device with the 
+    same aspect ratio (see :class:`phones.DeviceRegistry`).
+
+    :param tuple dimensions: The ``(height, width)`` of the screenshot.
+    :raises UnsupportedPhoneModel: if no device has the aspect ratio.
     """
 
     def __init__(self, dimensions):
-        if dimensions == iSE_DIMENSIONS:
-            self.model      = 'iSE'
-            self.scale      = 1.75
-            self.titleStart = 50
-            self.titleEnd   = 140
-            self.activStart = 975
-            self.activEnd   = 1100
-        elif dimensions == i11_DIMENSIONS:
-            self.model      = 'i11'
-            self.scale      = 1.5
-            self.titleStart = 60
-            self.titleEnd   = 150
-            self.activStart = 1075
-            self.activEnd   = 1225
-        elif dimensions == i15_DIMENSIONS:
-            self.model      = 'i15'
-            self.scale      = 1
-            self.titleStart = 110
-            self.titleEnd   = 210
-            self.activStart = 1550
-            self.activEnd   = 1800
-        else:
+        device = get_registry().lookup(tuple(dimensions))
+        if device is None:
             raise UnsupportedPhoneModel
 
+        self.model      = device['model']
+        self.scale      = device['scale']
+        self.titleStart, self.titleEnd = device['title']
+        self.activStart, self.activEnd = device['activity']
+
 
 class BadgeImage:
     """
@@ -75,6 +279,9 @@ class BadgeImage:
 
     :param str path: The file path to the image.
     :param bool verbose: (optional) If True, print progress statements.
+    :param image: (optional) The screenshot already in memory, as a 
+        BGR :class:`numpy.ndarray` or encoded bytes, so `path` is not 
+        read. The file is still needed to store the badge.
 
     Examples: 
 
@@ -82,23 +289,66 @@ class BadgeImage:
 
         >>> # Use relative path.
         >>> img = BadgeImage('badges/IMG_0001.PNG')
+        >>> # Or an upload already in memory.
+        >>> img = BadgeImage('Downloads/upload.PNG', image=data)
     """
     
     def __init__(
             self, 
             path: str, 
-            verbose: Optional[bool] = False
+            verbose: Optional[bool] = False, 
+            image: Optional[Union[np.ndarray, bytes]] = None
             ) -> None:
 
         self.path = path
         self.verbose = verbose
         if self.verbose:
             print('Scanning  {}'.format(path))
-        self.image = cv2.imread(path)
+        if image is None:
+            image = cv2.imread(path)
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            image = decode_image(image)
+        self.image = image
         self.params = ModelParams(self.image.shape[:2])
         self.errors = list()
 
 
+    @classmethod
+    def from_crop(
+            cls, 
+            path: str, 
+            region: str, 
+            dimensions: tuple, 
+            verbose: Optional[bool] = False
+            ) -> 'BadgeImage':
+        """
+        Load a region crop kept by :class:`archive.BadgeArchive` instead 
+        of the full screenshot. Only the loaded region can be read; 
+        :attr:`BadgeImage.image` is ``None``.
+
+        :param str path: The file path to the crop.
+        :param str region: The region, ``title`` or ``activity``.
+        :param tuple dimensions: The ``(height, width)`` of the original 
+            screenshot, which sets the phone model.
+        :param bool verbose: (optional) If True, print progress statements.
+        :raises ValueError: if `region` is not an allowed value.
+        """
+
+        if region not in ('title', 'activity'):
+            raise ValueError("Invalid region value '{}'".format(region))
+
+        img = cls.__new__(cls)
+        img.path    = path
+        img.verbose = verbose
+        if verbose:
+            print('Scanning  {}'.format(path))
+        img.image  = None
+        img.params = ModelParams(tuple(dimensions))
+        img.errors = list()
+        setattr(img, region + 'Crop', cv2.imread(path))
+        return img
+
+
     def set_title_crop(
             self, 
             northOffset: Optional[int] = 0
@@ -143,17 +393,7 @@ class BadgeImage:
             msg += 'must be <numpy.ndarray> type'
             raise TypeError(msg)
         
-        # Reconstruct darkest pixels i.e. the status bar.
-        lowerBound = np.array([0, 0, 0], dtype=np.uint8)
-        upperBound = np.array([100, 100, 100], dtype=np.uint8)
-        mask = cv2.inRange(self.titleCrop, lowerBound, upperBound)
-
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        mask = cv2.dilate(mask, kernel, iterations=1)
-
-        self.titleCrop = cv2.inpaint(
-            self.titleCrop, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA
-            )
+        self.titleCrop = soften_overlay(self.titleCrop)
     
 
     def set_activity_crop(self) -> None:
@@ -182,21 +422,20 @@ class BadgeImage:
         :raises InputError: if regex search does not return match.
         """
 
-        match = re.search(TOTAL_ACTIVITY_RE, activityText)
+        vals = parse_activity(activityText)
 
-        if match is None:
+        if vals is None:
             self.errors.append('STATS')
             # Manually enter image stats.
             prompt = 'Enter STATS for `{}`:\t'.format(self.path)
-            statsText = input(prompt).strip()
+            statsText = ask(prompt, 'STATS', [activityText]).strip()
             # Try matching our regex string again.
-            match  = re.search(TOTAL_ACTIVITY_RE, statsText)
+            vals = parse_activity(statsText)
             # If no match still, raise error.
-            if match is None:
+            if vals is None:
                 raise InputError
         
-        d = match.groupdict(default=0)
-        return {k:int(v) for k,v in d.items()}
+        return vals
     
 
     def get_text(
@@ -215,6 +454,39 @@ class BadgeImage:
         :raises AttributeError: if region crop was not initialized.
         """
 
+        thresh = self.preprocess(region)
+        if thresh is None:
+            return ''
+
+        with ENGINES:
+            txt = pytesseract.image_to_string(thresh, lang="eng")
+
+        # Text cleanup.
+        txt = txt.replace("’", "'")
+        if region == 1:  # Title only.
+            txt = txt.replace('\n', ' ')
+        elif region == 2:  # Activity only.
+            txt = txt.replace('O', '0')
+
+        return txt.strip().lower()
+
+
+    def preprocess(
+            self, 
+            region: str = 'all', 
+            scale: Optional[float] = None
+            ) -> Optional[np.ndarray]:
+        """
+        Resize, grayscale and threshold an image region for OCR.
+
+        :param str region: The image region. 
+            Allowed values are ``all``, ``title``, ``activity``.
+        :param float scale: (optional) The resize factor. Defaults to the 
+            phone model scale.
+        :returns: The binary image, or ``None`` if `region` is invalid.
+        :raises AttributeError: if region crop was not initialized.
+        """
+
         if region == 'all':
             image = self.image
         elif region == 'title':
@@ -223,44 +495,250 @@ class BadgeImage:
             image = self.activityCrop
         else:
             print("Invalid region value")
-            return ''
+            return None
 
-        # Pre-processing.
-        height = round(image.shape[0] * self.params.scale)
-        width  = round(image.shape[1] * self.params.scale)
-        resized   = cv2.resize(image, (width, height))
-        grayscale = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-        _, thresh = cv2.threshold(grayscale, 200, 230, cv2.THRESH_BINARY)
+        if scale is None:
+            scale = self.params.scale
 
-        txt = pytesseract.image_to_string(thresh, lang="eng")
+        return binarize(image, scale)
 
-        # Text cleanup.
-        txt = txt.replace("’", "'")
-        if region == 1:  # Title only.
-            txt = txt.replace('\n', ' ')
-        elif region == 2:  # Activity only.
-            txt = txt.replace('O', '0')
 
-        return txt.strip().lower()
-        
-    
-    def to_storage(
+    def read_text(
             self, 
-            directory: str, 
-            newId: int
-            ) -> None:
+            region: str = 'all', 
+            scale: Optional[float] = None
+            ) -> OcrResult:
         """
-        Move image file to storage as `IMG_####.PNG` where the file 
-        is assigned the `newId` value.
+        Like :meth:`BadgeImage.get_text` but read with 
+        :meth:`pytesseract.image_to_data` so each word carries its 
+        confidence.
 
-        :param str directory: The path to storage directory.
-        :param int newId: The id used in renaming an image.
+        :param str region: The image region. 
+            Allowed values are ``all``, ``title``, ``activity``.
+        :param float scale: (optional) The resize factor. Defaults to the 
+            phone model scale.
+        :returns: The extracted words in full lowercase.
+        :raises AttributeError: if region crop was not initialized.
         """
-    
-        newName = 'IMG_{:04d}.PNG'.format(newId)
-        newPath = os.path.join(directory, newName)
-        os.rename(self.path, newPath)
-        self.path = newPath   # Update image location.
 
-        if self.verbose:
-            print('INFO - BadgeImage successfully relocated.')
+        thresh = self.preprocess(region, scale)
+        if thresh is None:
+            return OcrResult()
+
+        return self._read_data(thresh)
+
+
+    def _read_data(
+            self, 
+            thresh: np.ndarray, 
+            config: Optional[str] = ''
+            ) -> OcrResult:
+        with ENGINES:
+            data = pytesseract.image_to_data(
+                thresh, lang="eng", config=config, 
+                output_type=pytesseract.Output.DICT
+                )
+        return OcrResult.from_data(
+            data, lambda x: x.replace("’", "'").lower()
+            )
+
+
+    def reread_words(
+            self, 
+            res: OcrResult, 
+            region: str = 'title', 
+            minimum: Optional[float] = MIN_CONFIDENCE
+            ) -> OcrResult:
+        """
+        Read again, upscaled and one at a time, only the words of `res` 
+        read with low confidence. Other words keep their text, so a 
+        long title with one doubtful word costs one small OCR call 
+        instead of reading the whole region again.
+
+        :param OcrResult res: A read of the region's current crop at the 
+            phone model scale (see :meth:`BadgeImage.read_text`).
+        :param str region: (optional) The image region, ``title`` or 
+            ``activity``.
+        :param float minimum: (optional) The confidence below which a 
+            word is read again.
+        :returns: The read with each doubtful word replaced if read 
+            more confidently.
+        """
+
+        if res.boxes is None or not res.uncertain(minimum):
+            return res
+
+        crop  = getattr(self, region + 'Crop')
+        scale = self.params.scale
+
+        lines = list()
+        for line, boxes in zip(res.lines, res.boxes):
+            words = list()
+            for (word, conf), box in zip(line, boxes):
+                if conf < minimum:
+                    thresh = binarize(
+                        word_crop(crop, box, scale), scale * UPSCALE
+                        )
+                    again = self._read_data(thresh, WORD_CONFIG)
+                    if again.words and again.confidence > conf:
+                        word = ' '.join(w for w,_ in again.words)
+                        conf = again.confidence
+                words.append((word, conf))
+            lines.append(words)
+
+        return OcrResult(lines, res.boxes)
+
+
+    def vote_title(
+            self, 
+            variants: Optional[tuple] = TITLE_VARIANTS
+            ) -> list:
+        """
+        Read the two-line title crop under several preprocessing 
+        variants at once (see :func:`ocr.read_all`) and rank the texts 
+        by consensus (see :func:`ocr.rank`). Tesseract runs in 
+        subprocesses, so a hard title costs about one OCR latency. Sets 
+        :attr:`BadgeImage.titleCrop` to the softened crop.
+
+        :param tuple variants: (optional) The ``(soften, scale factor, 
+            threshold)`` variants to read.
+        :returns: Every distinct read, the consensus first, so each can 
+            be looked up in the sheet.
+        """
+
+        self.set_title_crop(northOffset=TWO_LINE_OFFSET)
+        crops = {False: self.titleCrop, True: soften_overlay(self.titleCrop)}
+
+        def read(variant):
+            soften, factor, threshold = variant
+            thresh = binarize(
+                crops[soften], self.params.scale * factor, threshold
+                )
+            return lambda: self._read_data(thresh)
+
+        reads = read_all(read(x) for x in variants)
+
+        self.titleCrop = crops[True]
+        return rank(reads)
+
+
+    def read_cells(
+            self, 
+            scale: Optional[float] = None
+            ) -> OcrResult:
+        """
+        Read each stat cell of :attr:`BadgeImage.activityCrop` (see 
+        :func:`split_cells`) as a single line restricted to the 
+        characters of its value. The three cells are read at once.
+
+        :param float scale: (optional) The resize factor. Defaults to the 
+            phone model scale.
+        :returns: One line per cell, victories to treats, so the text 
+            reads e.g. ``'448\\n23d 6h 16m\\n121'``. Empty if a cell is 
+            not a valid value.
+        :raises AttributeError: if activity crop was not initialized.
+        """
+
+        if scale is None:
+            scale = self.params.scale
+        band = self.activityCrop
+
+        def read(item):
+            (top, bottom, left, right), chars = item
+            thresh = binarize(band[top:bottom, left:right], scale)
+            config = '--psm 7 -c tessedit_char_whitelist={}'.format(chars)
+            return self._read_data(thresh, config)
+
+        items = zip(split_cells(band), CELL_CHARS.values())
+        reads = read_all(lambda x=x: read(x) for x in items)
+
+        texts = {k: res.text for k,res in zip(CELL_CHARS, reads)}
+        if parse_cells(texts) is None:
+            return OcrResult()
+        return OcrResult([w for res in reads for w in res.lines])
+
+
+    def read_stats(self) -> Optional[dict]:
+        """
+        Read badge statistics straight from the stat cells, without 
+        parsing free text or prompting.
+
+        :returns: A dictionary containing badge statistics, or ``None`` if 
+            a cell could not be read.
+        :raises AttributeError: if activity crop was not initialized.
+        """
+
+        res = self.read_cells()
+        if not res.words:
+            return None
+        return parse_cells(dict(zip(CELL_CHARS, res.text.split('\n'))))
+
+
+    def title_steps(self, voting: Optional[bool] = True) -> list:
+        """
+        List the title reads in order of cost for 
+        :class:`ocr.Escalation`: the default crop, its doubtful words 
+        (see :meth:`BadgeImage.reread_words`), then either concurrent 
+        variants, handed out best first (see 
+        :meth:`BadgeImage.vote_title`), or, one at a time, a two-line 
+        crop with the status bar softened and the same crop upscaled.
+
+        :param bool voting: (optional) If True, read hard titles 
+            concurrently.
+        """
+
+        first = list()   # The default read, whose words are read again.
+
+        def default():
+            self.set_title_crop()
+            first[:] = [self.read_text(region='title')]
+            return first[0]
+
+        def words():
+            # A resumed scan may not have made the default read.
+            if not first:
+                default()
+            self.set_title_crop()
+            return self.reread_words(first[0], 'title')
+
+        def two_line(scale=None):
+            self.set_title_crop(northOffset=TWO_LINE_OFFSET)
+            self.soften_title_overlay()
+            return self.read_text(region='title', scale=scale)
+
+        if voting:
+            return [default, words, self.vote_title]
+
+        upscaled = lambda: two_line(self.params.scale * UPSCALE)
+        return [default, words, two_line, upscaled]
+
+
+    def activity_steps(self) -> list:
+        """
+        List the activity reads in order of cost for 
+        :class:`ocr.Escalation`: the stat cells one by one (see 
+        :meth:`BadgeImage.read_cells`), then the whole crop as free 
+        text, its doubtful words, then the whole crop upscaled.
+        """
+
+        first = list()   # The free text read, whose words are read again.
+
+        def cells():
+            self.set_activity_crop()
+            return self.read_cells()
+
+        def default(scale=None):
+            self.set_activity_crop()
+            res = self.read_text(region='activity', scale=scale)
+            if scale is None:
+                first[:] = [res]
+            return res
+
+        def words():
+            if not first:
+                default()
+            self.set_activity_crop()
+            return self.reread_words(first[0], 'activity')
+
+        upscaled = lambda: default(self.params.scale * UPSCALE)
+        return [cells, default, words, upscaled]
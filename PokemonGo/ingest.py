@@ -0,0 +1,162 @@
+"""
+PokemonGo.ingest
+----------------
+
+This module contains the ImageQueue class for finding badge images to
+scan. Source folders are listed once with `os.scandir`, candidates are
+yielded lazily oldest first, and each file is confirmed to be a PNG
+from a supported phone model by reading its header only. Queues of
+several players are merged fairly by :func:`interleave`.
+"""
+
+
+import os
+import heapq
+import struct
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Container, Iterable, Iterator, Optional
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+DEFAULT_PATTERNS = ('*.PNG', '*.png')
+
+
+def read_png_size(path: str) -> Optional[tuple[int, int]]:
+    """
+    Read image dimensions from the IHDR chunk of a PNG file.
+
+    :param str path: The file path.
+    :returns: The ``(height, width)`` of the image, or ``None`` if the
+        file is not a PNG.
+    """
+
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(24)
+    except OSError:
+        return None
+
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE:
+        return None
+    if header[12:16] != b'IHDR':
+        return None
+
+    width, height = struct.unpack('>II', header[16:24])
+    return height, width
+
+
+def interleave(sources: Iterable[Iterable]) -> Iterator:
+    """
+    Take one item from each source in turn until all are exhausted, so
+    a long queue does not delay the others.
+
+    :param iterable sources: The iterables to merge.
+    :returns: An iterator of their items, round robin.
+    """
+
+    iterators = deque(iter(x) for x in sources)
+    while iterators:
+        it = iterators.popleft()
+        try:
+            item = next(it)
+        except StopIteration:
+            continue
+        yield item
+        iterators.append(it)
+
+
+class ImageQueue:
+    """
+    An iterator over badge images in one or more folders, in order of
+    modification time (i.e. capture or AirDrop order).
+
+    :param iterable directories: The folders to search.
+    :param iterable patterns: (optional) The glob patterns file names
+        must match. Matching is case-sensitive.
+    :param dimensions: (optional) The ``(height, width)`` pairs accepted,
+        as an iterable or a container such as
+        :class:`phones.DeviceRegistry`. If omitted, any PNG is accepted.
+    :param bool verbose: (optional) If True, print skipped files.
+
+    Examples:
+
+    .. code:: python
+
+        >>> queue = ImageQueue(['/home/me/Downloads'], ['IMG_*.PNG'])
+        >>> len(queue)   # Candidates not yet checked.
+        3
+        >>> for path in queue:
+        ...     print(path)
+    """
+
+    def __init__(
+            self,
+            directories: Iterable[str],
+            patterns: Optional[Iterable[str]] = DEFAULT_PATTERNS,
+            dimensions: Optional[Iterable[tuple]] = None,
+            verbose: Optional[bool] = False
+            ) -> None:
+
+        self.patterns   = tuple(patterns)
+        # Containers, e.g. a device registry, are queried as they are.
+        if not isinstance(dimensions, Container) and dimensions is not None:
+            dimensions = set(dimensions)
+        self.dimensions = dimensions or None
+        self.verbose    = verbose
+        self._heap      = list()
+
+        for directory in directories:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not self.matches(entry.name):
+                        continue
+                    if not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime_ns
+                    self._heap.append((mtime, entry.path))
+
+        # Heapify is linear; each image is then popped in log time.
+        heapq.heapify(self._heap)
+
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+    def __iter__(self):
+        return self
+
+
+    def __next__(self) -> str:
+        while self._heap:
+            _, path = heapq.heappop(self._heap)
+            if self.is_supported(path):
+                return path
+        raise StopIteration
+
+
+    def matches(self, name: str) -> bool:
+        """Check a file name against the glob patterns."""
+        return any(fnmatchcase(name, p) for p in self.patterns)
+
+
+    def is_supported(self, path: str) -> bool:
+        """
+        Check a file is a PNG with supported dimensions.
+
+        :param str path: The file path.
+        """
+
+        size = read_png_size(path)
+
+        if size is None:
+            reason = 'not a PNG image'
+        elif self.dimensions is not None and size not in self.dimensions:
+            reason = 'unsupported dimensions {}x{}'.format(*size)
+        else:
+            return True
+
+        if self.verbose:
+            print('INFO - Skipped {}; {}.'.format(path, reason))
+        return False
@@ -0,0 +1,146 @@
+"""
+PokemonGo.journal
+-----------------
+
+This module contains the RunJournal class, an append-only record of
+each image's progress through a scan. After a crash, the journal lets
+a resumed run skip every stage an image already completed, so nothing
+is read, geocoded or assigned a uid twice.
+"""
+
+
+import os
+import json
+import threading
+
+
+# Stages recorded for each image, in order.
+STAGES = (
+    'extracted', 'matched', 'geocoded', 'assigned', 'written', 'moved'
+    )
+RESET = 'reset'   # Drops the earlier records of an image on replay.
+
+
+class RunJournal:
+    """
+    An append-only journal stored as one JSON record per line.
+
+    :param str path: The path to the journal file.
+    :param bool resume: (optional) If True, keep existing records.
+        Otherwise the journal is truncated to start a new run.
+
+    Examples:
+
+    .. code:: python
+
+        >>> journal = RunJournal('requirements/journal.jsonl')
+        >>> journal.record('IMG_1234.PNG', 'assigned', uid=1410)
+        >>> RunJournal(journal.path, resume=True).progress()
+        {'IMG_1234.PNG': {'assigned': {'uid': 1410}}}
+    """
+
+    def __init__(
+            self,
+            path: str,
+            resume: bool = False
+            ) -> None:
+
+        self.path  = path
+        self._lock = threading.Lock()
+
+        if not resume:
+            open(self.path, 'w').close()
+        elif os.path.isfile(self.path):
+            self._drop_partial()
+
+
+    def _drop_partial(self) -> None:
+        """
+        Cut a line left unfinished by a crash, so the next record starts 
+        on a line of its own.
+        """
+
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                f.truncate(end)
+
+
+    def record(
+            self,
+            imagePath: str,
+            stage: str,
+            **data
+            ) -> None:
+        """
+        Append a completed stage for an image and flush it to disk.
+
+        :param str imagePath: The path identifying the image.
+        :param str stage: The completed stage. See :data:`STAGES`.
+        :param data: The values needed to skip the stage on resume.
+        :raises ValueError: if `stage` is not a known stage.
+        """
+
+        if stage not in STAGES + (RESET,):
+            raise ValueError("Invalid stage value '{}'".format(stage))
+
+        line = json.dumps(
+            {'path': imagePath, 'stage': stage, 'data': data},
+            default=int   # NumPy integers from DataFrames.
+            )
+
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+    def reset(self, imagePath: str) -> None:
+        """
+        Forget the progress of an image, so a resumed run starts it over.
+
+        :param str imagePath: The path identifying the image.
+        """
+
+        self.record(imagePath, RESET)
+
+
+    def progress(self) -> dict:
+        """
+        Replay the journal.
+
+        :returns: The recorded data keyed by image path, then by stage.
+        """
+
+        out = dict()
+        if not os.path.isfile(self.path):
+            return out
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # Partial line from a crash.
+                if rec['stage'] == RESET:
+                    out.pop(rec['path'], None)
+                    continue
+                out.setdefault(rec['path'], dict())[rec['stage']] = rec['data']
+
+        return out
+
+
+    def max_uid(self) -> int:
+        """
+        Find the largest uid assigned in the journal.
+
+        :returns: The uid, or 0 if none were assigned.
+        """
+
+        uids = [
+            stages['assigned']['uid']
+            for stages in self.progress().values()
+            if 'assigned' in stages
+            ]
+        return max(uids, default=0)
@@ -0,0 +1,332 @@
+"""
+PokemonGo.ocr
+-------------
+
+This module contains the OcrResult class holding text read from an
+image region along with tesseract's per-word confidence, and the
+Escalation class which decides how much OCR a region deserves. Reads
+are tried from cheapest to costliest preprocessing and the first
+confident read is accepted, so clean badges cost a single OCR call and
+only doubtful words, then doubtful regions, are read again. Hard
+regions may be read under several preprocessing variants at once (see
+:func:`read_all`) and ranked by :func:`rank`. Every read holds one of the process-wide
+:data:`ENGINES` slots, so concurrent scans, of one or several players,
+share a fixed number of tesseract processes.
+"""
+
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from .utils import similarity
+
+
+MIN_CONFIDENCE = 80   # Tesseract word confidence in range [0, 100].
+
+# Tesseract processes running at once. Hold a slot around each call.
+ENGINE_COUNT = os.cpu_count() or 1
+ENGINES = threading.BoundedSemaphore(ENGINE_COUNT)
+
+# Threads running concurrent reads for every scan (see :func:`read_all`).
+# Threads are only started once reads are submitted.
+_POOL = ThreadPoolExecutor(ENGINE_COUNT, thread_name_prefix='ocr')
+
+
+class OcrResult:
+    """
+    Text read from an image region.
+
+    :param list lines: (optional) The lines of text, each a list of
+        ``(word, confidence)`` pairs.
+    :param list boxes: (optional) The ``(left, top, width, height)`` of
+        each word in the image read, by line like `lines`. ``None`` if
+        unknown, e.g. for text entered by the user.
+
+    Examples:
+
+    .. code:: python
+
+        >>> res = OcrResult([[('starbucks', 96.0)], [('coffee', 41.5)]])
+        >>> res.text
+        'starbucks\\ncoffee'
+        >>> res.confidence
+        41.5
+        >>> res.is_confident()
+        False
+    """
+
+    def __init__(
+            self,
+            lines: Optional[list] = None,
+            boxes: Optional[list] = None
+            ) -> None:
+        self.lines = lines or list()
+        self.boxes = boxes
+
+
+    @classmethod
+    def from_data(
+            cls,
+            data: dict,
+            clean: Optional[Callable[[str], str]] = None
+            ) -> 'OcrResult':
+        """
+        Build a result from the output of :meth:`pytesseract.image_to_data`
+        with ``output_type=Output.DICT``.
+
+        :param dict data: The tesseract data.
+        :param callable clean: (optional) A function applied to each word.
+        :returns: The result with words grouped by line, with their boxes
+            if `data` holds them.
+        """
+
+        hasBoxes = 'left' in data
+        lines, boxes = dict(), dict()
+        for i, word in enumerate(data['text']):
+            conf = float(data['conf'][i])
+            if clean is not None:
+                word = clean(word)
+            # Rows with negative confidence are layout, not words.
+            if conf < 0 or not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, list()).append((word.strip(), conf))
+            if hasBoxes:
+                boxes.setdefault(key, list()).append(tuple(
+                    int(data[k][i]) for k in ('left', 'top', 'width', 'height')
+                    ))
+
+        keys = sorted(lines)
+        if not hasBoxes:
+            return cls([lines[k] for k in keys])
+        return cls([lines[k] for k in keys], [boxes[k] for k in keys])
+
+
+    @classmethod
+    def from_text(
+            cls,
+            text: str,
+            confidence: Optional[float] = 100.0
+            ) -> 'OcrResult':
+        """
+        Build a result from plain text, e.g. text restored from a journal
+        or entered by the user.
+
+        :param str text: The text.
+        :param float confidence: (optional) The confidence of every word.
+        """
+
+        lines = [
+            [(word, confidence) for word in line.split()]
+            for line in text.splitlines()
+            ]
+        return cls([x for x in lines if x])
+
+
+    def __str__(self) -> str:
+        return self.text
+
+
+    def __repr__(self) -> str:
+        return 'OcrResult({!r}, confidence={:.1f})'.format(
+            self.text, self.confidence
+            )
+
+
+    @property
+    def text(self) -> str:
+        """The words joined by spaces and lines joined by newlines."""
+        return '\n'.join(' '.join(w for w,_ in line) for line in self.lines)
+
+
+    @property
+    def words(self) -> list:
+        """All ``(word, confidence)`` pairs in reading order."""
+        return [pair for line in self.lines for pair in line]
+
+
+    @property
+    def confidence(self) -> float:
+        """The lowest word confidence, or 0 if nothing was read."""
+
+        words = self.words
+        if not words:
+            return 0.0
+        return min(conf for _,conf in words)
+
+
+    def uncertain(self, minimum: Optional[float] = MIN_CONFIDENCE) -> list:
+        """List the words read with confidence below `minimum`."""
+        return [w for w,conf in self.words if conf < minimum]
+
+
+    def is_confident(self, minimum: Optional[float] = MIN_CONFIDENCE) -> bool:
+        """Check every word was read with confidence of at least `minimum`."""
+        return bool(self.words) and self.confidence >= minimum
+
+
+class Escalation:
+    """
+    The reads of one image region, run one at a time in order of cost.
+
+    :param iterable steps: The read functions, cheapest first. Each
+        returns an :class:`OcrResult`, or a list of them best first, and
+        must set up its own crop. Reads returned as a list are handed
+        out one at a time without further OCR.
+    :param float minimum: (optional) The confidence accepting a read.
+    :param int skip: (optional) The number of leading steps already run
+        in a prior scan.
+
+    Examples:
+
+    .. code:: python
+
+        >>> esc = Escalation(img.title_steps())
+        >>> res = esc.best()       # Stops at the first confident read.
+        >>> res = esc.next_read()  # Costlier read; None when exhausted.
+        >>> res = esc.first(lambda x: parse_activity(x.text) is not None)
+    """
+
+    def __init__(
+            self,
+            steps: Iterable[Callable[[], OcrResult]],
+            minimum: Optional[float] = MIN_CONFIDENCE,
+            skip: Optional[int] = 0
+            ) -> None:
+        self.steps   = list(steps)[skip:]
+        self.minimum = minimum
+        self.reads   = list()
+        self.ran     = skip       # Steps run, including skipped ones.
+        self._queued = list()     # Further reads of the last step.
+
+
+    def __len__(self) -> int:
+        """The number of reads made."""
+        return len(self.reads)
+
+
+    @property
+    def exhausted(self) -> bool:
+        return not (self.steps or self._queued)
+
+
+    def next_read(self) -> Optional[OcrResult]:
+        """
+        Run the next costlier read.
+
+        :returns: The result, or ``None`` if all steps were run.
+        """
+
+        if self._queued:
+            res = self._queued.pop(0)
+        elif self.steps:
+            res = self.steps.pop(0)()
+            self.ran += 1
+            if isinstance(res, list):
+                res, self._queued = (res or [OcrResult()])[0], res[1:]
+        else:
+            return None
+        self.reads.append(res)
+        return res
+
+
+    def best(self) -> OcrResult:
+        """
+        Read until a confident result is found or steps run out.
+
+        :returns: The first confident read, else the most confident read.
+        """
+
+        for res in self.reads:
+            if res.is_confident(self.minimum):
+                return res
+
+        while not self.exhausted:
+            res = self.next_read()
+            if res.is_confident(self.minimum):
+                return res
+
+        if not self.reads:
+            return OcrResult()
+        return max(self.reads, key=lambda x: x.confidence)
+
+
+    def first(self, valid: Callable[[OcrResult], bool]) -> Optional[OcrResult]:
+        """
+        Read until a confident read passes `valid` or steps run out. A
+        read which fails `valid` is never accepted, however confident.
+
+        :param callable valid: Checks a read, e.g. that its text parses.
+        :returns: The first confident valid read, else the first valid
+            read, or ``None`` if no read is valid.
+        """
+
+        found = None
+        i = 0
+        while True:
+            for res in self.reads[i:]:
+                if valid(res):
+                    if res.is_confident(self.minimum):
+                        return res
+                    found = found or res
+            i = len(self.reads)
+            if self.next_read() is None:
+                return found
+
+
+def read_all(reads: Iterable[Callable[[], OcrResult]]) -> list:
+    """
+    Run several reads at once, e.g. the variants of a hard title. Reads 
+    of every scan share one thread per :data:`ENGINES` slot instead of 
+    each starting its own threads. Reads must not call this function.
+
+    :param iterable reads: The read functions.
+    :returns: The results, in order of `reads`.
+    """
+
+    return list(_POOL.map(lambda read: read(), reads))
+
+
+def rank(reads: Iterable[OcrResult]) -> list:
+    """
+    Order several reads of the same region by consensus. Every read 
+    adds its confidence, weighted by text similarity, to each read's 
+    score, so matching texts reinforce each other and near misses still 
+    count towards the closest text.
+
+    :param iterable reads: The reads to rank.
+    :returns: The reads which hold any words, highest score first, 
+        without repeated texts.
+    """
+
+    reads = [x for x in reads if x.words]
+
+    def score(res):
+        # Words read with no confidence still cast a small vote.
+        return sum(
+            similarity(res.text, other.text) * max(other.confidence, 1)
+            for other in reads
+            )
+
+    ranked, seen = list(), set()
+    for res in sorted(reads, key=lambda x: (score(x), x.confidence), reverse=True):
+        if res.text not in seen:
+            seen.add(res.text)
+            ranked.append(res)
+    return ranked
+
+
+def vote(reads: Iterable[OcrResult]) -> OcrResult:
+    """
+    Pick the consensus of several reads of the same region (see 
+    :func:`rank`).
+
+    :param iterable reads: The reads to vote on.
+    :returns: The read with the highest score, or an empty result if 
+        nothing was read.
+    """
+
+    ranked = rank(reads)
+    return ranked[0] if ranked else OcrResult()
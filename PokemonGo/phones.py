@@ -0,0 +1,178 @@
+"""
+PokemonGo.phones
+----------------
+
+This module contains the crop geometry of supported devices. It has no
+heavy dependencies so that files can be filtered before OpenCV is
+loaded.
+
+Each device profile gives the OCR scale factor and the rows of the
+title and activity bands of its screenshots. Screenshots of any other
+size with the aspect ratio of a known device are normalized to it:
+bands scale with the height and the OCR scale factor with the width,
+so text reaches tesseract at the same size. Profiles of other devices
+are found by calibration (see `calibrate.py`) and cached in
+`requirements/devices.json`:
+
+.. code:: json
+
+    {"ipad9": {"dimensions": [2160, 1620], "scale": 0.78,
+               "title": [95, 185], "activity": [1460, 1640]}}
+"""
+
+
+import os
+import json
+from typing import Optional
+
+
+iSE_DIMENSIONS = (1334, 750)
+i11_DIMENSIONS = (1792, 828)
+i15_DIMENSIONS = (2556, 1179)
+SUPPORTED_DIMENSIONS = (iSE_DIMENSIONS, i11_DIMENSIONS, i15_DIMENSIONS)
+
+DEVICES = {
+    'iSE': {
+        'dimensions': iSE_DIMENSIONS, 'scale': 1.75,
+        'title': (50, 140), 'activity': (975, 1100)
+        },
+    'i11': {
+        'dimensions': i11_DIMENSIONS, 'scale': 1.5,
+        'title': (60, 150), 'activity': (1075, 1225)
+        },
+    'i15': {
+        'dimensions': i15_DIMENSIONS, 'scale': 1,
+        'title': (110, 210), 'activity': (1550, 1800)
+        },
+    }
+
+ASPECT_TOLERANCE = 0.01   # Relative difference of height/width ratios.
+
+
+class DeviceRegistry:
+    """
+    The device profiles known to the package, looked up by screenshot
+    dimensions.
+
+    :param str path: (optional) The json file of calibrated profiles.
+        Loaded if it exists and written by :meth:`DeviceRegistry.add`.
+
+    Examples:
+
+    .. code:: python
+
+        >>> registry = DeviceRegistry()
+        >>> registry.lookup((1334, 750))['model']
+        'iSE'
+        >>> registry.lookup((2001, 1125))   # 1.5x an iPhone SE.
+        {'model': '2001x1125', 'scale': 1.1667, 'title': (75, 210), ...}
+        >>> (1024, 768) in registry
+        False
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path    = path
+        self.devices = {k: dict(v) for k,v in DEVICES.items()}
+        self._sizes  = dict()   # (height, width) -> model.
+
+        if path is not None and os.path.isfile(path):
+            with open(path) as f:
+                self.devices.update(json.load(f))
+        for model, device in self.devices.items():
+            self._sizes[tuple(device['dimensions'])] = model
+
+
+    def __contains__(self, dimensions: tuple) -> bool:
+        return self.lookup(dimensions) is not None
+
+
+    def lookup(self, dimensions: tuple) -> Optional[dict]:
+        """
+        Get the crop geometry of screenshots of size `dimensions`.
+
+        :param tuple dimensions: The ``(height, width)`` of a screenshot.
+        :returns: The ``model`` name, OCR ``scale`` and the ``title`` and
+            ``activity`` bands as ``(start, end)`` rows, or ``None`` if no
+            device has the aspect ratio.
+        """
+
+        height, width = dimensions
+        model = self._sizes.get((height, width))
+        if model is not None:
+            device = self.devices[model]
+            return {
+                'model': model, 'scale': device['scale'],
+                'title': tuple(device['title']),
+                'activity': tuple(device['activity'])
+                }
+
+        # Closest aspect ratio within tolerance.
+        best, bestDiff = None, ASPECT_TOLERANCE
+        for device in self.devices.values():
+            refHeight, refWidth = device['dimensions']
+            diff = abs((height / width) / (refHeight / refWidth) - 1)
+            if diff <= bestDiff:
+                best, bestDiff = device, diff
+        if best is None:
+            return None
+
+        refHeight, refWidth = best['dimensions']
+        factor = height / refHeight
+        return {
+            'model': '{}x{}'.format(height, width),
+            'scale': round(best['scale'] * refWidth / width, 4),
+            'title': tuple(round(x * factor) for x in best['title']),
+            'activity': tuple(round(x * factor) for x in best['activity'])
+            }
+
+
+    def add(
+            self,
+            model: str,
+            dimensions: tuple,
+            scale: float,
+            title: tuple,
+            activity: tuple
+            ) -> None:
+        """
+        Register a calibrated device and save it to :attr:`path`.
+
+        :param str model: The device name.
+        :param tuple dimensions: The ``(height, width)`` of its screenshots.
+        :param float scale: The OCR scale factor.
+        :param tuple title: The ``(start, end)`` rows of the title band.
+        :param tuple activity: The ``(start, end)`` rows of the activity band.
+        :raises ValueError: if `model` names a built-in device.
+        """
+
+        if model in DEVICES:
+            raise ValueError("Device '{}' is built in".format(model))
+
+        self.devices[model] = {
+            'dimensions': list(dimensions), 'scale': scale,
+            'title': list(title), 'activity': list(activity)
+            }
+        self._sizes[tuple(dimensions)] = model
+
+        if self.path is None:
+            return
+        calibrated = {k:v for k,v in self.devices.items() if k not in DEVICES}
+        tmpPath = self.path + '.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump(calibrated, f, indent=4)
+        os.replace(tmpPath, self.path)
+
+
+_registry = None
+
+
+def get_registry() -> DeviceRegistry:
+    """
+    Get the registry shared by the package, including devices cached at
+    the `DEVICES` path set by :func:`utils.load_env`.
+    """
+
+    global _registry
+    if _registry is None:
+        _registry = DeviceRegistry(os.environ.get('DEVICES'))
+    return _registry
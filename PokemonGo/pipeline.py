@@ -0,0 +1,228 @@
+"""
+PokemonGo.pipeline
+------------------
+
+This module contains the Pipeline class for running work through a
+series of stages connected by bounded queues. Each stage has its own
+pool of worker threads, so slow stages (OCR, network calls, user
+prompts) overlap instead of idling while another stage runs. A full
+queue blocks the stage feeding it, which keeps memory bounded.
+"""
+
+
+import time
+import queue
+import threading
+from typing import Callable, Iterable, Optional
+
+
+# Stages which prompt the user should hold this lock while prompting
+# so that questions from concurrent stages are never interleaved.
+PROMPT_LOCK = threading.RLock()
+
+_STOP = object()   # Sentinel ending a stage.
+
+
+class Stage:
+    """
+    A pipeline stage applying `func` to every item of its input queue.
+    The return value of `func` is passed to the next stage. Returning
+    ``None`` drops the item.
+
+    :param str name: The stage name shown in reports.
+    :param callable func: The function applied to each item.
+    :param int workers: (optional) The number of concurrent workers.
+    :param int maxsize: (optional) The input queue capacity.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            func: Callable,
+            workers: Optional[int] = 1,
+            maxsize: Optional[int] = 4
+            ) -> None:
+
+        self.name    = name
+        self.func    = func
+        self.workers = max(1, workers)
+        self.inbox   = queue.Queue(maxsize=maxsize)
+        self.done    = 0
+        self.busy    = 0.0    # Seconds spent inside `func`.
+        self.peak    = 0      # Highest observed queue depth.
+        self._lock   = threading.Lock()
+        self._threads = list()
+
+
+    @property
+    def depth(self) -> int:
+        """The number of items waiting in the input queue."""
+        return self.inbox.qsize()
+
+
+    def put(self, item) -> None:
+        """Add an item to the input queue, blocking while it is full."""
+
+        self.inbox.put(item)
+        with self._lock:
+            self.peak = max(self.peak, self.inbox.qsize())
+
+
+class Pipeline:
+    """
+    Class to run items through a sequence of stages.
+
+    :param bool verbose: (optional) If True, print stage statistics.
+    :param callable onError: (optional) Called as ``onError(item, e)`` 
+        when a stage raises. The item is dropped and the pipeline keeps 
+        running.
+
+    Examples:
+
+    .. code:: python
+
+        >>> p = Pipeline()
+        >>> p.add_stage('double', lambda x: 2 * x, workers=2)
+        >>> p.add_stage('collect', results.append)
+        >>> p.run(range(10))
+
+    .. note::
+        Without `onError`, if any stage raises an exception, remaining
+        items are drained without being processed and the first
+        exception is re-raised by :meth:`Pipeline.run`.
+    """
+
+    def __init__(
+            self,
+            verbose: Optional[bool] = False,
+            onError: Optional[Callable] = None
+            ) -> None:
+
+        self.verbose = verbose
+        self.onError = onError
+        self.stages  = list()
+        self._error  = None
+        self._failed = threading.Event()
+
+
+    def add_stage(
+            self,
+            name: str,
+            func: Callable,
+            workers: Optional[int] = 1,
+            maxsize: Optional[int] = 4
+            ) -> None:
+        """
+        Append a stage to the pipeline. See :class:`Stage` for parameters.
+        """
+
+        self.stages.append(Stage(name, func, workers, maxsize))
+
+
+    def _work(self, index: int) -> None:
+        """Worker loop for the stage at position `index`."""
+
+        stage = self.stages[index]
+        nextStage = None
+        if index + 1 < len(self.stages):
+            nextStage = self.stages[index + 1]
+
+        while True:
+            item = stage.inbox.get()
+            if item is _STOP:
+                return
+            # Drain remaining items once the pipeline has failed.
+            if self._failed.is_set():
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                if self.onError is not None:
+                    self.onError(item, e)
+                else:
+                    self._error = self._error or e
+                    self._failed.set()
+                continue
+
+            with stage._lock:
+                stage.busy += time.perf_counter() - start
+                stage.done += 1
+
+            if result is not None and nextStage is not None:
+                nextStage.put(result)
+
+
+    def run(self, source: Iterable) -> None:
+        """
+        Feed every item of `source` through all stages and wait for the
+        pipeline to empty.
+
+        :param iterable source: The items given to the first stage.
+        :raises Exception: the first exception raised by any stage.
+        """
+
+        self._error = None
+        self._failed.clear()
+        start = time.perf_counter()
+
+        for i,stage in enumerate(self.stages):
+            stage._threads = [
+                threading.Thread(target=self._work, args=(i,), daemon=True)
+                for _ in range(stage.workers)
+                ]
+            for t in stage._threads:
+                t.start()
+
+        try:
+            for item in source:
+                if self._failed.is_set():
+                    break
+                self.stages[0].put(item)
+        finally:
+            # Close stages in order so each sees all upstream output.
+            for stage in self.stages:
+                for _ in stage._threads:
+                    stage.inbox.put(_STOP)
+                for t in stage._threads:
+                    t.join()
+
+        if self.verbose:
+            print(self.report(time.perf_counter() - start))
+
+        if self._error is not None:
+            raise self._error
+
+
+    def status(self) -> str:
+        """
+        Summarize the current queue depth of every stage.
+
+        :returns: A single line such as ``extract 2 | match 0``.
+        """
+
+        return ' | '.join(
+            '{} {}'.format(s.name, s.depth) for s in self.stages
+            )
+
+
+    def report(self, elapsed: float) -> str:
+        """
+        Summarize stage throughput after a run.
+
+        :param float elapsed: The wall-clock duration of the run.
+        :returns: A multi-line table of per-stage statistics.
+        """
+
+        lines = ['INFO - Pipeline finished in {:.2f}s.'.format(elapsed)]
+        lines.append('{:<10}{:>8}{:>8}{:>10}{:>10}'.format(
+            'stage', 'items', 'peak', 'busy(s)', 'items/s'
+            ))
+        for s in self.stages:
+            rate = s.done / s.busy if s.busy else 0.0
+            lines.append('{:<10}{:>8}{:>8}{:>10.2f}{:>10.2f}'.format(
+                s.name, s.done, s.peak, s.busy, rate
+                ))
+
+        return '\n'.join(lines)
@@ -0,0 +1,225 @@
+"""
+PokemonGo.profiles
+------------------
+
+This module contains the Profile class holding the settings of one
+player: the sheet to write, the folders to scan and where badges and
+run state are stored. The default profile comes from `variables.env`.
+Further profiles are listed in `requirements/profiles.json`, keyed by
+name, using the same setting names as `variables.env`. Settings a
+profile omits fall back to `variables.env`, except `SOURCES`, which
+each profile must name:
+
+.. code:: json
+
+    {
+        "ash":   {"SOURCES": "~/Downloads/ash", "SHEET_NAME": "ash gyms"},
+        "misty": {"SOURCES": "~/Downloads/misty", "JSON_KEY": "misty.json",
+                  "SHEET_NAME": "misty gyms", "EMAIL": "misty@mail.com"}
+    }
+"""
+
+
+import os
+import re
+import json
+from typing import Iterable, Optional
+
+
+NAME_RE = re.compile(r'\w+')
+
+
+class Profile:
+    """
+    The settings and storage paths of one player.
+
+    :param str name: The profile name. Empty for the default profile.
+    :param str keyPath: The path to the json key for Google API access.
+    :param str sheetName: The spreadsheet name.
+    :param str email: The user email required by Nominatim ToS.
+    :param iterable sources: The folders scanned for new badges.
+    :param iterable patterns: The glob patterns of badge file names.
+    :param str badges: The badge archive directory.
+    :param str review: The review queue directory.
+    :param str journal: The run journal file.
+    :param str snapshot: The csv snapshot of the sheet.
+    :param str dataset: The local dataset of the sheet.
+    :param str logFile: The log file.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            keyPath: str,
+            sheetName: str,
+            email: str,
+            sources: Iterable[str],
+            patterns: Iterable[str],
+            badges: str,
+            review: str,
+            journal: str,
+            snapshot: str,
+            dataset: str,
+            logFile: str
+            ) -> None:
+        self.name      = name
+        self.keyPath   = keyPath
+        self.sheetName = sheetName
+        self.email     = email
+        self.sources   = list(sources)
+        self.patterns  = list(patterns)
+        self.badges    = badges
+        self.review    = review
+        self.journal   = journal
+        self.snapshot  = snapshot
+        self.dataset   = dataset
+        self.logFile   = logFile
+
+
+    def __repr__(self) -> str:
+        return 'Profile({!r})'.format(self.name)
+
+
+    @classmethod
+    def from_env(cls) -> 'Profile':
+        """
+        Create the default profile from the environment set by
+        :func:`utils.load_env`. Google and Nominatim settings are
+        ``None`` if loaded offline.
+        """
+
+        env = os.environ
+        return cls(
+            name      = '',
+            keyPath   = env.get('KEY_PATH'),
+            sheetName = env.get('SHEET_NAME'),
+            email     = env.get('EMAIL'),
+            sources   = env['SOURCES'].split(os.pathsep),
+            patterns  = env['PATTERNS'].split(','),
+            badges    = env['BADGES'],
+            review    = env['REVIEW'],
+            journal   = env['JOURNAL'],
+            snapshot  = env['SNAPSHOT'],
+            dataset   = env['DATASET'],
+            logFile   = env['LOGGER']
+            )
+
+
+    @classmethod
+    def from_config(
+            cls,
+            name: str,
+            config: dict,
+            base: 'Profile',
+            topDir: str
+            ) -> 'Profile':
+        """
+        Create a named profile. Run state is kept under
+        `requirements/profiles/<name>` and badges under `badges/<name>`
+        unless `BADGES` is set.
+
+        :param str name: The profile name.
+        :param dict config: The profile settings.
+        :param Profile base: The default profile supplying omitted settings.
+        :param str topDir: The top level directory of the package.
+        :raises ValueError: if the name is not a single word.
+        :raises EnvironmentError: if `SOURCES` is missing.
+        :raises FileNotFoundError: if the json key file is not found.
+        """
+
+        if not NAME_RE.fullmatch(name):
+            raise ValueError("Invalid profile name '{}'".format(name))
+        if not config.get('SOURCES'):
+            raise EnvironmentError(
+                "Profile '{}' does not set SOURCES".format(name)
+                )
+
+        requirements = os.path.join(topDir, 'requirements')
+        state = os.path.join(requirements, 'profiles', name)
+
+        keyPath = base.keyPath
+        if 'JSON_KEY' in config:
+            keyPath = os.path.join(requirements, config['JSON_KEY'])
+        if not os.path.isfile(keyPath):
+            raise FileNotFoundError(keyPath)
+
+        sources  = [os.path.expanduser(x.strip()) for x in config['SOURCES'].split(',')]
+        patterns = base.patterns
+        if 'PATTERNS' in config:
+            patterns = [x.strip() for x in config['PATTERNS'].split(',')]
+
+        badges = os.path.join(topDir, 'badges', name)
+        if 'BADGES' in config:
+            badges = os.path.join(topDir, os.path.expanduser(config['BADGES']))
+
+        return cls(
+            name      = name,
+            keyPath   = keyPath,
+            sheetName = config.get('SHEET_NAME', base.sheetName),
+            email     = config.get('EMAIL', base.email),
+            sources   = sources,
+            patterns  = patterns,
+            badges    = badges,
+            review    = os.path.join(state, 'review'),
+            journal   = os.path.join(state, 'journal.jsonl'),
+            snapshot  = os.path.join(state, 'snapshot.csv'),
+            dataset   = os.path.join(state, 'gyms.arrow'),
+            logFile   = os.path.join(state, 'pogo.log')
+            )
+
+
+    def prepare(self) -> None:
+        """Create the directories the profile writes to."""
+
+        os.makedirs(self.badges, exist_ok=True)
+        for path in (self.journal, self.logFile, self.snapshot, self.dataset):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+def load_profiles(
+        path: str,
+        names: Optional[Iterable[str]] = None,
+        base: Optional[Profile] = None
+        ) -> list:
+    """
+    Load named profiles from a json file.
+
+    :param str path: The path to `profiles.json`.
+    :param iterable names: (optional) The profiles to load, in order.
+        Defaults to every profile in the file.
+    :param Profile base: (optional) The default profile supplying
+        omitted settings. Defaults to :meth:`Profile.from_env`.
+    :returns: The list of profiles.
+    :raises KeyError: if a name is not in the file.
+    :raises ValueError: if two profiles scan the same folder.
+    """
+
+    with open(path) as f:
+        configs = json.load(f)
+
+    if base is None:
+        base = Profile.from_env()
+    if names is None:
+        names = list(configs)
+
+    topDir = os.path.dirname(os.path.dirname(os.path.abspath(path)))
+    profiles = list()
+    for name in names:
+        if name not in configs:
+            raise KeyError("Profile '{}' not found in {}".format(name, path))
+        profiles.append(Profile.from_config(name, configs[name], base, topDir))
+
+    # Each image must belong to exactly one player.
+    owners = dict()
+    for profile in profiles:
+        for source in profile.sources:
+            source = os.path.normpath(source)
+            if source in owners:
+                raise ValueError(
+                    "Profiles '{}' and '{}' share folder '{}'".format(
+                        owners[source], profile.name, source
+                    ))
+            owners[source] = profile.name
+
+    return profiles
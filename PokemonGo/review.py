@@ -0,0 +1,136 @@
+"""
+PokemonGo.review
+----------------
+
+This module contains the ReviewQueue class for storing badges which
+need manual input. Unattended runs move each ambiguous badge into the
+review directory along with its OCR text, candidate answers and region
+crops, so it can be resolved later in a single interactive session.
+"""
+
+
+import os
+import json
+import shutil
+
+import cv2
+
+
+class ReviewQueue:
+    """
+    A persistent queue of badges waiting for manual review. Entries are
+    stored one per line in `queue.jsonl` inside `directory`.
+
+    :param str directory: The path to the review directory.
+
+    Examples:
+
+    .. code:: python
+
+        >>> rq = ReviewQueue('review')
+        >>> for entry in rq.entries():
+        ...     print(entry['path'], entry['reason'])
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, 'queue.jsonl')
+        os.makedirs(directory, exist_ok=True)
+
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+
+    def add(
+            self,
+            imagePath: str,
+            reason: str,
+            prompt: str,
+            candidates: list = None,
+            texts: dict = None,
+            crops: dict = None,
+            isUpdate: bool = False,
+            image = None
+            ) -> dict:
+        """
+        Move an image into the review directory and append an entry.
+
+        :param str imagePath: The path to the badge image.
+        :param str reason: The error code requiring review.
+        :param str prompt: The prompt the user would have seen.
+        :param list candidates: (optional) The possible answers found.
+        :param dict texts: (optional) The OCR text keyed by region.
+        :param dict crops: (optional) The region images keyed by region.
+        :param bool isUpdate: (optional) If True, the badge is an update.
+        :param numpy.ndarray image: (optional) The badge if it is only 
+            held in memory, e.g. a video frame. It is written to the 
+            review directory instead of moving `imagePath`.
+        :returns: The new entry.
+        """
+
+        name = os.path.basename(imagePath)
+        stem = os.path.splitext(name)[0]
+        newPath = os.path.join(self.directory, name)
+        if image is None:
+            shutil.move(imagePath, newPath)
+        else:
+            cv2.imwrite(newPath, image)
+
+        cropPaths = dict()
+        for region, crop in (crops or {}).items():
+            cropPath = os.path.join(
+                self.directory, '{}_{}.png'.format(stem, region)
+                )
+            cv2.imwrite(cropPath, crop)
+            cropPaths[region] = cropPath
+
+        entry = {
+            'path': newPath,
+            'reason': reason,
+            'prompt': prompt,
+            'candidates': candidates or list(),
+            'texts': texts or dict(),
+            'crops': cropPaths,
+            'isUpdate': isUpdate
+            }
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+
+        return entry
+
+
+    def entries(self) -> list:
+        """
+        Read all queued entries.
+
+        :returns: A list of entry dictionaries in queue order.
+        """
+
+        if not os.path.isfile(self.path):
+            return list()
+
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+    def resolve(self, entries: list) -> None:
+        """
+        Remove resolved entries from the queue along with their crops.
+
+        :param list entries: The entries to remove.
+        """
+
+        done = {e['path'] for e in entries}
+        remaining = [e for e in self.entries() if e['path'] not in done]
+
+        for entry in entries:
+            for cropPath in entry['crops'].values():
+                if os.path.isfile(cropPath):
+                    os.remove(cropPath)
+
+        tmpPath = self.path + '.tmp'
+        with open(tmpPath, 'w') as f:
+            for entry in remaining:
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmpPath, self.path)
@@ -0,0 +1,355 @@
+"""
+PokemonGo.service
+-----------------
+
+This module contains the UploadService class, a small HTTP server
+receiving badge screenshots posted directly from phones. Uploads are
+checked and decoded as they arrive, saved to the player's first source
+folder and handed to the scanner, whose pipeline spreads them over one
+OCR worker per core (see :meth:`Scanner.serve` in `scanner.py`). Each
+request waits until its badges are read and matched and gets back the
+title, stats and errors as json; rows are written to the sheet by the
+commit stage afterwards.
+
+.. code::
+
+    $ curl -X POST --data-binary @IMG_0120.PNG \\
+        -H 'Content-Type: image/png' http://127.0.0.1:8765/badges
+    $ curl -F a=@IMG_0121.PNG -F b=@IMG_0122.PNG \\
+        http://127.0.0.1:8765/badges/misty
+"""
+
+
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from typing import Iterator, Optional
+
+from .exceptions import UnsupportedPhoneModel
+from .image import decode_image
+from .ingest import PNG_SIGNATURE
+from .phones import get_registry
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BYTES = 64 << 20       # Largest request body. Unit = bytes.
+REPLY_TIMEOUT = 120.0      # Seconds a request waits for its records.
+NAME_RE = re.compile(r'[^\w.-]')
+
+_STOP = object()   # Sentinel ending :meth:`UploadService.uploads`.
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Split a ``[HOST:]PORT`` address.
+
+    :param str address: The address, e.g. ``8765`` or ``0.0.0.0:8765``.
+    :returns: The host and port.
+    :raises ValueError: if the port is not a number.
+    """
+
+    host, _, port = address.rpartition(':')
+    return host or DEFAULT_HOST, int(port)
+
+
+def split_multipart(contentType: str, body: bytes) -> list:
+    """
+    Extract the files of a ``multipart/form-data`` body.
+
+    :param str contentType: The request `Content-Type`, with boundary.
+    :param bytes body: The request body.
+    :returns: ``(filename, data)`` of each file part, in order. Plain
+        form fields are ignored.
+    :raises ValueError: if the body is not multipart.
+    """
+
+    header = 'Content-Type: {}\r\n\r\n'.format(contentType).encode()
+    msg = BytesParser(policy=HTTP).parsebytes(header + body)
+    if not msg.is_multipart():
+        raise ValueError('body is not multipart')
+
+    return [
+        (part.get_filename(), part.get_payload(decode=True))
+        for part in msg.iter_parts()
+        if part.get_filename() is not None
+        ]
+
+
+class Upload:
+    """
+    A badge received by the service, waiting for its scan record.
+
+    :param str profile: The profile name.
+    :param str name: The file name given by the client.
+    :param str path: Where the badge was saved.
+    :param numpy.ndarray image: The decoded screenshot.
+    """
+
+    def __init__(self, profile: str, name: str, path: str, image) -> None:
+        self.profile = profile
+        self.name    = name
+        self.path    = path
+        self.image   = image
+        self.record  = None
+        self._done   = threading.Event()
+
+
+    def resolve(self, record: dict) -> None:
+        """Set the record returned to the client. Later calls are ignored."""
+
+        if self._done.is_set():
+            return
+        self.record = dict(record, name=self.name)
+        self._done.set()
+
+
+    def wait(self, timeout: Optional[float] = None) -> dict:
+        """
+        Wait for the scan record.
+
+        :param float timeout: (optional) Seconds to wait.
+        :returns: The record, or a ``queued`` status if the badge is
+            still being read.
+        """
+
+        if self._done.wait(timeout):
+            return self.record
+        return {'name': self.name, 'path': self.path, 'status': 'queued'}
+
+
+class UploadService:
+    """
+    A threaded HTTP server accepting badge uploads.
+
+    ``POST /badges[/<profile>]`` takes a single PNG (`image/png`) or a
+    batch (`multipart/form-data`) and answers ``{"badges": [...]}``
+    with one record per file. ``GET /status`` reports the uploads
+    waiting to be scanned.
+
+    :param dict folders: The folder receiving uploads of each profile,
+        keyed by name. The default profile is named ``''``.
+    :param str host: (optional) The interface to listen on.
+    :param int port: (optional) The port. Zero picks any free port.
+    :param float timeout: (optional) Seconds a request waits for records.
+
+    Examples:
+
+    .. code:: python
+
+        >>> service = UploadService({'': 'Downloads'}).start()
+        >>> for upload in service.uploads():
+        ...     upload.resolve({'status': 'matched', 'title': 'starbucks'})
+    """
+
+    def __init__(
+            self,
+            folders: dict,
+            host: Optional[str] = DEFAULT_HOST,
+            port: Optional[int] = DEFAULT_PORT,
+            timeout: Optional[float] = REPLY_TIMEOUT
+            ) -> None:
+        self.folders  = dict(folders)
+        self.timeout  = timeout
+        self.received = 0
+        self._queue   = queue.Queue()
+        self._lock    = threading.Lock()
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                service._status(self)
+
+            def do_POST(self):
+                service._post(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+
+    def start(self) -> 'UploadService':
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.1,), daemon=True
+            )
+        self._thread.start()
+        return self
+
+
+    def stop(self) -> None:
+        """Stop accepting uploads and end :meth:`UploadService.uploads`."""
+
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        self._queue.put(_STOP)
+
+
+    def __enter__(self) -> 'UploadService':
+        return self.start()
+
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+    def uploads(self) -> Iterator[Upload]:
+        """
+        Yield uploads in order of arrival until the service is stopped.
+        Every upload must be resolved (see :meth:`Upload.resolve`).
+        """
+
+        while True:
+            upload = self._queue.get()
+            if upload is _STOP:
+                return
+            yield upload
+
+
+    def submit(self, profile: str, name: str, data: bytes) -> Upload:
+        """
+        Check a badge, save it to the profile's folder and queue it.
+
+        :param str profile: The profile name.
+        :param str name: The file name given by the client.
+        :param bytes data: The PNG file contents.
+        :returns: The queued upload.
+        :raises KeyError: if the profile is not served.
+        :raises ValueError: if `data` is not a readable PNG.
+        :raises UnsupportedPhoneModel: if no device has its dimensions.
+        """
+
+        folder = self.folders[profile]
+        if data[:8] != PNG_SIGNATURE:
+            raise ValueError('data is not a PNG image')
+        image = decode_image(data)
+        if image.shape[:2] not in get_registry():
+            raise UnsupportedPhoneModel
+
+        # Client names may repeat or hold path separators.
+        stem = NAME_RE.sub('_', os.path.splitext(os.path.basename(name))[0])
+        path = os.path.join(folder, 'upload_{}_{}.PNG'.format(
+            uuid.uuid4().hex[:8], stem or 'badge'
+            ))
+        tmpPath = path + '.part'
+        with open(tmpPath, 'wb') as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+
+        upload = Upload(profile, name, path, image)
+        with self._lock:
+            self.received += 1
+        self._queue.put(upload)
+        return upload
+
+
+    def _profile(self, path: str) -> Optional[str]:
+        """The profile named by a request path, or ``None`` if unknown."""
+
+        parts = urlsplit(path).path.strip('/').split('/')
+        if parts[0] != 'badges' or len(parts) > 2:
+            return None
+        if len(parts) == 2:
+            return parts[1] if parts[1] in self.folders else None
+        # A lone profile needs no name.
+        if '' in self.folders:
+            return ''
+        if len(self.folders) == 1:
+            return next(iter(self.folders))
+        return None
+
+
+    def _post(self, request: BaseHTTPRequestHandler) -> None:
+        profile = self._profile(request.path)
+        if profile is None:
+            request.send_error(404, 'Unknown profile')
+            return
+
+        try:
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            request.send_error(400, 'Invalid Content-Length')
+            return
+        if length > MAX_BYTES:
+            request.send_error(413)
+            return
+        body = request.rfile.read(length)
+
+        contentType = request.headers.get_content_type()
+        if contentType == 'multipart/form-data':
+            try:
+                files = split_multipart(request.headers['Content-Type'], body)
+            except ValueError as e:
+                request.send_error(400, str(e))
+                return
+        elif contentType in ('image/png', 'application/octet-stream'):
+            files = [(request.headers.get('X-Filename', ''), body)]
+        else:
+            request.send_error(415)
+            return
+        if not files:
+            request.send_error(400, 'No files uploaded')
+            return
+
+        pending = list()
+        for name, data in files:
+            try:
+                pending.append(self.submit(profile, name or '', data))
+            except (ValueError, UnsupportedPhoneModel) as e:
+                pending.append({
+                    'name': name, 'status': 'rejected', 'error': str(e)
+                    })
+
+        # One deadline for the whole batch.
+        deadline = time.monotonic() + self.timeout
+        records = [
+            x.wait(max(0.0, deadline - time.monotonic()))
+            if isinstance(x, Upload) else x
+            for x in pending
+            ]
+        self._send(request, {'badges': records})
+
+
+    def _status(self, request: BaseHTTPRequestHandler) -> None:
+        if urlsplit(request.path).path.rstrip('/') != '/status':
+            request.send_error(404)
+            return
+
+        self._send(request, {
+            'profiles': sorted(self.folders),
+            'received': self.received,
+            'waiting': self._queue.qsize()
+            })
+
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, body: dict) -> None:
+        # NumPy values from the sheet are converted to python types.
+        payload = json.dumps(body, default=lambda x: x.item()).encode()
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
@@ -14,14 +14,46 @@ README - instructions on how to generate json key
 """
 
 
+import os
+import csv
+import threading
 from typing import Optional
+from numbers import Real
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 from gspread import service_account
+from gspread.utils import numericise_all, rowcol_to_a1
 
-from .exceptions import TitleNotFound, InputError
-from .utils import are_similar
+from .exceptions import TitleNotFound, InputError, ReviewRequired
+from .utils import are_similar, ask, similarity, SIMILARITY_MIN
+from .geo import sort_records
+from .titles import TitleIndex, normalize, MIN_COVERAGE
+
+
+@lru_cache(maxsize=None)
+def get_client(keyPath: str):
+    """
+    Get an authorized gspread client for a json key. Clients are cached 
+    so sheets of several players sharing a key share one session.
+
+    :param str keyPath: The path to json key required for API access.
+    """
+
+    return service_account(keyPath)
+
+
+def to_records(rows: list) -> list:
+    """
+    Convert cell values, header row first, into records typed the same 
+    way as :meth:`gspread.worksheet.Worksheet.get_all_records`.
+    """
+
+    if not rows:
+        return list()
+    header = rows[0]
+    return [dict(zip(header, numericise_all(row))) for row in rows[1:]]
 
 
 class GymSheet:
@@ -32,6 +64,9 @@ class GymSheet:
     :param str keyPath: The path to json key required for API access.
     :param str sheetName: The spreadsheet name.
     :param bool verbose: (optional) If True, print progress statements.
+    :param str dataset: (optional) The path to a local dataset (see 
+        :meth:`GymSheet.save_dataset`). If the file exists and every 
+        cell still matches the sheet, its typed records are used.
 
     Examples:
 
@@ -41,6 +76,14 @@ class GymSheet:
         >>> myKey = 'path/to/json/key'
         >>> gs = GymSheet(myKey, 'my_sheet_name')
 
+    .. note::
+        Records are held in :attr:`GymSheet.table` for the whole run. 
+        Every write updates the table, the processed rows, the largest 
+        uid and the title lookups in place, so the sheet is downloaded 
+        once. Edits made by hand meanwhile are not seen until 
+        :meth:`GymSheet.reload`. Updates and title lookups share a lock, 
+        so lookups from other threads never see a half written row.
+
     .. note::
         Read/write access to a spreadsheet is handled using 
         `gspread <https://docs.gspread.org/en/latest/index.html>`__.
@@ -53,66 +96,240 @@ class GymSheet:
             self, 
             keyPath: str, 
             sheetName: str, 
-            verbose: Optional[bool] = False
+            verbose: Optional[bool] = False,
+            dataset: Optional[str] = None
             ) -> None:
 
         self.verbose = verbose
-        self._retrieve_data(keyPath, sheetName)
+        self._lock   = threading.RLock()   # Guards the table and lookups.
+        self._retrieve_data(keyPath, sheetName, dataset)
         self.errors = list()
 
 
     def _retrieve_data(
             self, 
             keyPath: str, 
-            sheetName: str
+            sheetName: str,
+            dataset: Optional[str] = None
             ) -> None:
         """
         Partition sheet records into dataframes. This method is/should only 
         be called at instantiation to access database.
         """
 
-        client     = service_account(keyPath)
+        client     = get_client(keyPath)
         self.sheet = client.open(sheetName).sheet1
-        records    = self.sheet.get_all_records()
+
+        if dataset is not None and os.path.isfile(dataset):
+            # Every cell is compared, so no edit made by hand is missed.
+            current = to_records(self.sheet.get_values('A:N'))
+            records = self._read_dataset(dataset)
+            if records == current:
+                self._partition(records)
+                if self.verbose:
+                    print('INFO - Sheet data loaded from {}.'.format(dataset))
+                return
+            if self.verbose:
+                print('INFO - {} is out of date.'.format(dataset))
+            self._partition(current)
+            return
+
+        self.reload()
+        if self.verbose:
+            print('INFO - Google sheet data extracted successfully.')
+
+
+    def reload(self) -> None:
+        """
+        Download all records again, e.g. after the sheet was sorted.
+        """
+
+        self._partition(self.sheet.get_all_records())
+
+
+    @staticmethod
+    def _read_dataset(path: str) -> list:
+        # Imported here so pyarrow is only needed with datasets.
+        from .dataset import read, to_records
+
+        return to_records(read(path))
+
+
+    def _partition(self, records: list) -> None:
+        """
+        Load sheet records into :attr:`GymSheet.table` indexed by 
+        spreadsheet row. Rows with a uid are processed.
+        """
+
         df         = pd.DataFrame(records)
         df.index   = np.arange(2, len(df) + 2)    # Start at row 2.
 
-        self.processed   = df[df['uid'] != '']
-        self.unprocessed = df[df['uid'] == '']
+        with self._lock:
+            self.table = df
+            self._processedMask = (df['uid'] != '').to_numpy()
+            uids = df.loc[self._processedMask, 'uid']
+            self.maxUid = int(uids.max()) if len(uids) else 0
 
-        if self.verbose:
-            print('INFO - Google sheet data extracted successfully.')
+            self._titleRows = dict()   # Title -> rows, in increasing order.
+            for rowIndex, title in df['title'].items():
+                self._titleRows.setdefault(title, list()).append(rowIndex)
+            self._titleIndex = None
+
+
+    @property
+    def processed(self) -> pd.DataFrame:
+        """The rows with a uid. A copy; write through the write methods."""
+        with self._lock:
+            return self.table[self._processedMask]
+
+
+    @property
+    def unprocessed(self) -> pd.DataFrame:
+        """The rows without a uid. A copy; write through the write methods."""
+        with self._lock:
+            return self.table[~self._processedMask]
+
+
+    def is_processed(self, rowIndex: int) -> bool:
+        """Check a spreadsheet row has a uid."""
+        return bool(self._processedMask[rowIndex - 2])
+
+
+    def _update(self, rowIndex: int, rowData: dict) -> None:
+        """
+        Apply values written to a spreadsheet row to the table, the 
+        processed rows, :attr:`GymSheet.maxUid` and the title lookups.
+        """
+
+        with self._lock:
+            oldTitle = self.table.at[rowIndex, 'title']
+            for col, value in rowData.items():
+                if col in self.table.columns:
+                    self.table.at[rowIndex, col] = value
+
+            uid = rowData.get('uid', '')
+            if uid != '' and uid is not None:
+                self._processedMask[rowIndex - 2] = True
+                self.maxUid = max(self.maxUid, int(uid))
+
+            # Titles rarely change, so the index is simply built again.
+            title = self.table.at[rowIndex, 'title']
+            if title != oldTitle:
+                self._titleRows[oldTitle].remove(rowIndex)
+                rows = self._titleRows.setdefault(title, list())
+                rows.append(rowIndex)
+                rows.sort()
+                self._titleIndex = None
+
+
+    @classmethod
+    def from_snapshot(
+            cls, 
+            path: str, 
+            verbose: Optional[bool] = False
+            ) -> 'GymSheet':
+        """
+        Create an offline instance from a local snapshot of the sheet 
+        (see :meth:`GymSheet.save_snapshot` and 
+        :meth:`GymSheet.save_dataset`). No credentials are needed and 
+        :attr:`GymSheet.sheet` is ``None``, so write methods must not 
+        be called.
+
+        :param str path: The path to a csv snapshot or a dataset file 
+            ending in ``.arrow`` or ``.parquet``.
+        :param bool verbose: (optional) If True, print progress statements.
+        """
+
+        gs = cls.__new__(cls)
+        gs.verbose = verbose
+        gs.sheet   = None
+        gs.errors  = list()
+        gs._lock   = threading.RLock()
+
+        if path.endswith(('.arrow', '.parquet')):
+            gs._partition(gs._read_dataset(path))
+        else:
+            with open(path, newline='') as f:
+                gs._partition(to_records(list(csv.reader(f))))
+
+        if verbose:
+            print('INFO - Snapshot {} loaded successfully.'.format(path))
+        return gs
+
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        Save all records to a csv file in spreadsheet row order.
+
+        :param str path: The path to the csv snapshot.
+        """
+
+        self.table.to_csv(path, index=False)
+
+
+    def save_dataset(self, path: str) -> None:
+        """
+        Save all records to a typed columnar file in spreadsheet row 
+        order (see :mod:`dataset`). Arrow files are read back 
+        memory-mapped by :meth:`GymSheet.from_snapshot`, by the 
+        `dataset` parameter and by local tools.
+
+        :param str path: The file path ending in ``.arrow`` or ``.parquet``.
+        """
+
+        from .dataset import write
+
+        write(self.table, path)
     
     
     def find_title(
             self, 
             inTitle: str, 
-            isUpdate: Optional[bool] = False
+            isUpdate: Optional[bool] = False, 
+            similar: Optional[bool] = True
             ) -> tuple[str, int]:
         """
         Find a gym title in the spreadsheet. If no exact match, look for 
-        similar matches (see :meth:`utils.are_similar`). If no match still, 
-        the output will contain an empty title.
+        a title equal once OCR confusions are folded, then for the only 
+        title containing `inTitle` (see :mod:`titles`), then for similar 
+        matches (see :meth:`utils.are_similar`). If no match still, the 
+        output will contain an empty title.
         
         :param str inTitle: The title to locate.
         :param bool isUpdate: (optional) If True, specifies update to 
             `inTitle` data.
+        :param bool similar: (optional) If False, similar titles, which 
+            ask the user to accept them, are not looked for.
         :returns: The title and row index values in the database.
         """
 
-        if not isUpdate:
-            df = self.unprocessed
-        else:
-            df = self.processed
-        
-        matches = df[df['title'] == inTitle]
-        self.errors.clear()
-
-        # Check similar titles when no exact match.
-        if matches.shape[0] == 0:
-            matches = df[df['title']
-                    .apply(lambda x: are_similar(x, inTitle))
-                    ]
+        with self._lock:
+            rows = [
+                x for x in self._titleRows.get(inTitle, ())
+                if self.is_processed(x) == bool(isUpdate)
+                ]
+            matches = self.table.loc[rows]
+            self.errors.clear()
+
+            # Misread characters and partial (e.g. one line) titles.
+            if matches.shape[0] == 0:
+                matches = self._find_normalized(inTitle, isUpdate)
+
+            if matches.shape[0] == 0 and similar:
+                df = self.processed if isUpdate else self.unprocessed
+
+        # Check similar titles when no exact match. The user may be 
+        # asked, so the lock is not held.
+        if matches.shape[0] == 0 and similar:
+            try:
+                matches = df[df['title']
+                        .apply(lambda x: are_similar(x, inTitle))
+                        ]
+            except ReviewRequired as e:
+                # Record every similar title for later review.
+                likeness = df['title'].apply(similarity, args=(inTitle,))
+                e.candidates = list(df.loc[likeness >= SIMILARITY_MIN, 'title'])
+                raise
         
         # Default values to return.
         outTitle = ''
@@ -132,6 +349,51 @@ class GymSheet:
         return outTitle, rowIndex
 
 
+    def title_index(self) -> TitleIndex:
+        """
+        Get the index of normalized titles of all rows, by position in 
+        :attr:`GymSheet.table`. Built on first use after each load or 
+        title change.
+        """
+
+        with self._lock:
+            if self._titleIndex is None:
+                self._titleIndex = TitleIndex(self.table['title'])
+            return self._titleIndex
+
+
+    def _find_normalized(
+            self, 
+            inTitle: str, 
+            isUpdate: Optional[bool] = False
+            ) -> pd.DataFrame:
+        """
+        Find rows whose title equals `inTitle` once normalized, else rows 
+        of the only title containing it. The fragment must hold at least 
+        :data:`titles.MIN_COVERAGE` of that title, and a match by 
+        fragment adds a ``PARTIAL`` error so the badge can be checked.
+        """
+
+        index = self.title_index()
+        mask = self._processedMask if isUpdate else ~self._processedMask
+
+        positions = [x for x in index.equal(inTitle) if mask[x]]
+        if positions:
+            return self.table.iloc[positions]
+
+        positions = [x for x in index.find(inTitle) if mask[x]]
+        titles = {index.titles[i] for i in positions}
+        # Rows may share a title but the fragment must name only one.
+        if len(titles) != 1:
+            return self.table.iloc[[]]
+        title, = titles
+        if len(normalize(inTitle)) < MIN_COVERAGE * len(title):
+            return self.table.iloc[[]]
+
+        self.errors.append('PARTIAL')
+        return self.table.iloc[positions]
+
+
     def prompt_for_title(
             self, 
             isUpdate: Optional[bool] = False
@@ -147,7 +409,7 @@ class GymSheet:
         """
         
         prompt = 'Enter correct TITLE for badge:\n\t'
-        title = input(prompt).strip()
+        title = ask(prompt, 'TITLE').strip()
 
         outTitle, rowIndex = self.find_title(title, isUpdate=isUpdate)
         if rowIndex == -1:
@@ -172,7 +434,8 @@ class GymSheet:
         prompt   = 'Duplicates found.\n'
         prompt  += duplicates[columns].to_string()
         prompt  += '\nEnter correct INDEX:\t'
-        rowIndex = int(input(prompt))
+        candidates = duplicates[columns].reset_index().to_dict('records')
+        rowIndex = int(ask(prompt, 'DUPLICATES', candidates))
 
         if rowIndex not in duplicates.index:
             raise InputError
@@ -199,15 +462,145 @@ class GymSheet:
         # rowValues -> A:N is one-to-one mapping.
         oldRow = 'A{0}:N{0}'.format(rowIndex)
         self.sheet.update(oldRow, [rowValues])
+        self._update(rowIndex, rowData)
         
         if self.verbose:
             print('Writing to row {}'.format(rowIndex))
             print(rowValues)
 
 
-    def geo_sort(self) -> None:
+    def write_rows(
+            self, 
+            rows: dict
+            ) -> None:
+        """
+        Write data to several spreadsheet rows in a single request. See 
+        :meth:`GymSheet.write_to_row` for the format of each row.
+
+        :param dict rows: The row data keyed by spreadsheet row index.
+        """
+
+        if not rows:
+            return
+
+        data = [
+            {
+                'range': 'A{0}:N{0}'.format(rowIndex), 
+                'values': [list(rowData.values())]
+            }
+            for rowIndex, rowData in rows.items()
+            ]
+        self.sheet.batch_update(data)
+        for rowIndex, rowData in rows.items():
+            self._update(rowIndex, rowData)
+
+        if self.verbose:
+            print('Writing to rows {}'.format(list(rows.keys())))
+
+
+    def write_cells(
+            self, 
+            cells: list
+            ) -> None:
+        """
+        Write individual cells in a single request. Columns are located 
+        by their header title.
+
+        :param list cells: The ``(rowIndex, column, value)`` triples 
+            where `column` is a header title such as ``victories``.
+        """
+
+        if not cells:
+            return
+
+        cols = list(self.table.columns)
+        data = [
+            {
+                'range': rowcol_to_a1(rowIndex, cols.index(col) + 1), 
+                'values': [[value]]
+            }
+            for rowIndex, col, value in cells
+            ]
+        self.sheet.batch_update(data)
+
+        for rowIndex, col, value in cells:
+            self._update(rowIndex, {col: value})
+
+        if self.verbose:
+            print('Writing {} cell(s)'.format(len(data)))
+
+
+    def changed_cells(
+            self, 
+            rowIndex: int, 
+            rowData: dict
+            ) -> list:
+        """
+        Compare row data with the cached values of a processed row.
+
+        :param int rowIndex: The spreadsheet's row index.
+        :param dict rowData: The row data keyed by header title.
+        :returns: The ``(rowIndex, column, value)`` triples which differ, 
+            ready for :meth:`GymSheet.write_cells`.
+        """
+
+        cells = list()
+        for col, value in rowData.items():
+            old = self.table.at[rowIndex, col]
+            if isinstance(value, float) and isinstance(old, Real):
+                if abs(old - value) < 1e-6:
+                    continue
+            elif old == value:
+                continue
+            cells.append((rowIndex, col, value))
+
+        return cells
+
+
+    def geo_sort(
+            self, 
+            order: Optional[str] = 'address'
+            ) -> None:
         """
         Sort the spreadsheet contents geographically.
+
+        :param str order: (optional) The ordering mode. With ``address``, 
+            rows are sorted by state, county, city and title. With 
+            ``hilbert``, rows are sorted by a Hilbert curve key computed 
+            from coordinates (see :func:`geo.hilbert_keys`) so that 
+            neighbouring rows are close on the map.
+        :raises ValueError: if `order` is not an allowed value.
+        """
+
+        if order == 'hilbert':
+            self._hilbert_sort()
+        elif order == 'address':
+            self._address_sort()
+        else:
+            raise ValueError("Invalid order value '{}'".format(order))
+        
+        if self.verbose:
+            print('INFO - Sorting complete.\n')
+
+
+    def _sort_table(self, order: str) -> None:
+        """
+        Sort :attr:`GymSheet.table` like the spreadsheet was sorted, so 
+        the sheet is not downloaded again.
+        """
+
+        if order == 'address':
+            # The sheet puts blank cells last.
+            keys = self.table.replace('', np.nan)
+            df = self.table.loc[sort_records(keys, order).index]
+        else:
+            df = sort_records(self.table, order)
+        self._partition(df.to_dict('records'))
+
+
+    def _address_sort(self) -> None:
+        """
+        Sort the spreadsheet by state, then county, then city.
         """
         
         cols = self.sheet.row_values(1)   # Column titles.
@@ -225,6 +618,19 @@ class GymSheet:
             byState, byCounty, byCity, byTitle, 
             range=rowLen
             )
+        self._sort_table('address')
+
+
+    def _hilbert_sort(self) -> None:
+        """
+        Sort the spreadsheet by Hilbert curve key. The sheet API cannot 
+        sort on a computed key, so the table is sorted locally and 
+        written back in a single update.
+        """
+
+        if self.table.empty:
+            return
         
-        if self.verbose:
-            print('INFO - Sorting complete.\n')
+        self._sort_table('hilbert')
+        rowLen = 'A2:N{}'.format(len(self.table) + 1)
+        self.sheet.update(rowLen, self.table.values.tolist())
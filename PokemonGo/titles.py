@@ -0,0 +1,126 @@
+"""
+PokemonGo.titles
+----------------
+
+This module contains helpers for matching OCR text to gym titles.
+Characters tesseract commonly confuses are folded into one class each
+(e.g. ``l``, ``1``, ``i`` and ``|``), quotes are unified and stray
+symbols, such as status bar glyphs caught by the title crop, are
+dropped. Titles are folded once when the sheet is loaded and OCR text
+once per query.
+
+A crop of a long title often holds only one of its lines. The
+TitleIndex class finds every title containing such a fragment by binary
+search over a sorted array of title suffixes. A fragment only names a
+title if it holds a fair share of it (see :data:`MIN_COVERAGE`).
+"""
+
+
+import re
+from bisect import bisect_left
+from typing import Iterable
+
+
+# Each confusion class maps to its first member.
+CONFUSIONS = ('l1i|!', 'o0', "'’‘`´", '"“”')
+FOLD = str.maketrans({
+    c: cls[0] for cls in CONFUSIONS for c in cls[1:]
+    })
+STRAY_RE = re.compile(r"[^\w'\"&@#.,:\-\s]")   # Keeps accented letters.
+SPACE_RE = re.compile(r'\s+')
+
+MIN_FRAGMENT = 6   # Shorter fragments match too many titles.
+MIN_COVERAGE = 0.4   # Share of a title a fragment must hold to name it.
+
+
+def normalize(text: str) -> str:
+    """
+    Fold a title or OCR text for comparison.
+
+    :param str text: The text.
+    :returns: The lowercase text with confusable characters folded,
+        stray symbols dropped and whitespace collapsed.
+
+    Examples:
+
+    .. code:: python
+
+        >>> normalize('St. Mary’s\\nChurch 10l')
+        "st. mary's church lol"
+    """
+
+    text = text.lower().translate(FOLD)
+    text = STRAY_RE.sub('', text)
+    return SPACE_RE.sub(' ', text).strip()
+
+
+class TitleIndex:
+    """
+    A suffix array over normalized titles for substring lookups.
+
+    :param iterable titles: The titles, e.g. a column of the sheet.
+        Positions in this sequence identify titles in results.
+
+    Examples:
+
+    .. code:: python
+
+        >>> index = TitleIndex(['starbucks coffee', 'mural of st. ann'])
+        >>> index.find('bucks c0ffee')
+        [0]
+    """
+
+    def __init__(self, titles: Iterable[str]) -> None:
+        self.titles = [normalize(str(x)) for x in titles]
+
+        self._exact = dict()   # Normalized title -> positions.
+        for pos, title in enumerate(self.titles):
+            self._exact.setdefault(title, list()).append(pos)
+
+        # Suffixes of each title only, so matches never span two titles.
+        # Shorter suffixes can never contain a fragment.
+        suffixes, positions = list(), list()
+        for pos, title in enumerate(self.titles):
+            for i in range(len(title) - MIN_FRAGMENT + 1):
+                suffixes.append(title[i:])
+                positions.append(pos)
+
+        order = sorted(range(len(suffixes)), key=suffixes.__getitem__)
+        self._suffixes  = [suffixes[i] for i in order]
+        self._positions = [positions[i] for i in order]
+
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+
+    def find(self, fragment: str) -> list:
+        """
+        Find titles containing `fragment` once normalized.
+
+        :param str fragment: The text read from a title crop.
+        :returns: The positions of matching titles in increasing order,
+            empty if the fragment is shorter than :data:`MIN_FRAGMENT`.
+        """
+
+        fragment = normalize(fragment)
+        if len(fragment) < MIN_FRAGMENT:
+            return list()
+
+        found = set()
+        i = bisect_left(self._suffixes, fragment)
+        while i < len(self._suffixes) and self._suffixes[i].startswith(fragment):
+            found.add(self._positions[i])
+            i += 1
+        return sorted(found)
+
+
+    def equal(self, text: str) -> list:
+        """
+        Find titles equal to `text` once both are normalized.
+
+        :param str text: The text read from a title crop.
+        :returns: The positions of matching titles in increasing order.
+        """
+
+        return list(self._exact.get(normalize(text), ()))
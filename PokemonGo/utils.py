@@ -13,9 +13,15 @@ from difflib import SequenceMatcher
 
 from dotenv import dotenv_values
 
+from .exceptions import ReviewRequired
+from .ingest import ImageQueue, interleave
+from .phones import get_registry
+
 
 SIMILARITY_MIN = 0.9   # 90 percent
 
+_deferPrompts = False
+
 
 def parse_args():
     p = argparse.ArgumentParser()
@@ -23,7 +29,93 @@ def parse_args():
         help='process gym updates only')
     p.add_argument('-v', '--verbose', action='store_true', 
         help='print progress statements')
-    return p.parse_args()
+    p.add_argument('-d', '--defer', action='store_true', 
+        help='queue ambiguous badges for review instead of prompting')
+    p.add_argument('--review', action='store_true', 
+        help='resolve badges queued for review')
+    p.add_argument('-w', '--watch', action='store_true', 
+        help='keep running and scan new images as they arrive')
+    p.add_argument('-s', '--serve', nargs='?', const='127.0.0.1:8765', 
+        metavar='[HOST:]PORT', 
+        help='keep running and scan badges posted over HTTP '
+            '(default 127.0.0.1:8765); ambiguous badges are deferred')
+    p.add_argument('--video', nargs='+', metavar='FILE', 
+        help='scan the badges shown in screen recordings (MP4/MOV) '
+            'instead of images')
+    p.add_argument('-r', '--resume', action='store_true', 
+        help='resume an interrupted run, skipping completed stages')
+    p.add_argument('-k', '--keep-duplicates', action='store_true', 
+        help='scan images even if already stored in badges')
+    p.add_argument('--no-crops', action='store_true', 
+        help='do not keep title and activity crops of stored badges')
+    p.add_argument('-n', '--dry-run', nargs='?', const='-', metavar='FILE', 
+        help='extract only and write json lines to FILE (default stdout); '
+            'nothing is moved, geocoded or written to the sheet')
+    p.add_argument('--snapshot', metavar='CSV', 
+        help='local sheet snapshot used by --dry-run')
+    p.add_argument('-c', '--cached', action='store_true', 
+        help='load sheet data from the local dataset saved by the last run '
+            'if no cell of the sheet changed')
+    p.add_argument('-o', '--order', choices=['address', 'hilbert'], 
+        default='address', help='geographic sort order of the sheet')
+    p.add_argument('-p', '--profile', action='append', metavar='NAME', 
+        help='scan for a player in profiles.json; repeat to serve several '
+            'players at once, or use `all`')
+    args = p.parse_args()
+    if args.profile and args.dry_run:
+        p.error('--profile cannot be used with --dry-run')
+    if args.serve and (args.watch or args.review or args.dry_run):
+        p.error('--serve cannot be used with --watch, --review or --dry-run')
+    if args.video and (args.watch or args.review or args.serve or args.profile):
+        p.error('--video cannot be used with --watch, --review, --serve '
+            'or --profile')
+    return args
+
+
+def defer_prompts(enable: bool = True) -> None:
+    """
+    Enable or disable non-interactive mode. While enabled, 
+    :func:`ask` raises :class:`exceptions.ReviewRequired` instead of 
+    prompting the user.
+
+    :param bool enable: (optional) If True, defer all prompts.
+    """
+
+    global _deferPrompts
+    _deferPrompts = enable
+
+
+def ask(
+        prompt: str, 
+        reason: str, 
+        candidates: list = None
+        ) -> str:
+    """
+    Prompt the user for manual input.
+
+    :param str prompt: The prompt to display.
+    :param str reason: The error code recorded if prompts are deferred.
+    :param list candidates: (optional) The possible answers found.
+    :returns: The user response.
+    :raises ReviewRequired: if prompts are deferred.
+    """
+
+    if _deferPrompts:
+        raise ReviewRequired(reason, prompt, candidates)
+
+    return input(prompt)
+
+
+def similarity(x: str, y: str) -> float:
+    """
+    Compute the similarity ratio of two texts.
+
+    :param str x: The first text.
+    :param str y: The second text.
+    :returns: The ratio in range [0, 1].
+    """
+
+    return SequenceMatcher(None, x, y).ratio()
 
 
 def are_similar(x: str, y: str) -> bool:
@@ -37,11 +129,11 @@ def are_similar(x: str, y: str) -> bool:
         The similarity percentage may be too high for short strings.
     """
 
-    likeness = SequenceMatcher(None, x, y).ratio()
+    likeness = similarity(x, y)
 
     if likeness >= SIMILARITY_MIN:
         prompt = 'Found similar match \'{}\'. Accept? (y/n)   '.format(x)
-        if input(prompt) == 'y':
+        if ask(prompt, 'SIMILAR', [x]) == 'y':
             return True
         else:
             return False
@@ -49,10 +141,12 @@ def are_similar(x: str, y: str) -> bool:
     return False
 
 
-def load_env() -> None:
+def load_env(offline: bool = False) -> None:
     """
     Check and load package environment variables.
-    
+
+    :param bool offline: (optional) If True, Google and Nominatim 
+        settings are not required.
     :raises EnvironmentError: if environment file not loaded.
     :raises FileNotFoundError: if json key file not found.
     """
@@ -66,38 +160,73 @@ def load_env() -> None:
     # Load environment.
     envPath = os.path.join(requirements, 'variables.env')
     config = dotenv_values(envPath)
-    if '' in config.values() or None in config.values():
+    if offline:
+        config = {k:v for k,v in config.items() if v}
+        config.setdefault('LOG_FILE', 'pogo.log')
+    elif '' in config.values() or None in config.values():
         raise EnvironmentError
+
+    # Optional settings.
+    downloads = os.path.join(os.getenv('HOME'), 'Downloads')
+    sources   = config.get('SOURCES', downloads).split(',')
+    sources   = [os.path.expanduser(x.strip()) for x in sources]
+    patterns  = config.get('PATTERNS', '*.PNG,*.png')
     
     # Check json key file exits.
-    keyfile = os.path.join(requirements, config['JSON_KEY'])
-    if not os.path.isfile(keyfile):
-        raise FileNotFoundError
+    if not offline:
+        keyfile = os.path.join(requirements, config['JSON_KEY'])
+        if not os.path.isfile(keyfile):
+            raise FileNotFoundError
     
-    os.environ['SHEET_NAME'] = config['SHEET_NAME']
-    os.environ['EMAIL']      = config['EMAIL']
-    os.environ['KEY_PATH']   = keyfile
+        os.environ['SHEET_NAME'] = config['SHEET_NAME']
+        os.environ['EMAIL']      = config['EMAIL']
+        os.environ['KEY_PATH']   = keyfile
+
+    if config.get('NOMINATIM_URL'):
+        os.environ['NOMINATIM_URL'] = config['NOMINATIM_URL']
+
     os.environ['LOGGER']     = os.path.join(requirements, config['LOG_FILE'])
-    os.environ['DOWNLOADS']  = os.path.join(os.getenv('HOME'), 'Downloads')
+    os.environ['DOWNLOADS']  = sources[0]
+    os.environ['SOURCES']    = os.pathsep.join(sources)
+    os.environ['PATTERNS']   = patterns
     os.environ['BADGES']     = os.path.join(topDir, 'badges')
+    os.environ['REVIEW']     = os.path.join(topDir, 'review')
+    os.environ['JOURNAL']    = os.path.join(requirements, 'journal.jsonl')
+    os.environ['SNAPSHOT']   = os.path.join(requirements, 'snapshot.csv')
+    os.environ['DATASET']    = os.path.join(requirements, 'gyms.arrow')
+    os.environ['PROFILES']   = os.path.join(requirements, 'profiles.json')
+    os.environ['DEVICES']    = os.path.join(requirements, 'devices.json')
 
 
-def get_queue(verbose: bool) -> list:
+def get_queue(verbose: bool, profiles: list = None) -> ImageQueue:
     """
-    Build a queue of images to scan.
+    Build a queue of images to scan from the source directories. Images 
+    are yielded lazily, oldest first, and only if their PNG header 
+    matches a supported device (see :func:`phones.get_registry`).
     
     :param bool verbose: If True, print progress statements.
-    :returns: List of images to scan.
+    :param list profiles: (optional) The profiles whose folders are 
+        scanned. Their queues are interleaved so each player gets a 
+        fair share. Defaults to the folders in the environment.
+    :returns: Iterator of images to scan.
     """
 
-    downloads = os.environ['DOWNLOADS']
-    queue = [
-        os.path.join(downloads, x) 
-        for x in os.listdir(downloads) 
-        if x.endswith('.PNG')
-        ]
+    if profiles is None:
+        queue = ImageQueue(
+            os.environ['SOURCES'].split(os.pathsep), 
+            os.environ['PATTERNS'].split(','), 
+            get_registry(), 
+            verbose
+            )
+        qLen = len(queue)
+    else:
+        queues = [
+            ImageQueue(x.sources, x.patterns, get_registry(), verbose)
+            for x in profiles
+            ]
+        qLen  = sum(len(x) for x in queues)
+        queue = interleave(queues)
 
-    qLen = len(queue)
     if verbose:
         print('INFO - Found {} image(s).'.format(qLen))
     if qLen == 0:
@@ -106,27 +235,50 @@ def get_queue(verbose: bool) -> list:
     return queue
 
 
-def set_logger() -> None:
-    """Set configurations for package logger."""
+def _logger_name(profile: str = '') -> str:
+    if not profile:
+        return __name__
+    return '{}.{}'.format(__name__, profile)
+
+
+def set_logger(path: str = None, profile: str = '') -> None:
+    """
+    Set configurations for package logger.
+
+    :param str path: (optional) The log file. Defaults to the file in 
+        the environment.
+    :param str profile: (optional) The profile name. Each profile logs 
+        to its own file.
+    """
     
-    logger = logging.getLogger(__name__)
-    logging.basicConfig(
-        filename = os.environ['LOGGER'], 
-        format   = '%(asctime)s   %(message)s', 
-        datefmt  = '%Y-%m-%d %H:%M:%S', 
-        )
+    if not profile:
+        logging.basicConfig(
+            filename = path or os.environ['LOGGER'], 
+            format   = '%(asctime)s   %(message)s', 
+            datefmt  = '%Y-%m-%d %H:%M:%S', 
+            )
+        return
+
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s   %(message)s', '%Y-%m-%d %H:%M:%S'
+        ))
+    logger = logging.getLogger(_logger_name(profile))
+    logger.addHandler(handler)
+    logger.propagate = False   # Keep out of the default log.
 
 
-def log_entry(gymId: int, errors: list) -> None:
+def log_entry(gymId: int, errors: list, profile: str = '') -> None:
     """
     Compose message body and create entry in log. The user should 
     have previously called `meth:set_logger`.
 
     :param int gymId: The unique id number identifying a gym.
     :param list errors: The list of errors detected in submodules.
+    :param str profile: (optional) The profile name.
     """
 
-    logger = logging.getLogger(__name__)
+    logger = logging.getLogger(_logger_name(profile))
 
     msg = 'ID: {:04}'.format(gymId)
     if errors:
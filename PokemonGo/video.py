@@ -0,0 +1,165 @@
+"""
+PokemonGo.video
+---------------
+
+This module finds the badges shown in a screen recording, so a single
+video scrolled through the badge list replaces hundreds of
+screenshots. The video is decoded locally with OpenCV and sampled a few
+times per second. A badge is taken from the first frame of every still
+stretch whose activity band shows three stat values; frames during
+scrolling or on other screens are skipped. Badges repeated in the same
+recording are dropped by perceptual hash (see :mod:`dedupe`). Frames
+are passed on as arrays and no image files are written.
+"""
+
+
+import os
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+from .dedupe import badge_hash, distance, NEAR_MAX
+from .exceptions import UnsupportedPhoneModel
+from .image import BadgeImage, value_columns
+from .phones import get_registry
+
+
+SAMPLE_RATE = 10      # Frames compared per second of video.
+STILL_TIME  = 0.3     # Seconds a screen must stay still to be read.
+MOTION_MAX  = 2.0     # Mean gray level change between still samples.
+THUMB_WIDTH = 64      # Width, in pixels, frames are compared at.
+
+
+class Frame:
+    """
+    A badge found in a screen recording.
+
+    :param str path: The name the badge is known by, e.g. in the journal
+        and review queue. No file exists at this path.
+    :param numpy.ndarray image: The BGR frame.
+    :param str video: The recording.
+    :param float time: The position in the recording, in seconds.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            image: np.ndarray,
+            video: str,
+            time: float
+            ) -> None:
+        self.path  = path
+        self.image = image
+        self.video = video
+        self.time  = time
+
+
+    def __repr__(self) -> str:
+        return 'Frame({!r}, time={:.2f})'.format(self.path, self.time)
+
+
+def frame_path(video: str, index: int) -> str:
+    """
+    Name a frame after its recording, e.g. `Downloads/rec_000412.PNG`.
+
+    :param str video: The recording.
+    :param int index: The frame number.
+    """
+
+    return '{}_{:06d}.PNG'.format(os.path.splitext(video)[0], index)
+
+
+def is_badge(img: BadgeImage) -> bool:
+    """
+    Check a frame shows a badge: its activity band holds exactly three
+    stat values (see :func:`image.value_columns`).
+
+    :param BadgeImage img: The frame.
+    """
+
+    img.set_activity_crop()
+    return len(value_columns(img.activityCrop)) == 3
+
+
+def extract_badges(
+        path: str,
+        verbose: Optional[bool] = False
+        ) -> Iterator[Frame]:
+    """
+    Yield the distinct badges shown in a screen recording, in order.
+
+    :param str path: The video file, e.g. an MP4 or MOV recording.
+    :param bool verbose: (optional) If True, print progress statements.
+    :returns: An iterator of frames.
+    :raises FileNotFoundError: if the video cannot be opened.
+    :raises UnsupportedPhoneModel: if no device has the frame size.
+    """
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise FileNotFoundError(path)
+
+    fps  = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(fps / SAMPLE_RATE))
+    need = max(1, round(STILL_TIME * fps / step))   # Still samples.
+
+    dimensions = (
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        )
+    if dimensions not in get_registry():
+        cap.release()
+        raise UnsupportedPhoneModel
+
+    prev   = None
+    still  = 0
+    read   = False    # The current still stretch was already read.
+    hashes = list()   # Badges found so far.
+    sampled = 0
+    index  = -1
+
+    try:
+        while cap.grab():
+            index += 1
+            if index % step:
+                continue   # Skipped frames are never converted.
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            sampled += 1
+
+            height = round(frame.shape[0] * THUMB_WIDTH / frame.shape[1])
+            thumb = cv2.resize(
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                (THUMB_WIDTH, height), interpolation=cv2.INTER_AREA
+                ).astype(np.int16)
+
+            if prev is not None and np.abs(thumb - prev).mean() <= MOTION_MAX:
+                still += 1
+            else:
+                still, read = 0, False
+            prev = thumb
+
+            if still < need or read:
+                continue
+            read = True
+
+            img = BadgeImage(frame_path(path, index), image=frame)
+            if not is_badge(img):
+                continue
+            value = badge_hash(img)
+            # A gym shows the same stats throughout one recording, so
+            # near duplicates are repeats differing by compression noise.
+            if any(distance(value, x) <= NEAR_MAX for x in hashes):
+                continue
+            hashes.append(value)
+
+            yield Frame(img.path, frame, path, index / fps)
+    finally:
+        cap.release()
+
+    if verbose:
+        print('INFO - Found {} badge(s) in {} ({} frame(s) compared).'.format(
+            len(hashes), path, sampled
+            ))
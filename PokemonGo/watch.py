@@ -0,0 +1,91 @@
+"""
+PokemonGo.watch
+---------------
+
+This module contains helpers for monitoring a folder for new badge
+images. Files copied by AirDrop appear before they are fully written,
+so a file is only reported once its size and modification time have
+stopped changing.
+"""
+
+
+import os
+import time
+from fnmatch import fnmatchcase
+from typing import Iterable, Iterator, Optional, Union
+
+from .ingest import DEFAULT_PATTERNS
+
+
+POLL_INTERVAL = 1.0   # Unit = seconds.
+SETTLE_TIME   = 2.0   # Unit = seconds.
+
+
+def watch_folder(
+        directories: Union[str, Iterable[str]],
+        patterns: Optional[Iterable[str]] = DEFAULT_PATTERNS,
+        interval: Optional[float] = POLL_INTERVAL,
+        settle: Optional[float] = SETTLE_TIME
+        ) -> Iterator[str]:
+    """
+    Yield paths of files in `directories` as they arrive. Files already
+    present are yielded first. The generator never ends on its own.
+
+    :param directories: The folder or folders to monitor.
+    :param iterable patterns: (optional) The glob patterns file names
+        must match. Matching is case-sensitive.
+    :param float interval: (optional) Seconds between folder scans.
+    :param float settle: (optional) Seconds a file must stay unchanged
+        before it is yielded.
+    :returns: An iterator of file paths.
+
+    .. note::
+        A yielded file is reported again only if it is removed and a
+        new file with the same name appears later.
+    """
+
+    if isinstance(directories, str):
+        directories = [directories]
+    patterns = tuple(patterns)
+
+    seen    = set()
+    pending = dict()   # path -> ((size, mtime), time first observed)
+
+    while True:
+        now = time.monotonic()
+        present = set()
+        ready = list()
+
+        for directory in directories:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not any(fnmatchcase(entry.name, p) for p in patterns):
+                        continue
+                    if not entry.is_file():
+                        continue
+                    present.add(entry.path)
+                    if entry.path in seen:
+                        continue
+
+                    stat = entry.stat()
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    previous = pending.get(entry.path)
+
+                    # New or still being written.
+                    if previous is None or previous[0] != signature:
+                        pending[entry.path] = (signature, now)
+                    elif stat.st_size > 0 and now - previous[1] >= settle:
+                        del pending[entry.path]
+                        seen.add(entry.path)
+                        ready.append((stat.st_mtime_ns, entry.path))
+
+        # Oldest first, as in ImageQueue.
+        for _, path in sorted(ready):
+            yield path
+
+        # Forget files which were moved away or deleted.
+        seen &= present
+        for path in set(pending) - present:
+            del pending[path]
+
+        time.sleep(interval)
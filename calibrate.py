@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import argparse
+
+from PokemonGo import BadgeImage, utils
+from PokemonGo.phones import get_registry
+from PokemonGo.image import parse_activity
+from PokemonGo.calibration import calibrate
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description='measure the badge regions of a new device from '
+            'sample screenshots and save its profile')
+    p.add_argument('images', nargs='+', metavar='IMAGE',
+        help='badge screenshots taken on the device')
+    p.add_argument('-m', '--model', required=True,
+        help='name of the device, recorded in the model column')
+    p.add_argument('-n', '--dry-run', action='store_true',
+        help='print the profile without saving it')
+    return p.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    utils.load_env(offline=True)
+    registry = get_registry()
+
+    profile = calibrate(args.images)
+    print('INFO - {} ({}x{}): scale {}, title rows {}-{}, '
+        'activity rows {}-{}.'.format(
+        args.model, *profile['dimensions'], profile['scale'], 
+        *profile['title'], *profile['activity']
+        ))
+
+    if args.dry_run:
+        raise SystemExit
+
+    registry.add(args.model, **profile)
+    print('INFO - Saved to {}.\n'.format(registry.path))
+
+    # Read each sample once with the new profile.
+    for path in args.images:
+        img = BadgeImage(path)
+        img.set_title_crop()
+        img.set_activity_crop()
+        title    = img.read_text('title')
+        activity = img.read_text('activity')
+        status = 'ok' if parse_activity(activity.text) else 'STATS'
+        print('{}\t{!r}\t{!r}\t{}'.format(
+            path, title.text, activity.text.replace('\n', ' '), status
+            ))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import os
+import argparse
+
+import pandas as pd
+
+from PokemonGo import utils
+from PokemonGo import analytics
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description='summarize the gym database from the local snapshot')
+    p.add_argument('--snapshot', metavar='FILE',
+        help='csv snapshot or dataset to read (default '
+            'requirements/gyms.arrow, else requirements/snapshot.csv)')
+    p.add_argument('-b', '--by', choices=['state', 'county', 'city'],
+        default='state', help='location level of the totals')
+    p.add_argument('-t', '--top', type=int, default=10,
+        help='number of locations to show')
+    p.add_argument('--near', type=int, default=10, metavar='DAYS',
+        help='list gold gyms within DAYS of 100+ days')
+    p.add_argument('--freq', choices=['W', 'M', 'Y'], default='M',
+        help='period of the growth table')
+    return p.parse_args()
+
+
+def section(title: str, table) -> None:
+    print('\n{}\n{}'.format(title, '-' * len(title)))
+    print(table.to_string() if len(table) else '(none)')
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    utils.load_env(offline=True)
+    path = args.snapshot
+    if path is None:
+        path = os.environ['DATASET']
+        if not os.path.isfile(path):
+            path = os.environ['SNAPSHOT']
+    df = analytics.load_snapshot(path)
+
+    pd.set_option('display.float_format', '{:,.2f}'.format)
+    print('INFO - {} gold gym(s) in snapshot.'.format(len(df)))
+
+    # Group by the chosen level within its parent levels.
+    levels = ['state', 'county', 'city']
+    by = levels[:levels.index(args.by) + 1]
+    section('Totals by {}'.format(args.by), 
+        analytics.totals(df, by).head(args.top))
+
+    stats = pd.DataFrame({
+        col: analytics.distribution(df, col)
+        for col in ('victories', 'treats', 'defended')
+        })
+    section('Distributions', stats)
+
+    section('Within {} days of 100+ days'.format(args.near), 
+        analytics.near_long_term(df, args.near))
+
+    if os.path.isfile(os.environ['LOGGER']):
+        log = analytics.read_log(os.environ['LOGGER'])
+        section('Growth', analytics.growth(log, args.freq))
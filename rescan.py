@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from PokemonGo import GymSheet, BadgeImage, utils
+from PokemonGo.gym import GymBatch
+from PokemonGo.archive import BadgeArchive
+from PokemonGo.exceptions import ReviewRequired, UnsupportedPhoneModel
+
+
+# Defended time is written with the days, hours and minutes it is 
+# computed from, so a row never contradicts itself.
+FIELDS = ['style', 'victories', 'days', 'hours', 'minutes', 'defended', 'treats']
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description='re-extract badge statistics from the badges archive')
+    p.add_argument('-v', '--verbose', action='store_true',
+        help='print progress statements')
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+        help='number of worker processes')
+    p.add_argument('--report', metavar='CSV',
+        help='save the diff report to a csv file')
+    p.add_argument('-y', '--yes', action='store_true',
+        help='apply changes without asking')
+    return p.parse_args()
+
+
+def extract_stats(item: tuple) -> dict:
+    """
+    Read badge statistics from a stored image without prompting.
+
+    :param tuple item: The uid, the path to its activity crop (or to 
+        the full image if no crop was kept) and the image dimensions.
+    :returns: The uid, activity values and any error code. Errors are 
+        recorded, never raised, so one badge cannot stop the pool.
+    """
+
+    uid, path, dimensions = item
+    out = {'uid': uid, 'error': ''}
+
+    try:
+        if path.endswith('.activity.png'):
+            img = BadgeImage.from_crop(path, 'activity', dimensions)
+        else:
+            img = BadgeImage(path)
+            img.set_activity_crop()
+        # Free text is parsed only if a stat cell is unreadable.
+        gymActivity = img.read_stats()
+        if gymActivity is None:
+            activityTxt = img.get_text(region='activity')
+            gymActivity = img.get_activity_vals(activityTxt)
+    except ReviewRequired as e:
+        out['error'] = e.reason
+        return out
+    except UnsupportedPhoneModel:
+        out['error'] = 'MODEL'
+        return out
+    except Exception as e:
+        # E.g. an unreadable file. Other badges are still rescanned.
+        out['error'] = repr(e)
+        return out
+
+    out |= gymActivity
+    return out
+
+
+def derive(results: list) -> None:
+    """
+    Add the derived gym fields to every readable result, computed for 
+    all badges at once.
+
+    :param list results: The output of :func:`extract_stats`.
+    """
+
+    readable = [r for r in results if not r['error']]
+    batch = GymBatch.from_records(readable)
+    batch.set_time_defended()
+    batch.set_style()
+
+    for res, row in zip(readable, batch.to_rows()):
+        res |= {field: row[field] for field in FIELDS}
+
+
+def list_archive(archive: BadgeArchive) -> list:
+    """
+    List the images to read for each stored badge, sorted by uid. 
+    Activity crops are used where kept.
+    """
+
+    items = list()
+    for uid in archive.uids():
+        path = archive.crop_path(uid, 'activity') or archive.path(uid)
+        items.append((uid, path, archive.shape(uid)))
+    return items
+
+
+def diff(gs: GymSheet, results: list) -> list:
+    """
+    Compare extracted values with the spreadsheet.
+
+    :param GymSheet gs: The spreadsheet of gyms.
+    :param list results: The output of :func:`extract_stats`.
+    :returns: One dictionary per changed cell with old and new values.
+    """
+
+    rows = {int(uid): idx for idx, uid in gs.processed['uid'].items()}
+    changes = list()
+
+    for res in results:
+        rowIndex = rows.get(res['uid'])
+        if res['error'] or rowIndex is None:
+            continue
+        rowData = {field: res[field] for field in FIELDS}
+        for _, field, new in gs.changed_cells(rowIndex, rowData):
+            changes.append({
+                'uid': res['uid'], 'row': rowIndex, 'field': field,
+                'old': gs.processed.at[rowIndex, field], 'new': new
+                })
+
+    return changes
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    utils.load_env()
+
+    gs = GymSheet(
+        os.environ['KEY_PATH'],
+        os.environ['SHEET_NAME'],
+        args.verbose
+        )
+
+    archive = BadgeArchive(os.environ['BADGES'])
+    archive.import_legacy(args.verbose)
+
+    items = list_archive(archive)
+    if args.verbose:
+        print('INFO - Rescanning {} image(s).'.format(len(items)))
+
+    # Workers never prompt; unreadable badges are reported instead.
+    results = list()
+    with ProcessPoolExecutor(args.jobs, initializer=utils.defer_prompts) as ex:
+        for i, res in enumerate(ex.map(extract_stats, items, chunksize=8)):
+            results.append(res)
+            if args.verbose and (i + 1) % 100 == 0:
+                print('INFO - {} of {} rescanned.'.format(i + 1, len(items)))
+
+    failed = [r for r in results if r['error']]
+    for res in failed:
+        print('ERROR - IMG_{:04d}.PNG   {}'.format(res['uid'], res['error']))
+
+    derive(results)
+    changes = diff(gs, results)
+    report = pd.DataFrame(changes, columns=['uid', 'row', 'field', 'old', 'new'])
+    print('\nINFO - {} badge(s) with changes, {} unreadable.'.format(
+        report['uid'].nunique(), len(failed)
+        ))
+    if report.empty:
+        raise SystemExit
+
+    print(report.to_string(index=False))
+    if args.report:
+        report.to_csv(args.report, index=False)
+
+    if args.yes or input('Apply changes? (y/n)   ') == 'y':
+        cells = [(int(c['row']), c['field'], c['new']) for c in changes]
+        gs.write_cells(cells)
@@ -2,103 +2,1057 @@
 
 import pdb
 import os
+import sys
+import json
+import time
+import threading
+from typing import TYPE_CHECKING
 
-from PokemonGo import (
-    GymSheet, BadgeImage, GoldGym, 
-    utils
-)
+from PokemonGo import utils
+from PokemonGo.pipeline import Pipeline, PROMPT_LOCK
+from PokemonGo.profiles import Profile, load_profiles
+from PokemonGo.watch import watch_folder
+from PokemonGo.journal import RunJournal
+from PokemonGo.ocr import Escalation
+from PokemonGo.exceptions import ReviewRequired
 
+if TYPE_CHECKING:
+    from PokemonGo import GymSheet
+    from PokemonGo.review import ReviewQueue
+    from PokemonGo.dedupe import HashIndex
+    from PokemonGo.archive import BadgeArchive
+    from PokemonGo.service import UploadService
 
-if __name__ == '__main__':
-    args = utils.parse_args()
 
-    utils.load_env()
-    utils.set_logger()
-    
-    queue = utils.get_queue(args.verbose)
+# OCR runs in tesseract subprocesses so threads scale across cores.
+EXTRACT_WORKERS = os.cpu_count() or 1
 
-    gs = GymSheet(
-        os.environ['KEY_PATH'], 
-        os.environ['SHEET_NAME'], 
-        args.verbose
-        )
 
-    # Generate list of unique ids to assign images.
-    if not args.updates:
-        nextId = gs.processed['uid'].max() + 1
-        ids = list(range(nextId, nextId + len(queue)))
+class Scan:
+    """
+    Values carried by a single image through the pipeline stages.
 
-    if args.verbose:
-        print('\nINFO - Begin scanning process.\n')
+    :param str path: The file path to the image.
+    :param bool isUpdate: (optional) If True, the badge is an update.
+    """
 
-    # Begin scanning process.
-    for i,path in enumerate(queue):
-        img = BadgeImage(path, args.verbose)
+    def __init__(self, path: str, isUpdate: bool = False) -> None:
+        self.path        = path
+        self.isUpdate    = isUpdate
+        self.owner       = None     # The Scanner of the image's profile.
+        self.img         = None
+        self.titleTxt    = ''
+        self.activityTxt = ''
+        self.titleEsc    = Escalation([])   # Remaining costlier reads.
+        self.activityEsc = Escalation([])
+        self.title       = ''
+        self.rowIndex    = -1
+        self.uid         = None
+        self.coords      = None
+        self.gym         = None
+        self.errors      = list()
+        self.candidates  = list()
+        self.timings     = dict()   # Seconds spent per stage.
+        self.done        = dict()   # Stages completed in a prior run.
+        self.upload      = None     # The upload awaiting this record.
+        self.image       = None     # The screenshot, if already decoded.
+        self.frame       = None     # The video frame, if no file exists.
 
-        # ========== Begin title extract ==========
-        # Single line titles (most cases).
-        img.set_title_crop()
-        titleTxt = img.get_text(region='title')
-        titleFound, rowIndex = gs.find_title(titleTxt)
 
-        # Two line titles.
-        if rowIndex == -1:
-            img.set_title_crop(offset=40)
-            img.soften_title_overlay()
-            titleTxt = img.get_text(region='title')
-            titleFound, rowIndex = gs.find_title(titleTxt)
+class Scanner:
+    """
+    The scanning process split into pipeline stages: ingest, extract,
+    match, enrich and commit.
 
-            # Multi-line titles require user input for now.
-            if rowIndex == -1:
-                titleFound, rowIndex = gs.prompt_for_title()
+    :param GymSheet gs: The spreadsheet of gyms.
+    :param argparse.Namespace args: The command line arguments.
+    :param ReviewQueue reviews: (optional) The queue receiving badges 
+        that need manual input. Required when prompts are deferred.
+    :param RunJournal journal: (optional) The journal recording each 
+        image's progress. Stages it already holds are skipped.
+    :param HashIndex hashes: (optional) The index of stored badges used 
+        to skip duplicates before any text is read.
+    :param BadgeArchive archive: (optional) The store receiving scanned 
+        badges. Required unless nothing is committed.
+    :param Profile profile: (optional) The player scanned for. Defaults 
+        to the profile in the environment.
+    :param Pipeline pipeline: (optional) A pipeline shared with other 
+        profiles (see :class:`MultiScanner`). By default the scanner 
+        builds and runs its own.
+    """
 
-        # ========== End title extract ==========
+    def __init__(
+            self, 
+            gs: 'GymSheet', 
+            args, 
+            reviews: 'ReviewQueue' = None, 
+            journal: RunJournal = None, 
+            hashes: 'HashIndex' = None, 
+            archive: 'BadgeArchive' = None, 
+            profile: Profile = None, 
+            pipeline: Pipeline = None
+            ) -> None:
+        self.gs      = gs
+        self.args    = args
+        self.reviews = reviews
+        self.journal = journal
+        self.hashes  = hashes
+        self.archive = archive
+        self.profile = profile or Profile.from_env()
+        self.pipeline = pipeline or Pipeline(args.verbose)
 
-        # New gym.
-        if not args.updates:
-            coords = gs.unprocessed.at[rowIndex, 'latlon']
-            id = ids.pop(0)
-        else:  # Update old gym.
-            coords = gs.processed.at[rowIndex, 'latlon']
-            id = gs.processed.at[rowIndex, 'uid']
+        # Update mode writes changed cells only, in batches.
+        self.pendingCells = list()
+        self.pendingScans = list()
+        self.updateStats  = {'changed': 0, 'unchanged': 0, 'avoided': 0}
 
-        # Initialize data that will be passed to google sheet.
-        rowDict = {
-            'uid': id, 
-            'title': titleFound, 
-            'model': img.params.model
+        self.progress = dict()
+        if journal is not None:
+            self.progress = journal.progress()
+
+        # Next unique id to assign a new gym. Ids in the journal may 
+        # belong to rows whose write did not finish.
+        lastId = gs.maxUid
+        if journal is not None:
+            lastId = max(lastId, journal.max_uid())
+        self.nextId = lastId + 1
+
+        if pipeline is None:
+            self.add_stages()
+
+
+    def add_stages(self) -> None:
+        """Build the pipeline stages."""
+
+        p = self.pipeline
+        p.add_stage('ingest',  self.timed(self.ingest))
+        p.add_stage('extract', self.timed(self.extract), EXTRACT_WORKERS)
+        p.add_stage('match',   self.timed(self.match))
+        p.add_stage('enrich',  self.timed(self.enrich))
+        p.add_stage('commit',  self.commit)
+
+
+    def timed(self, stage):
+        """Wrap a stage to record its duration in :attr:`Scan.timings`."""
+
+        def wrapper(scan: Scan):
+            start = time.perf_counter()
+            try:
+                return stage(scan)
+            finally:
+                elapsed = time.perf_counter() - start
+                scan.timings[stage.__name__] = round(elapsed, 4)
+
+        return wrapper
+
+
+    def run(self, queue) -> None:
+        """Process every image path in `queue`."""
+
+        try:
+            self.pipeline.run(self.new_scan(path) for path in queue)
+        finally:
+            self.flush()
+        self.summarize()
+
+
+    def run_videos(self, paths: list) -> None:
+        """
+        Process the distinct badges shown in screen recordings (see 
+        :func:`video.extract_badges`). Frames are scanned in memory and 
+        recordings are left in place.
+        """
+
+        from PokemonGo.video import extract_badges
+
+        def scans():
+            for path in paths:
+                for frame in extract_badges(path, self.args.verbose):
+                    scan = self.new_scan(frame.path)
+                    scan.frame = frame
+                    scan.image = frame.image
+                    yield scan
+
+        try:
+            self.pipeline.run(scans())
+        finally:
+            self.flush()
+        self.summarize()
+
+
+    def new_scan(self, path: str, isUpdate: bool = None) -> Scan:
+        """Start a scan, restoring any progress from the journal."""
+
+        if isUpdate is None:
+            isUpdate = self.args.updates
+        scan = Scan(path, isUpdate)
+        scan.owner = self
+        scan.done = self.progress.get(path, dict())
+        return scan
+
+
+    def record(self, scan: Scan, stage: str, **data) -> None:
+        """Journal a completed stage for `scan`."""
+
+        if self.journal is not None:
+            self.journal.record(scan.path, stage, **data)
+
+
+    def watch(self) -> None:
+        """
+        Scan images as they arrive in Downloads until interrupted. The 
+        sheet, geolocator and loaded libraries stay warm between images 
+        and a failing image no longer stops the run.
+        """
+
+        self.pipeline.onError = self.skip
+        sources = self.profile.sources
+        source = watch_folder(sources, self.profile.patterns)
+        print('INFO - Watching {} (Ctrl-C to stop).\n'.format(
+            ', '.join(sources)
+            ))
+
+        try:
+            self.pipeline.run(self.new_scan(path) for path in source)
+        except KeyboardInterrupt:
+            print('\nINFO - Stopped watching.')
+        finally:
+            self.flush()
+        self.summarize()
+
+
+    def serve(self, service: 'UploadService') -> None:
+        """
+        Scan badges posted to `service` until interrupted. Each request 
+        is answered once its badges are matched; prompts must be 
+        deferred since no one is at the terminal.
+        """
+
+        self.pipeline.onError = self.skip
+        serve_uploads(self.pipeline, service, self.new_scan)
+        self.flush()
+        self.summarize()
+
+
+    def skip(self, scan: Scan, e: Exception) -> None:
+        """Report an image which failed and leave it in place."""
+
+        print('ERROR - {} skipped: {!r}\n'.format(scan.path, e))
+        self.release(scan)
+        self.reply(scan, 'failed', error=repr(e))
+
+
+    def release(self, scan: Scan) -> None:
+        """Drop the hash reserved for a badge which is not stored."""
+
+        if self.hashes is not None:
+            self.hashes.release(scan.path)
+
+
+    def reply(self, scan: Scan, status: str, **data) -> None:
+        """Answer the upload of `scan`, if any, with its record."""
+
+        if scan.upload is not None:
+            scan.upload.resolve(self.describe(scan) | {'status': status} | data)
+
+
+    def describe(self, scan: Scan) -> dict:
+        """Build the json record of what was read from a badge."""
+
+        stats = dict()
+        if scan.gym is not None:
+            gym = scan.gym
+            stats = {
+                k: getattr(gym, k) for k in (
+                    'style', 'victories', 'days', 'hours', 'minutes', 
+                    'defended', 'treats'
+                    )
+                }
+
+        model = None
+        if scan.img is not None:
+            model = scan.img.params.model
+
+        return {
+            'path': scan.path, 
+            'uid': scan.uid, 
+            'title': scan.title, 
+            'row': scan.rowIndex, 
+            'model': model, 
+            'stats': stats, 
+            'text': {'title': scan.titleTxt, 'activity': scan.activityTxt}, 
+            'candidates': scan.candidates, 
+            'errors': scan.errors, 
+            'timings': scan.timings
             }
-        
-        # Extract all activity data from badge image.
-        img.set_activity_crop()
-        activityTxt = img.get_text(region='activity')
-        gymActivity = img.get_activity_vals(activityTxt)
+
+
+    def defer(self, scan: Scan, e: ReviewRequired) -> None:
+        """Move an ambiguous badge to the review queue."""
+
+        img = scan.img
+        crops = {
+            region: getattr(img, region + 'Crop')
+            for region in ('title', 'activity')
+            if hasattr(img, region + 'Crop')
+            }
+        scan.candidates = e.candidates
+        self.release(scan)
+        self.reply(scan, 'review', reason=e.reason)
+        self.reviews.add(
+            scan.path, e.reason, e.prompt, e.candidates, 
+            texts={'title': scan.titleTxt, 'activity': scan.activityTxt}, 
+            crops=crops, 
+            isUpdate=scan.isUpdate, 
+            image=img.image if scan.frame is not None else None
+            )
+        print('INFO - Deferred {} for review ({}).\n'.format(
+            scan.path, e.reason
+            ))
+
+
+    def ingest(self, scan: Scan) -> Scan:
+        """Read image from disk and detect phone model."""
+
+        from PokemonGo import BadgeImage
+        from PokemonGo.archive import move_file, free_path
+        from PokemonGo.dedupe import badge_hash, DUPLICATE_MAX, NEAR_MAX
+
+        # Uploads and video frames are already decoded.
+        scan.img = BadgeImage(scan.path, self.args.verbose, scan.image)
+
+        if self.hashes is None:
+            return scan
+
+        value = badge_hash(scan.img)
+        name, dist = self.hashes.nearest(value)
+
+        # Updates resemble their stored badge, and changed stats may 
+        # hash within a few bits of it, so they are never skipped.
+        if 0 <= dist <= DUPLICATE_MAX and not scan.isUpdate:
+            # Keep the copy out of Downloads without scanning it.
+            if scan.frame is None:
+                duplicates = os.path.join(self.profile.badges, 'duplicates')
+                os.makedirs(duplicates, exist_ok=True)
+                # Copies of badges from earlier runs may share a name.
+                dest = os.path.join(duplicates, os.path.basename(scan.path))
+                move_file(scan.path, free_path(dest))
+            print('INFO - Skipped {}; duplicate of {}.\n'.format(
+                scan.path, name
+                ))
+            self.reply(scan, 'duplicate', duplicate=name)
+            return None
+
+        self.hashes.reserve(scan.path, value)
+        if 0 <= dist <= NEAR_MAX and not scan.isUpdate:
+            scan.img.errors.append('DUPLICATE')
+            print('WARNING - {} resembles {}.'.format(scan.path, name))
+        return scan
+
+
+    def extract(self, scan: Scan) -> Scan:
+        """Read title and activity text from image."""
+
+        from PokemonGo.image import parse_activity
+
+        img = scan.img
+
+        if 'extracted' in scan.done:
+            prior = scan.done['extracted']
+            scan.titleTxt    = prior['titleTxt']
+            scan.activityTxt = prior['activityTxt']
+            scan.titleEsc    = Escalation(
+                img.title_steps(), skip=prior.get('titleReads', 1)
+                )
+            scan.activityEsc = Escalation(
+                img.activity_steps(), skip=prior.get('activityReads', 1)
+                )
+            return scan
+
+        # Titles are checked against the sheet, so costlier reads are 
+        # left to the match stage, which makes them only on a miss.
+        scan.titleEsc    = Escalation(img.title_steps())
+        scan.titleTxt    = scan.titleEsc.next_read().text
+
+        # Stats are only checked by parsing. A valid read is never 
+        # dropped for a more confident read which does not parse.
+        scan.activityEsc = Escalation(img.activity_steps())
+        activityRead = scan.activityEsc.first(
+            lambda x: parse_activity(x.text) is not None
+            )
+        if activityRead is None:
+            # The user is asked in the match stage.
+            activityRead = max(
+                scan.activityEsc.reads, key=lambda x: x.confidence
+                )
+        elif not activityRead.is_confident(scan.activityEsc.minimum):
+            img.errors.append('CONFIDENCE')
+        scan.activityTxt = activityRead.text
+
+        self.record(scan, 'extracted', 
+            titleTxt=scan.titleTxt, activityTxt=scan.activityTxt, 
+            titleReads=scan.titleEsc.ran, 
+            activityReads=scan.activityEsc.ran)
+        return scan
+
+
+    def match(self, scan: Scan) -> Scan:
+        """Locate gym in spreadsheet and build gym from activity."""
+
+        try:
+            scan = self._match(scan)
+        except ReviewRequired as e:
+            self.defer(scan, e)
+            return None
+
+        self.reply(scan, 'matched')
+        return scan
+
+
+    def _match(self, scan: Scan) -> Scan:
+        from PokemonGo import GoldGym
+
+        gs = self.gs
+        isUpdate = scan.isUpdate
+
+        if 'matched' in scan.done:
+            prior = scan.done['matched']
+            titleFound  = prior['title']
+            rowIndex    = prior['rowIndex']
+            gymActivity = prior['activity']
+            scan.errors = prior['errors']
+        else:
+            titleFound, rowIndex, gymActivity = self._find(scan)
+            scan.errors = gs.errors + scan.img.errors
+            self.record(scan, 'matched', title=titleFound, 
+                rowIndex=rowIndex, activity=gymActivity, errors=scan.errors)
+
+        scan.title    = titleFound
+        scan.rowIndex = rowIndex
+
+        scan.coords = gs.table.at[rowIndex, 'latlon']
+        # Update old gym.
+        if isUpdate:
+            scan.uid = gs.table.at[rowIndex, 'uid']
 
         # Initialize gym with extracted data.
         gym = GoldGym(title=titleFound, **gymActivity)
         gym.set_time_defended()
         gym.set_style()
-        
-        # Obtain location fields for new gyms.
-        if not args.updates:
-            gym.set_address(coords, os.environ['EMAIL'])
-            gym.set_city()
-            gym.set_county()
-            gym.set_state()
-
-        rowDict |= vars(gym)   # python3.9+
-        del rowDict['address']
-        del rowDict['errors']
+        scan.gym = gym
+        return scan
+
+
+    def _find(self, scan: Scan) -> tuple[str, int, dict]:
+        """Find title row and parse activity, prompting if needed."""
+
+        from PokemonGo.image import parse_activity
+
+        gs, img = self.gs, scan.img
+        isUpdate = scan.isUpdate
+
+        # Rereads run OCR, so only prompts hold the lock.
+        titleFound, rowIndex = self._find_title(scan)
+        if rowIndex == -1:
+            with PROMPT_LOCK:
+                titleFound, rowIndex = gs.prompt_for_title(isUpdate)
+
+        # Extract all activity data from badge image.
+        gymActivity = parse_activity(scan.activityTxt)
+        while gymActivity is None and not scan.activityEsc.exhausted:
+            scan.activityTxt = scan.activityEsc.next_read().text
+            gymActivity = parse_activity(scan.activityTxt)
+        if gymActivity is None:
+            with PROMPT_LOCK:
+                gymActivity = img.get_activity_vals(scan.activityTxt)
+
+        return titleFound, int(rowIndex), gymActivity
+
+
+    def _find_title(self, scan: Scan) -> tuple[str, int]:
+        """
+        Look each title read up in the sheet, making costlier reads 
+        (e.g. two line titles) only while none matches. Similar titles, 
+        which ask the user, are tried once every read missed, holding 
+        :data:`pipeline.PROMPT_LOCK`.
+        """
+
+        gs, isUpdate = self.gs, scan.isUpdate
+
+        def lookup(text, similar):
+            titleFound, rowIndex = gs.find_title(text, isUpdate, similar)
+            if rowIndex != -1:
+                scan.titleTxt = text
+            return titleFound, rowIndex
+
+        texts = [scan.titleTxt]
+        found = lookup(scan.titleTxt, False)
+        while found[1] == -1:
+            titleRead = scan.titleEsc.next_read()
+            if titleRead is None:
+                break
+            if titleRead.text in texts:
+                continue   # E.g. no doubtful word was read again.
+            texts.append(titleRead.text)
+            found = lookup(titleRead.text, False)
+
+        if found[1] != -1:
+            return found
+
+        with PROMPT_LOCK:
+            for text in texts:
+                found = lookup(text, True)
+                if found[1] != -1:
+                    break
+
+        return found
+
+
+    def enrich(self, scan: Scan) -> Scan:
+        """Obtain location fields for new gyms."""
+
+        if scan.isUpdate:
+            return scan
+
+        gym = scan.gym
+
+        if 'geocoded' in scan.done:
+            gym.latlon = scan.coords
+            for field, value in scan.done['geocoded'].items():
+                setattr(gym, field, value)
+            return scan
+
+        gym.set_address(scan.coords, self.profile.email)
+        try:
+            with PROMPT_LOCK:
+                gym.set_city()
+                gym.set_county()
+                gym.set_state()
+        except ReviewRequired as e:
+            self.defer(scan, e)
+            return None
+
+        self.record(scan, 'geocoded', 
+            city=gym.city, county=gym.county, state=gym.state)
+        return scan
+
+
+    def commit(self, scan: Scan) -> None:
+        """Write row to spreadsheet, log errors and store image."""
+
+        rowDict = self.row_data(scan)
+
+        if scan.isUpdate and 'written' not in scan.done:
+            self.stage_update(scan, rowDict)
+            return
 
         # Write data to spreadsheet.
-        gs.write_to_row(rowIndex, rowDict)
+        if 'written' not in scan.done:
+            self.gs.write_to_row(scan.rowIndex, rowDict)
+            self.record(scan, 'written', uid=scan.uid)
+
+        self.finish(scan)
+        if self.args.verbose:
+            print('INFO - Queues: {}'.format(self.pipeline.status()))
+        print()
+
+
+    def stage_update(self, scan: Scan, rowDict: dict) -> None:
+        """
+        Queue the cells of an updated gym whose values changed. Queued 
+        cells are written once the commit stage has no backlog.
+        """
+
+        cells = self.gs.changed_cells(scan.rowIndex, rowDict)
+
+        stats = self.updateStats
+        stats['changed' if cells else 'unchanged'] += 1
+        stats['avoided'] += len(rowDict) - len(cells)
+
+        self.pendingCells += cells
+        self.pendingScans.append(scan)
+        if self.pipeline.stages[-1].depth == 0:
+            self.flush()
+
+
+    def flush(self) -> None:
+        """Write queued update cells, then store their images."""
+
+        if not self.pendingScans:
+            return
+
+        self.gs.write_cells(self.pendingCells)
+
+        for scan in self.pendingScans:
+            self.record(scan, 'written', uid=scan.uid)
+            self.finish(scan)
+            print()
+
+        self.pendingCells.clear()
+        self.pendingScans.clear()
+
+
+    def summarize(self) -> None:
+        """Print counts of changed and unchanged updates."""
+
+        stats = self.updateStats
+        if not stats['changed'] and not stats['unchanged']:
+            return
+
+        print('INFO - Updates: {} changed, {} unchanged row(s); '
+            '{} cell write(s) avoided.'.format(
+            stats['changed'], stats['unchanged'], stats['avoided']
+            ))
+
+
+    def row_data(self, scan: Scan) -> dict:
+        """Assign uid to new gyms and build the spreadsheet row."""
+
+        # Ids are assigned at commit so deferred badges never use one.
+        if 'assigned' in scan.done:
+            scan.uid = scan.done['assigned']['uid']
+        elif not scan.isUpdate:
+            scan.uid = self.nextId
+            self.nextId += 1
+            self.record(scan, 'assigned', uid=scan.uid)
+
+        # Initialize data that will be passed to google sheet.
+        rowDict = {
+            'uid': scan.uid,
+            'title': scan.title,
+            'model': scan.img.params.model
+            }
+        rowDict |= scan.gym.to_dict()   # python3.9+
+        return rowDict
+
+
+    def finish(self, scan: Scan) -> None:
+        """Log errors and store image after its row is written."""
 
         # Log any/all errors.
-        errors = gs.errors + img.errors + gym.errors
-        utils.log_entry(id, errors)
+        utils.log_entry(
+            scan.uid, scan.errors + scan.gym.errors, self.profile.name
+            )
 
         # Move image to storage once everything else succeeded.
-        img.to_storage(os.environ['BADGES'], id)
-        print()
+        if scan.frame is not None:
+            scan.img.path = self.archive.store_image(scan.img, scan.uid)
+        else:
+            scan.img.path = self.archive.store(scan.path, scan.uid, scan.img)
+        self.record(scan, 'moved', uid=scan.uid)
+
+        if self.hashes is not None:
+            self.hashes.add(scan.path, self.archive.name(scan.uid))
+
+
+    def review(self) -> None:
+        """
+        Resolve every badge in the review queue interactively, then 
+        write all resolved rows in a single batch.
+        """
+
+        resolved, scans, rows = list(), list(), dict()
+
+        for entry in self.reviews.entries():
+            print('Reviewing {} ({})'.format(entry['path'], entry['reason']))
+            for region, text in entry['texts'].items():
+                print('\t{} text: {!r}'.format(region, text))
+            for candidate in entry['candidates']:
+                print('\tcandidate: {}'.format(candidate))
+            for cropPath in entry['crops'].values():
+                print('\tcrop: {}'.format(cropPath))
+
+            scan = self.new_scan(entry['path'], entry['isUpdate'])
+            scan.titleTxt    = entry['texts'].get('title', '')
+            scan.activityTxt = entry['texts'].get('activity', '')
+            try:
+                scan = self.ingest(scan)
+                if scan is None:   # Duplicate of a stored badge.
+                    resolved.append(entry)
+                    continue
+                scan = self._match(scan)
+                scan = self.enrich(scan)
+            except Exception as e:
+                print('ERROR - {}; left in review queue.\n'.format(e))
+                self.release(scan)
+                continue
+
+            # Two badges resolved to the same gym; one would be lost.
+            if scan.rowIndex in rows:
+                print('ERROR - Row {} already taken by another badge; '
+                    'left in review queue.\n'.format(scan.rowIndex))
+                self.progress.pop(scan.path, None)
+                self.release(scan)
+                if self.journal is not None:
+                    self.journal.reset(scan.path)
+                continue
+
+            rows[scan.rowIndex] = self.row_data(scan)
+            scans.append(scan)
+            resolved.append(entry)
+            print()
+
+        # Write data to spreadsheet.
+        self.gs.write_rows(rows)
+
+        for scan in scans:
+            self.finish(scan)
+        self.reviews.resolve(resolved)
+
+        print('INFO - Resolved {} of {} badge(s).'.format(
+            len(resolved), len(resolved) + len(self.reviews)
+            ))
+
+
+class MultiScanner:
+    """
+    Scanners of several players sharing one pipeline, so a single 
+    process serves them all. Every stage routes a scan to the scanner 
+    of its profile, found from the folder the image arrived in. The OCR 
+    workers, tesseract processes, geocode cache and rate limiter are 
+    shared, and queues are interleaved (see :func:`utils.get_queue`) so 
+    no player waits for another's backlog.
+
+    :param list scanners: The scanners, each built with `pipeline`.
+    :param Pipeline pipeline: The shared pipeline.
+    :raises ValueError: if two scanners watch the same folder.
+    """
+
+    def __init__(self, scanners: list, pipeline: Pipeline) -> None:
+        self.scanners = scanners
+        self.pipeline = pipeline
+
+        self.owners = dict()   # Source folder -> scanner.
+        for scanner in scanners:
+            for source in scanner.profile.sources:
+                source = os.path.normpath(source)
+                if source in self.owners:
+                    raise ValueError(
+                        "Folder '{}' belongs to several profiles".format(source)
+                        )
+                self.owners[source] = scanner
+
+        self.add_stages()
+
+
+    def add_stages(self) -> None:
+        """Build the shared pipeline stages."""
+
+        p = self.pipeline
+        p.add_stage('ingest',  self.route('ingest'))
+        p.add_stage('extract', self.route('extract'), EXTRACT_WORKERS)
+        p.add_stage('match',   self.route('match'))
+        p.add_stage('enrich',  self.route('enrich'))
+        p.add_stage('commit',  self.route('commit', timed=False))
+
+
+    @staticmethod
+    def route(name: str, timed: bool = True):
+        """Build a stage calling method `name` of each scan's owner."""
+
+        def stage(scan: Scan):
+            owner = scan.owner
+            func = getattr(owner, name)
+            if timed:
+                func = owner.timed(func)
+            return func(scan)
+
+        return stage
+
+
+    def new_scan(self, path: str) -> Scan:
+        """Start a scan with the scanner owning the image's folder."""
+
+        folder = os.path.normpath(os.path.dirname(path))
+        return self.owners[folder].new_scan(path)
+
+
+    @staticmethod
+    def skip(scan: Scan, e: Exception) -> None:
+        """Report a failed scan to the scanner of its profile."""
+        scan.owner.skip(scan, e)
+
+
+    def run(self, queue) -> None:
+        """Process every image path in `queue`."""
+
+        try:
+            self.pipeline.run(self.new_scan(path) for path in queue)
+        finally:
+            self.flush()
+        self.summarize()
+
+
+    def watch(self) -> None:
+        """Scan images of every profile as they arrive until interrupted."""
+
+        self.pipeline.onError = self.skip
+        sources  = list(self.owners)
+        patterns = {x for s in self.scanners for x in s.profile.patterns}
+        source = watch_folder(sources, patterns)
+        print('INFO - Watching {} (Ctrl-C to stop).\n'.format(
+            ', '.join(sources)
+            ))
+
+        try:
+            self.pipeline.run(self.new_scan(path) for path in source)
+        except KeyboardInterrupt:
+            print('\nINFO - Stopped watching.')
+        finally:
+            self.flush()
+        self.summarize()
+
+
+    def serve(self, service: 'UploadService') -> None:
+        """Scan badges posted to `service` for every profile."""
+
+        self.pipeline.onError = self.skip
+        serve_uploads(self.pipeline, service, self.new_scan)
+        self.flush()
+        self.summarize()
+
+
+    def review(self) -> None:
+        """Resolve the review queue of each profile in turn."""
+
+        for scanner in self.scanners:
+            print('INFO - Profile {}.'.format(scanner.profile.name))
+            scanner.review()
+
+
+    def flush(self) -> None:
+        for scanner in self.scanners:
+            scanner.flush()
+
+
+    def summarize(self) -> None:
+        for scanner in self.scanners:
+            scanner.summarize()
+
+
+class DryRunScanner(Scanner):
+    """
+    A scanner which only reads badges and matches titles, writing one 
+    json record per image. Prompts are deferred and nothing is moved, 
+    geocoded or written to the spreadsheet.
+
+    :param GymSheet gs: The spreadsheet of gyms, typically loaded with 
+        :meth:`GymSheet.from_snapshot`.
+    :param argparse.Namespace args: The command line arguments.
+    :param out: The writable text file receiving json lines.
+    """
+
+    def __init__(self, gs: 'GymSheet', args, out) -> None:
+        self.out = out
+        self._outLock = threading.Lock()
+        super().__init__(gs, args)
+        # A badge which cannot be read is reported, not fatal.
+        self.pipeline.onError = self.fail
+
+
+    def add_stages(self) -> None:
+        p = self.pipeline
+        p.add_stage('ingest',  self.timed(self.ingest))
+        p.add_stage('extract', self.timed(self.extract), EXTRACT_WORKERS)
+        p.add_stage('match',   self.timed(self.match))
+        p.add_stage('emit',    self.emit)
+
+
+    def match(self, scan: Scan) -> Scan:
+        """Match title, recording ambiguous items as errors."""
+
+        try:
+            return self._match(scan)
+        except ReviewRequired as e:
+            scan.errors = self.gs.errors + scan.img.errors + [e.reason]
+            scan.candidates = e.candidates
+            return scan
+
+
+    def fail(self, scan: Scan, e: Exception) -> None:
+        """Write the record of an image which raised, with the error."""
+
+        if not scan.errors and scan.img is not None:
+            scan.errors = list(scan.img.errors)
+        scan.errors = scan.errors + [repr(e)]
+        self.emit(scan)
+
+
+    def emit(self, scan: Scan) -> None:
+        """Write the extracted record as a json line."""
+
+        # Failed images are written from the stage which raised.
+        with self._outLock:
+            record = self.describe(scan)
+            if scan.gym is not None and not scan.isUpdate:
+                record['uid'] = self.nextId
+                self.nextId += 1
+
+            # NumPy values from the sheet are converted to python types.
+            line = json.dumps(record, default=lambda x: x.item())
+            self.out.write(line + '\n')
+            self.out.flush()
+
+
+def serve_uploads(
+        pipeline: Pipeline, 
+        service: 'UploadService', 
+        new_scan
+        ) -> None:
+    """
+    Run uploads received by `service` through `pipeline` until 
+    interrupted, then stop the service.
+
+    :param Pipeline pipeline: The scanning pipeline.
+    :param UploadService service: The upload service.
+    :param callable new_scan: Starts the scan of a saved upload.
+    """
+
+    def scans():
+        for upload in service.uploads():
+            scan = new_scan(upload.path)
+            scan.upload = upload
+            scan.image = upload.image
+            yield scan
+
+    service.start()
+    print('INFO - Accepting badges at {}/badges (Ctrl-C to stop).\n'.format(
+        service.url
+        ))
+    try:
+        pipeline.run(scans())
+    except KeyboardInterrupt:
+        print('\nINFO - Stopped serving.')
+    finally:
+        service.stop()
+
+
+def open_profile(
+        profile: Profile, 
+        args, 
+        pipeline: Pipeline = None
+        ) -> Scanner:
+    """
+    Load the sheet, journal and badge stores of a profile.
+
+    :param Profile profile: The player to scan for.
+    :param argparse.Namespace args: The command line arguments.
+    :param Pipeline pipeline: (optional) The pipeline shared by profiles.
+    :returns: The scanner of the profile.
+    """
+
+    from PokemonGo import GymSheet
+    from PokemonGo.review import ReviewQueue
+    from PokemonGo.dedupe import HashIndex
+    from PokemonGo.archive import BadgeArchive
+
+    profile.prepare()
+    reviews = ReviewQueue(profile.review)
+
+    gs = GymSheet(
+        profile.keyPath,
+        profile.sheetName,
+        args.verbose,
+        profile.dataset if args.cached else None
+        )
+    gs.save_snapshot(profile.snapshot)
+
+    journal = RunJournal(
+        profile.journal, resume=args.resume or args.review
+        )
+    archive = BadgeArchive(profile.badges, crops=not args.no_crops)
+    archive.import_legacy(args.verbose)
+
+    hashes = None
+    if not args.keep_duplicates:
+        hashes = HashIndex(profile.badges, archive)
+        hashes.refresh(args.verbose)
+
+    return Scanner(
+        gs, args, reviews, journal, hashes, archive, profile, pipeline
+        )
+
+
+if __name__ == '__main__':
+    args = utils.parse_args()
+
+    if args.dry_run:
+        utils.load_env(offline=True)
+        utils.defer_prompts()
+
+        if not args.video:
+            queue = utils.get_queue(args.verbose)
+
+        from PokemonGo import GymSheet
+        gs = GymSheet.from_snapshot(
+            args.snapshot or os.environ['SNAPSHOT'], args.verbose
+            )
+
+        out = sys.stdout
+        if args.dry_run != '-':
+            out = open(args.dry_run, 'w')
+        try:
+            scanner = DryRunScanner(gs, args, out)
+            if args.video:
+                scanner.run_videos(args.video)
+            else:
+                scanner.run(queue)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        sys.exit()
+
+    utils.load_env()
+
+    profiles = [Profile.from_env()]
+    if args.profile:
+        names = None if 'all' in args.profile else args.profile
+        profiles = load_profiles(os.environ['PROFILES'], names)
+
+    for profile in profiles:
+        # A new profile's state directory holds its log file.
+        profile.prepare()
+        utils.set_logger(profile.logFile, profile.name)
+
+    if not (args.review or args.watch or args.serve or args.video):
+        queue = utils.get_queue(
+            args.verbose, profiles if args.profile else None
+            )
+
+    # Nobody answers prompts for uploaded badges.
+    if (args.defer or args.serve) and not args.review:
+        utils.defer_prompts()
+
+    # Profiles share one pipeline and its OCR workers.
+    pipeline = Pipeline(args.verbose) if len(profiles) > 1 else None
+    scanners = [open_profile(x, args, pipeline) for x in profiles]
+
+    scanner = scanners[0]
+    if pipeline is not None:
+        scanner = MultiScanner(scanners, pipeline)
+
+    if args.verbose:
+        print('\nINFO - Begin scanning process.\n')
+
+    # Begin scanning process.
+    if args.review:
+        scanner.review()
+    elif args.watch:
+        scanner.watch()
+    elif args.video:
+        scanner.run_videos(args.video)
+    elif args.serve:
+        from PokemonGo.service import UploadService, parse_address
+
+        host, port = parse_address(args.serve)
+        # Uploads are saved where a normal run would also find them.
+        folders = {x.name: x.sources[0] for x in profiles}
+        scanner.serve(UploadService(folders, host, port))
+    else:
+        scanner.run(queue)
+
+    for each in scanners:
+        each.gs.geo_sort(args.order)
 
-    gs.geo_sort()
\ No newline at end of file
+        # Keep a local copy of the sorted sheet for the next run and tools.
+        each.gs.save_dataset(each.profile.dataset)
@@ -0,0 +1,62 @@
+"""
+A benchmark of the analytics report. Synthetic gyms are prepared, 
+totalled at every level, and their distributions and near long term 
+gyms are computed. The median wall time of each step is reported.
+Timings depend on the machine, so they are printed, never asserted.
+
+.. code::
+
+    $ python -m tests.bench_analytics --gyms 100000 --runs 5
+"""
+
+
+import time
+import argparse
+import statistics
+
+from PokemonGo import analytics
+from tests.test_analytics import synthetic_records
+
+
+def report(records) -> dict:
+    """
+    Run the full report once.
+
+    :returns: The wall time in seconds of each step.
+    """
+
+    times = dict()
+    start = time.perf_counter()
+    df = analytics.prepare(records)
+    times['prepare'] = time.perf_counter() - start
+
+    lap = time.perf_counter()
+    for by in ('state', ['state', 'county'], ['state', 'county', 'city']):
+        analytics.totals(df, by)
+    times['totals'] = time.perf_counter() - lap
+
+    lap = time.perf_counter()
+    for col in ('victories', 'treats', 'defended'):
+        analytics.distribution(df, col)
+    times['distribution'] = time.perf_counter() - lap
+
+    lap = time.perf_counter()
+    analytics.near_long_term(df)
+    times['near_long_term'] = time.perf_counter() - lap
+
+    times['total'] = time.perf_counter() - start
+    return times
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='analytics report benchmark')
+    p.add_argument('--gyms', type=int, default=100_000)
+    p.add_argument('--runs', type=int, default=5)
+    args = p.parse_args()
+
+    records = synthetic_records(args.gyms)
+    runs = [report(records) for _ in range(args.runs)]
+
+    for step in runs[0]:
+        median = statistics.median(x[step] for x in runs)
+        print('{:<28}{:>8.1f} ms'.format(step, 1000 * median))
@@ -0,0 +1,69 @@
+"""
+A benchmark of startup time. Each command runs in a fresh interpreter
+several times and the median wall time is reported, along with the
+slowest imports of the last run as measured by ``-X importtime``.
+Timings depend on the machine, so they are printed, never asserted.
+
+.. code::
+
+    $ python -m tests.bench_imports --runs 10
+"""
+
+
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+
+COMMANDS = {
+    'import PokemonGo': ['-c', 'import PokemonGo'],
+    'import PokemonGo.ingest': ['-c', 'import PokemonGo.ingest'],
+    'scanner.py -h': ['scanner.py', '-h'],
+    }
+
+
+def run(args: list) -> tuple[float, dict]:
+    """
+    Run the interpreter once with `args`.
+
+    :returns: The wall time in seconds and the cumulative import time,
+        in microseconds, of each top-level module.
+    """
+
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        capture_output=True, text=True, check=True
+        )
+    elapsed = time.perf_counter() - start
+
+    modules = dict()
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level imports are not indented.
+        if not name.startswith('  ') and cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return elapsed, modules
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='startup time benchmark')
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--top', type=int, default=5,
+        help='number of slowest imports to list')
+    args = p.parse_args()
+
+    for label, command in COMMANDS.items():
+        times = list()
+        for _ in range(args.runs):
+            elapsed, modules = run(command)
+            times.append(elapsed)
+
+        print('{:<28}{:>8.1f} ms'.format(label, 1000 * statistics.median(times)))
+        slowest = sorted(modules.items(), key=lambda x: -x[1])[:args.top]
+        for name, us in slowest:
+            print('    {:<24}{:>8.1f} ms'.format(name, us / 1000))
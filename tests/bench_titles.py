@@ -0,0 +1,43 @@
+"""
+A benchmark of title lookups. An index is built over random titles and
+fragments of them are looked up. The build time and the median time
+per lookup are reported. Timings depend on the machine, so they are
+printed, never asserted.
+
+.. code::
+
+    $ python -m tests.bench_titles --titles 5000 --runs 5
+"""
+
+
+import time
+import argparse
+import statistics
+
+from PokemonGo.titles import TitleIndex
+from tests.test_titles import random_titles
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='title lookup benchmark')
+    p.add_argument('--titles', type=int, default=5000)
+    p.add_argument('--lookups', type=int, default=1000)
+    p.add_argument('--runs', type=int, default=5)
+    args = p.parse_args()
+
+    titles = random_titles(args.titles)
+    fragments = [x[2:14] for x in titles[:args.lookups]]
+
+    builds, lookups = list(), list()
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        index = TitleIndex(titles)
+        builds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for fragment in fragments:
+            index.find(fragment)
+        lookups.append((time.perf_counter() - start) / len(fragments))
+
+    print('{:<28}{:>8.1f} ms'.format('build', 1000 * statistics.median(builds)))
+    print('{:<28}{:>8.1f} us'.format('lookup', 1e6 * statistics.median(lookups)))
@@ -0,0 +1,170 @@
+"""
+A local stand-in for the Nominatim `/reverse` service, so geocoding
+tests and benchmarks of the enrich stage run offline. Places are seeded
+from `tests/fixtures/nominatim.json` and each request returns the
+closest place, as Nominatim does, in its json format.
+
+Run standalone for benchmarks and point the scanner at it with
+`NOMINATIM_URL`:
+
+.. code::
+
+    $ python -m tests.nominatim --port 8080 --latency 0.2
+"""
+
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from typing import Iterable, Optional
+
+
+FIXTURES = 'tests/fixtures/nominatim.json'
+MAX_DISTANCE = 0.01   # Unit = degrees. Farther queries find nothing.
+
+
+class FakeNominatim:
+    """
+    A threaded HTTP server answering Nominatim reverse queries.
+
+    :param str fixtures: (optional) The json list of places.
+    :param float latency: (optional) Seconds added to every response.
+    :param iterable missing: (optional) Address fields removed from every
+        response, e.g. ``['city']``, to exercise fallbacks.
+    :param int port: (optional) The port. Defaults to any free port.
+
+    Examples:
+
+    .. code:: python
+
+        >>> with FakeNominatim(latency=0.05, missing=['county']) as fake:
+        ...     gym.set_address('40.7505, -73.9934', email, fake.url)
+        >>> fake.requests
+        1
+    """
+
+    def __init__(
+            self,
+            fixtures: Optional[str] = FIXTURES,
+            latency: Optional[float] = 0.0,
+            missing: Optional[Iterable[str]] = (),
+            port: Optional[int] = 0
+            ) -> None:
+        with open(fixtures) as f:
+            self.places = json.load(f)
+        self.latency  = latency
+        self.missing  = set(missing)
+        self.requests = 0
+        self.queries  = list()   # (lat, lon) of every request.
+        self._lock    = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+
+    @property
+    def url(self) -> str:
+        """The base url to give :meth:`gym.GoldGym.set_address`."""
+        return 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+
+    def start(self) -> 'FakeNominatim':
+        # Poll often so tests stop the server quickly.
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+            )
+        self._thread.start()
+        return self
+
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+
+    def __enter__(self) -> 'FakeNominatim':
+        return self.start()
+
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+    def reverse(self, lat: float, lon: float) -> dict:
+        """
+        Find the closest place to a coordinate.
+
+        :returns: The Nominatim response body.
+        """
+
+        def distance(place):
+            return max(abs(float(place['lat']) - lat), abs(float(place['lon']) - lon))
+
+        place = min(self.places, key=distance, default=None)
+        if place is None or distance(place) > MAX_DISTANCE:
+            return {'error': 'Unable to geocode'}
+
+        body = dict(place, place_id=self.places.index(place) + 1)
+        body['address'] = {
+            k:v for k,v in place['address'].items() if k not in self.missing
+            }
+        return body
+
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        url = urlsplit(request.path)
+        if url.path.rstrip('/') != '/reverse':
+            request.send_error(404)
+            return
+
+        query = parse_qs(url.query)
+        try:
+            lat, lon = float(query['lat'][0]), float(query['lon'][0])
+        except (KeyError, ValueError):
+            request.send_error(400, 'Parameters lat and lon are required')
+            return
+
+        with self._lock:
+            self.requests += 1
+            self.queries.append((lat, lon))
+        if self.latency:
+            time.sleep(self.latency)
+
+        payload = json.dumps(self.reverse(lat, lon)).encode()
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='fake Nominatim reverse service')
+    p.add_argument('--port', type=int, default=8080)
+    p.add_argument('--latency', type=float, default=0.0,
+        help='seconds added to every response')
+    p.add_argument('--missing', nargs='*', default=[], metavar='FIELD',
+        help='address fields removed from every response')
+    p.add_argument('--fixtures', default=FIXTURES)
+    args = p.parse_args()
+
+    fake = FakeNominatim(args.fixtures, args.latency, args.missing, args.port)
+    print('Serving {} (Ctrl-C to stop).'.format(fake.url))
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n{} request(s) served.'.format(fake.requests))
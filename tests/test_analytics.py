@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from PokemonGo import analytics
+
+
+def synthetic_records(n: int, seed: int = 0) -> pd.DataFrame:
+    """Build `n` untyped records like `get_all_records` returns."""
+
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 400, n)
+    hours = rng.integers(0, 24, n)
+    minutes = rng.integers(0, 60, n)
+    states = np.array(['maine', 'new york', 'oregon', 'texas'])
+    state = states[rng.integers(0, len(states), n)]
+    county = np.char.add(state, rng.integers(0, 20, n).astype(str))
+    city = np.char.add(county, rng.integers(0, 30, n).astype(str))
+
+    records = pd.DataFrame({
+        'uid': np.arange(1, n + 1),
+        'title': np.char.add('gym', np.arange(n).astype(str)),
+        'model': 'i15',
+        'style': np.where(days < 100, 'gold', '100+ days'),
+        'victories': rng.integers(0, 2000, n),
+        'days': days,
+        'hours': hours,
+        'minutes': minutes,
+        'defended': (days + hours / 24 + minutes / 1440).round(4),
+        'treats': rng.integers(0, 5000, n),
+        'latlon': '40.7,-73.9',
+        'city': city,
+        'county': county,
+        'state': state,
+        })
+    # Sheet cells are mixed types; unscanned gyms have empty cells.
+    records = records.astype(object)
+    records.iloc[::50, records.columns.get_loc('uid')] = ''
+    return records
+
+
+class AnalyticsTests(unittest.TestCase):
+    """
+    Test the summaries of the gym database.
+    """
+
+    def setUp(self):
+        self.records = pd.DataFrame({
+            'uid': [1, 2, '', 3],
+            'title': ['verizon', 'starbucks', 'big ben', 'shaka'],
+            'style': ['gold', '100+ days', '', 'gold'],
+            'victories': [10, 20, '', 5],
+            'days': [95, 120, '', 40],
+            'defended': [95.5, 120.25, '', 40.0],
+            'treats': [1, 2, '', 3],
+            'city': ['portland', 'portland', '', 'austin'],
+            'county': ['cumberland', 'cumberland', '', 'travis'],
+            'state': ['maine', 'maine', '', 'texas'],
+            })
+        self.df = analytics.prepare(self.records)
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_prepare(self):
+        """
+        Verify records are typed once and unscanned gyms are dropped.
+        """
+
+        self.assertEqual(list(self.df['uid']), [1, 2, 3])
+        self.assertEqual(self.df['victories'].dtype, 'int64')
+        self.assertEqual(self.df['state'].dtype, 'category')
+
+        path = os.path.join(self.tmp, 'snapshot.csv')
+        self.records.to_csv(path, index=False)
+        df = analytics.load_snapshot(path)
+        self.assertIs(analytics.load_snapshot(path), df)
+        self.assertEqual(list(df['title']), ['verizon', 'starbucks', 'shaka'])
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_summaries(self):
+        """
+        Verify totals, distributions and gyms near 100+ days.
+        """
+
+        out = analytics.totals(self.df, 'state')
+        self.assertEqual(list(out.index), ['maine', 'texas'])
+        self.assertEqual(out.at['maine', 'victories'], 30)
+        self.assertEqual(out.at['maine', 'median_defended'], 107.875)
+
+        out = analytics.distribution(self.df, 'treats')
+        self.assertEqual(out['p50'], 2)
+        self.assertEqual(out['max'], 3)
+
+        out = analytics.near_long_term(self.df, within=5)
+        self.assertEqual(list(out['title']), ['verizon'])
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_growth(self):
+        """
+        Verify gyms are counted once, in the period of their first entry.
+        """
+
+        path = os.path.join(self.tmp, 'pogo.log')
+        with open(path, 'w') as f:
+            f.write('2024-01-03 10:00:00   ID: 0001\n')
+            f.write('2024-01-09 10:00:00   ID: 0002   Errors: CITY\n')
+            f.write('not an entry\n')
+            f.write('2024-03-01 10:00:00   ID: 0001\n')
+            f.write('2024-03-02 10:00:00   ID: 0003\n')
+
+        out = analytics.growth(analytics.read_log(path), 'M')
+        self.assertEqual(list(out['new']), [2, 0, 1])
+        self.assertEqual(list(out['total']), [2, 2, 3])
+
+    #==========================================================================
+
+    @pytest.mark.order(4)
+    def test_full_report(self):
+        """
+        Verify a full report over 100k gyms. See `tests/bench_analytics.py` 
+        for its timing.
+        """
+
+        records = synthetic_records(100_000)
+
+        df = analytics.prepare(records)
+        for by in ('state', ['state', 'county'], ['state', 'county', 'city']):
+            analytics.totals(df, by)
+        for col in ('victories', 'treats', 'defended'):
+            analytics.distribution(df, col)
+        near = analytics.near_long_term(df)
+
+        self.assertEqual(len(df), 98_000)
+        self.assertTrue((near['defended'] >= 90).all())
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
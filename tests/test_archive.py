@@ -0,0 +1,175 @@
+import os
+import errno
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import pytest
+
+from PokemonGo.image import BadgeImage
+from PokemonGo.dedupe import HashIndex
+from PokemonGo.archive import BadgeArchive, file_hash, move_file
+
+
+class ArchiveTests(unittest.TestCase):
+    """
+    Test the process of storing badges by content.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.badges = os.path.join(self.tmp, 'badges')
+        self.downloads = os.path.join(self.tmp, 'Downloads')
+        os.makedirs(self.badges)
+        os.makedirs(self.downloads)
+        for name in ('IMG_0001.PNG', 'IMG_0002.PNG'):
+            shutil.copy(os.path.join('tests/images', name), self.downloads)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def download(self, name: str) -> str:
+        return os.path.join(self.downloads, name)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_store(self):
+        """
+        Verify badges are stored once by content and indexed by uid.
+        """
+
+        archive = BadgeArchive(self.badges)
+        sha = file_hash(self.download('IMG_0001.PNG'))
+        path = archive.store(self.download('IMG_0001.PNG'), 7)
+
+        self.assertEqual(os.path.basename(path), sha + '.png')
+        self.assertFalse(os.path.exists(self.download('IMG_0001.PNG')))
+        self.assertEqual(archive.shape(7), (1334, 750))
+        self.assertIsNone(archive.crop_path(7, 'activity'))
+
+        # A second copy of the same screenshot is not kept.
+        shutil.copy('tests/images/IMG_0001.PNG', self.download('copy.PNG'))
+        self.assertEqual(archive.store(self.download('copy.PNG'), 8), path)
+        self.assertFalse(os.path.exists(self.download('copy.PNG')))
+
+        reloaded = BadgeArchive(self.badges)
+        self.assertEqual(reloaded.uids(), [7, 8])
+        self.assertEqual(reloaded.path(8), path)
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_crops(self):
+        """
+        Verify region crops are kept losslessly and read on their own.
+        """
+
+        archive = BadgeArchive(self.badges, crops=True)
+        img = BadgeImage(self.download('IMG_0002.PNG'))
+        img.set_activity_crop()
+        archive.store(self.download('IMG_0002.PNG'), 3, img)
+
+        cropPath = archive.crop_path(3, 'activity')
+        crop = BadgeImage.from_crop(cropPath, 'activity', archive.shape(3))
+        self.assertEqual(crop.params.model, 'i11')
+        self.assertTrue((crop.activityCrop == img.activityCrop).all())
+        self.assertLess(os.path.getsize(cropPath), os.path.getsize(archive.path(3)))
+        self.assertRaises(
+            ValueError, BadgeImage.from_crop, cropPath, 'all', (1792, 828)
+            )
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_cross_device(self):
+        """
+        Verify moves across filesystems copy then rename into place.
+        """
+
+        src = self.download('IMG_0001.PNG')
+        dest = os.path.join(self.badges, 'moved.png')
+        sha = file_hash(src)
+
+        realReplace = os.replace
+        def replace(a, b):
+            if a == src:
+                raise OSError(errno.EXDEV, 'Invalid cross-device link')
+            realReplace(a, b)
+
+        with unittest.mock.patch('os.replace', side_effect=replace):
+            move_file(src, dest)
+
+        self.assertFalse(os.path.exists(src))
+        self.assertEqual(file_hash(dest), sha)
+        self.assertEqual(os.listdir(self.badges), ['moved.png'])
+
+    #==========================================================================
+
+    @pytest.mark.order(4)
+    def test_import_legacy(self):
+        """
+        Verify `IMG_####.PNG` files are adopted and found by the hash index.
+        """
+
+        shutil.copy('tests/images/IMG_0001.PNG', self.badges)
+        archive = BadgeArchive(self.badges)
+        self.assertEqual(archive.import_legacy(), 1)
+        self.assertEqual(archive.uids(), [1])
+        self.assertNotIn('IMG_0001.PNG', os.listdir(self.badges))
+
+        index = HashIndex(self.badges, archive)
+        index.refresh()
+        self.assertEqual(list(index.hashes), ['IMG_0001.PNG'])
+
+    #==========================================================================
+
+    @pytest.mark.order(5)
+    def test_store_image(self):
+        """
+        Verify badges held only in memory are stored losslessly.
+        """
+
+        archive = BadgeArchive(self.badges, crops=True)
+        frame = BadgeImage(self.download('IMG_0002.PNG')).image
+        img = BadgeImage('rec_000120.PNG', image=frame)
+
+        path = archive.store_image(img, 5)
+        self.assertEqual(os.path.basename(path), file_hash(path) + '.png')
+        self.assertTrue((BadgeImage(path).image == frame).all())
+        self.assertEqual(archive.shape(5), (1792, 828))
+        self.assertIsNotNone(archive.crop_path(5, 'title'))
+        # The same frame seen again is not kept twice.
+        self.assertEqual(archive.store_image(img, 6), path)
+
+    #==========================================================================
+
+    @pytest.mark.order(6)
+    def test_update(self):
+        """
+        Verify a replaced badge is deleted once no uid refers to it and 
+        stored content is not cropped again.
+        """
+
+        archive = BadgeArchive(self.badges, crops=True)
+        first = archive.store(self.download('IMG_0001.PNG'), 1)
+        shutil.copy('tests/images/IMG_0001.PNG', self.download('copy.PNG'))
+        archive.store(self.download('copy.PNG'), 2)
+
+        # Uid 2 still refers to the first image.
+        archive.store(self.download('IMG_0002.PNG'), 1)
+        self.assertTrue(os.path.isfile(first))
+
+        shutil.copy('tests/images/IMG_0002.PNG', self.download('copy.PNG'))
+        with unittest.mock.patch('cv2.imwrite') as imwrite:
+            archive.store(self.download('copy.PNG'), 2)
+        imwrite.assert_not_called()
+        self.assertFalse(os.path.isfile(first))
+        self.assertEqual(len(os.listdir(os.path.dirname(first))), 0)
+        self.assertEqual(archive.path(1), archive.path(2))
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
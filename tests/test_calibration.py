@@ -0,0 +1,80 @@
+import unittest
+import unittest.mock
+
+import numpy as np
+import pytest
+
+from PokemonGo.calibration import read_lines, find_bands
+from PokemonGo.exceptions import CalibrationError
+
+
+def tesseract_data(words: list) -> dict:
+    """Build `image_to_data` output from (text, line, top, height) rows."""
+
+    return {
+        'text': [w for w,*_ in words], 
+        'conf': [90] * len(words), 
+        'block_num': [1] * len(words), 
+        'par_num': [1] * len(words), 
+        'line_num': [x[1] for x in words], 
+        'top': [x[2] for x in words], 
+        'height': [x[3] for x in words], 
+        }
+
+
+class CalibrationTest(unittest.TestCase):
+    """
+    Test locating badge regions in a sample screenshot.
+    """
+
+    def setUp(self):
+        self.words = [
+            ('verizon', 1, 10, 20), ('17:57', 1, 8, 22), ('59%', 1, 10, 20), 
+            ('starbucks', 2, 90, 30), 
+            ('total', 3, 800, 16), ('gym', 3, 800, 16), 
+            ('victories', 4, 1000, 20), ('treats', 4, 1002, 18), 
+            ('448', 5, 1040, 26), ('23d', 5, 1040, 26), ('121', 5, 1041, 26), 
+            ]
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_find_bands(self):
+        """
+        Verify bands are padded by one line height around their text.
+        """
+
+        image = np.full((1334, 750, 3), 255, dtype=np.uint8)
+        with unittest.mock.patch(
+                'pytesseract.image_to_data', 
+                return_value=tesseract_data(self.words)
+                ):
+            lines = read_lines(image)
+
+        self.assertEqual(lines[0], (8, 30, ['verizon', '17:57', '59%']))
+        title, activity = find_bands(lines, 1334)
+        self.assertEqual(title, (60, 150))
+        self.assertEqual(activity, (980, 1087))
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_missing_regions(self):
+        """
+        Verify samples without labels or title are rejected.
+        """
+
+        lines = [(8, 30, ['17:57']), (1000, 1020, ['victories'])]
+        with self.assertRaises(CalibrationError) as cm:
+            find_bands(lines, 1334, 'x.PNG')
+        self.assertEqual(cm.exception.region, 'activity')
+
+        lines.append((1040, 1066, ['448']))
+        with self.assertRaises(CalibrationError) as cm:
+            find_bands(lines, 1334, 'x.PNG')
+        self.assertEqual(cm.exception.region, 'title')
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pyarrow as pa
+import pytest
+
+from PokemonGo import dataset, analytics
+from PokemonGo.sheet import GymSheet
+
+
+class DatasetTests(unittest.TestCase):
+    """
+    Test the process of keeping the database in a local columnar file.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        csvPath = os.path.join(self.tmp, 'snapshot.csv')
+        with open(csvPath, 'w') as f:
+            f.write('uid,title,model,style,victories,defended,latlon,city\n')
+            f.write('1,verizon,i15,gold,10,3.1701,"40.7,-73.9",portland\n')
+            f.write(',starbucks,,,,,"40.8,-73.9",\n')
+            f.write('2,big ben,iSE,100+ days,4,120.5,"51.5,-0.1",london\n')
+        self.gs = GymSheet.from_snapshot(csvPath)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_round_trip(self):
+        """
+        Verify records survive a dataset file in both formats.
+        """
+
+        for name in ('gyms.arrow', 'gyms.parquet'):
+            path = os.path.join(self.tmp, name)
+            self.gs.save_dataset(path)
+            again = GymSheet.from_snapshot(path)
+            self.assertTrue(again.processed.equals(self.gs.processed))
+            self.assertTrue(again.unprocessed.equals(self.gs.unprocessed))
+
+        self.assertRaises(
+            ValueError, self.gs.save_dataset, os.path.join(self.tmp, 'x.csv')
+            )
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_schema(self):
+        """
+        Verify columns are typed and can be loaded on their own.
+        """
+
+        path = os.path.join(self.tmp, 'gyms.arrow')
+        self.gs.save_dataset(path)
+
+        table = dataset.read(path)
+        self.assertEqual(table.schema.field('uid').type, pa.int64())
+        self.assertEqual(table.schema.field('defended').type, pa.float64())
+        self.assertTrue(pa.types.is_dictionary(table.schema.field('style').type))
+        self.assertEqual(table.column('uid').null_count, 1)
+
+        table = dataset.read(path, columns=['uid', 'victories'])
+        self.assertEqual(table.column_names, ['uid', 'victories'])
+
+        df = analytics.load_snapshot(path, columns=['uid', 'victories', 'city'])
+        self.assertEqual(list(df['victories']), [10, 4])
+        self.assertEqual(df['city'].dtype, 'category')
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from PokemonGo.image import BadgeImage
+from PokemonGo.dedupe import HashIndex, badge_hash, distance, DUPLICATE_MAX
+
+
+class DedupeTests(unittest.TestCase):
+    """
+    Test the process of detecting previously stored badges.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        shutil.copy(
+            'tests/images/IMG_0001.PNG', os.path.join(self.tmp, 'IMG_0001.PNG')
+            )
+        self.img01 = BadgeImage('tests/images/IMG_0001.PNG')
+        self.img02 = BadgeImage('tests/images/IMG_0002.PNG')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_badge_hash(self):
+        """
+        Verify identical badges hash equally and different badges do not.
+        """
+
+        again = BadgeImage('tests/images/IMG_0001.PNG')
+        self.assertEqual(badge_hash(self.img01), badge_hash(again))
+        self.assertGreater(
+            distance(badge_hash(self.img01), badge_hash(self.img02)), 
+            DUPLICATE_MAX
+            )
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_index(self):
+        """
+        Verify the index finds stored and reserved badges and persists.
+        """
+
+        index = HashIndex(self.tmp)
+        self.assertEqual(index.nearest(badge_hash(self.img01)), ('', -1))
+
+        index.refresh()
+        self.assertEqual(
+            index.nearest(badge_hash(self.img01)), ('IMG_0001.PNG', 0)
+            )
+
+        # A badge being scanned is found by later copies.
+        value = badge_hash(self.img02)
+        index.reserve('Downloads/IMG_0002.PNG', value)
+        self.assertEqual(index.nearest(value)[1], 0)
+
+        # Once stored, the hash is saved under its new name.
+        index.add('Downloads/IMG_0002.PNG', 'IMG_0002.PNG')
+        reloaded = HashIndex(self.tmp)
+        self.assertEqual(reloaded.nearest(value), ('IMG_0002.PNG', 0))
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
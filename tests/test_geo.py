@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from PokemonGo.geo import hilbert_keys, sort_records
+
+
+class GeoTests(unittest.TestCase):
+    """
+    Test the geographic ordering of gym records.
+    """
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'title': ['empire state', 'sydney opera house', 'chrysler',
+                'missing', 'harbour bridge'],
+            'latlon': ['40.748440,-73.985664', '-33.856784,151.215297',
+                '40.751621,-73.975502', '', '-33.852307,151.210787'],
+            'city': ['new york', 'sydney', 'new york', '', 'sydney'],
+            'county': ['new york', 'sydney', 'new york', '', 'sydney'],
+            'state': ['new york', 'nsw', 'new york', '', 'nsw'],
+            })
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_hilbert_keys(self):
+        """
+        Verify keys are computed for every row and invalid coordinates
+        receive the largest key.
+        """
+
+        keys = hilbert_keys(self.df['latlon'])
+        self.assertEqual(keys.dtype, np.int64)
+        self.assertEqual(len(keys), 5)
+        self.assertEqual(keys[3], np.iinfo(np.int64).max)
+        # Distinct locations map to distinct cells.
+        self.assertEqual(len(set(keys)), 5)
+
+    @pytest.mark.order(2)
+    def test_hilbert_locality(self):
+        """
+        Verify nearby gyms are adjacent once sorted.
+        """
+
+        ordered = sort_records(self.df, order='hilbert')
+        titles = list(ordered['title'])
+        self.assertEqual(titles[-1], 'missing')
+        pos = {t:i for i,t in enumerate(titles)}
+        self.assertEqual(abs(pos['empire state'] - pos['chrysler']), 1)
+        self.assertEqual(
+            abs(pos['sydney opera house'] - pos['harbour bridge']), 1
+            )
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_invalid_order(self):
+        """
+        Verify unknown ordering modes raise error.
+        """
+
+        self.assertRaises(ValueError, sort_records, self.df, 'random')
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
+import time
+import threading
 import unittest
 import unittest.mock
 
 import pytest
 
-from PokemonGo.gym import GoldGym
+from PokemonGo import gym
+from PokemonGo.gym import GoldGym, GymBatch, FIELDS, RateLimiter
 from geopy.exc import ConfigurationError
 
+from tests.nominatim import FakeNominatim
+
 
 class GymTest(unittest.TestCase):
     """
@@ -26,6 +31,11 @@ class GymTest(unittest.TestCase):
         self.msgLatLon = '40.75067515347, -73.99339578809'
         self.email = 'lindamcmahon4u@gmail.com'   # Valid email.
 
+        # Answers like Nominatim without the network.
+        self.nominatim = FakeNominatim().start()
+        self.addCleanup(self.nominatim.stop)
+        self.url = self.nominatim.url
+
     #==========================================================================
 
     @pytest.mark.order(1)
@@ -108,7 +118,8 @@ class GymTest(unittest.TestCase):
             ValueError, 
             self.testGym.set_address, 
             latlon = 'a', 
-            email = self.email
+            email = self.email, 
+            endpoint = self.url
         )
 
         # Latlon format is correct but invalid coordinate values.    
@@ -116,12 +127,14 @@ class GymTest(unittest.TestCase):
             AttributeError, 
             self.testGym.set_address, 
             latlon = '3,4', 
-            email = self.email
+            email = self.email, 
+            endpoint = self.url
         )
 
         # Valid parameter values.
-        self.MSG.set_address(self.msgLatLon, self.email)
+        self.MSG.set_address(self.msgLatLon, self.email, self.url)
         self.assertGreater(len(self.MSG.address), 0)
+        self.assertEqual(self.nominatim.requests, 2)
     
     #==========================================================================
 
@@ -137,14 +150,21 @@ class GymTest(unittest.TestCase):
         self.assertRaises(AttributeError, self.testGym.set_city)
 
         # This is normal behavior.
-        self.MSG.set_address(self.msgLatLon, self.email)
+        self.MSG.set_address(self.msgLatLon, self.email, self.url)
         self.MSG.set_city()
         self.assertEqual(self.MSG.city, 'city of new york')
 
+        # Villages and towns are accepted too.
+        self.testGym.set_address('44.2795, -73.9799', self.email, self.url)
+        self.testGym.set_city()
+        self.assertIn(self.testGym.city, ('lake placid', 'town of north elba'))
+
         # Use remote location in High Peaks Wilderness (upstate NY).
+        self.testGym = GoldGym()
         self.testGym.set_address(
             '44.109394, -74.317468',
-            self.email
+            self.email, 
+            self.url
             )
         # Mock up user response.
         unittest.mock.builtins.input = lambda _: "some town"
@@ -152,6 +172,220 @@ class GymTest(unittest.TestCase):
         self.assertEqual(self.testGym.city, 'some town')
         self.assertEqual(self.testGym.errors[0], 'CITY')
 
+    #==========================================================================
+
+    @pytest.mark.order(7)
+    def test_set_county_and_state(self):
+        """
+        Verify county and state are normalized, and missing fields 
+        prompt the user and add to `errors`.
+        """
+
+        self.MSG.set_address(self.msgLatLon, self.email, self.url)
+        self.MSG.set_county()
+        self.MSG.set_state()
+        self.assertEqual(self.MSG.county, 'new york')
+        self.assertEqual(self.MSG.state, 'new york')
+        self.assertEqual(self.MSG.errors, [])
+
+        # Washington DC has no county.
+        unittest.mock.builtins.input = lambda _: "district of columbia"
+        self.testGym.set_address('38.8977, -77.0365', self.email, self.url)
+        self.testGym.set_county()
+        self.testGym.set_state()
+        self.assertEqual(self.testGym.county, 'district of columbia')
+        self.assertEqual(self.testGym.errors, ['COUNTY'])
+
+        # Every field missing from the response.
+        with FakeNominatim(missing=['county', 'state']) as fake:
+            gym = GoldGym()
+            gym.set_address(self.msgLatLon, self.email, fake.url)
+            unittest.mock.builtins.input = lambda _: "somewhere"
+            gym.set_county()
+            gym.set_state()
+        self.assertEqual(gym.errors, ['COUNTY', 'STATE'])
+        self.assertEqual((gym.county, gym.state), ('somewhere', 'somewhere'))
+
+#==========================================================================
+
+class EnrichTest(unittest.TestCase):
+    """
+    Test geocoding many gyms against a slow local service.
+    """
+
+    @pytest.mark.order(1)
+    def test_enrich_many(self):
+        """
+        Verify repeated coordinates are answered from the cache and the 
+        endpoint is read from the environment.
+        """
+
+        coords = ['40.7505, -73.9934', '44.2795, -73.9799']
+        with FakeNominatim(latency=0.02) as fake, \
+                unittest.mock.patch.dict('os.environ', NOMINATIM_URL=fake.url):
+            for i in range(300):
+                gym = GoldGym()
+                gym.set_address(coords[i % 2], 'bench@mail.com')
+                gym.set_city()
+                gym.set_county()
+                gym.set_state()
+
+        self.assertEqual(fake.requests, 2)
+
+#==========================================================================
+
+class BatchTest(unittest.TestCase):
+    """
+    Test the behavior of GymBatch columns and GoldGym views.
+    """
+
+    def setUp(self):
+        self.records = [
+            {'title': 'starbucks', 'victories': 8, 'days': 21, 
+             'hours': 19, 'minutes': 0, 'treats': 13},
+            {'title': 'big ben', 'victories': 3, 'days': 104, 
+             'hours': 2, 'minutes': 30, 'treats': 7},
+            ]
+        self.batch = GymBatch.from_records(self.records)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_derived_fields(self):
+        """
+        Verify vectorized fields equal the values of single gyms, 
+        including ties where `round` depends on the float sum.
+        """
+
+        records = [
+            {'days': d, 'hours': h, 'minutes': m}
+            for d in (0, 1, 99, 100, 731) for h in range(24) for m in range(60)
+            ]
+        batch = GymBatch.from_records(records)
+        batch.set_time_defended()
+        batch.set_style()
+
+        for i, r in enumerate(records):
+            totalDays = r['days'] + r['hours'] / 24 + r['minutes'] / 1440
+            self.assertEqual(batch[i].defended, round(totalDays, 4))
+            style = 'gold' if r['days'] < 100 else '100+ days'
+            self.assertEqual(batch[i].style, style)
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_views(self):
+        """
+        Verify gyms are views onto the batch and keep the type check.
+        """
+
+        gym = self.batch[1]
+        gym.treats = 8
+        self.assertEqual(self.batch.column('treats').tolist(), [13, 8])
+        self.assertIsInstance(gym.treats, int)
+        with self.assertRaises(TypeError):
+            gym.days = 1.5
+        with self.assertRaises(AttributeError):
+            gym.nickname = 'ben'
+
+        index = self.batch.append(title='shaka', days=3)
+        self.assertEqual(len(self.batch), 3)
+        self.assertEqual(self.batch[index].title, 'shaka')
+        self.assertEqual(gym.treats, 8)
+
+        # Errors are kept with the gym, not the view.
+        self.batch[1].errors.append('CITY')
+        self.assertEqual(gym.errors, ['CITY'])
+        self.assertEqual(self.batch[0].errors, [])
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_rows(self):
+        """
+        Verify rows follow the spreadsheet column order and omit 
+        location fields until set.
+        """
+
+        self.batch.set_time_defended()
+        self.batch.set_style()
+        self.batch[0].city = 'portland'
+
+        rows = self.batch.to_rows()
+        self.assertEqual(list(rows[1]), list(FIELDS[:8]))
+        self.assertEqual(rows[0]['city'], 'portland')
+        self.assertEqual(rows[1], self.batch[1].to_dict())
+        self.assertEqual(rows[1]['defended'], 104.1042)
+
+        df = self.batch.to_frame()
+        self.assertEqual(list(df.columns), list(FIELDS))
+        self.assertEqual(df['days'].dtype, 'int64')
+
+#==========================================================================
+
+class GeocodeTest(unittest.TestCase):
+    """
+    Test the geocode cache and rate limiter shared by all gyms.
+    """
+
+    def setUp(self):
+        self.calls = list()
+
+        def reverse(coordinates):
+            self.calls.append((coordinates, time.monotonic()))
+            return unittest.mock.Mock(raw={'address': {'county': 'kings'}})
+
+        geolocator = unittest.mock.Mock(reverse=reverse)
+        patches = [
+            unittest.mock.patch.object(
+                gym, 'get_geolocator', return_value=geolocator
+                ), 
+            unittest.mock.patch.object(gym, '_geocodes', dict()), 
+            unittest.mock.patch.object(gym, '_limiter', RateLimiter(0.05)), 
+            ]
+        for x in patches:
+            x.start()
+            self.addCleanup(x.stop)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_cache(self):
+        """
+        Verify each coordinate is geocoded once, whichever gym asks.
+        """
+
+        first, second = GoldGym(), GoldGym()
+        first.set_address('40.1, -73.9', 'a@mail.com')
+        second.set_address('40.1,-73.9', 'b@mail.com')
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(second.address, {'county': 'kings'})
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_rate_limit(self):
+        """
+        Verify requests from several threads are spaced apart.
+        """
+
+        threads = [
+            threading.Thread(
+                target=gym.reverse_geocode, args=('40.{}, -73.9'.format(i), 'x')
+                )
+            for i in range(4)
+            ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        times = sorted(t for _,t in self.calls)
+        self.assertEqual(len(times), 4)
+        gaps = [b - a for a,b in zip(times, times[1:])]
+        self.assertGreaterEqual(min(gaps), 0.045)
+
 #==========================================================================
 
 if __name__ == '__main__':
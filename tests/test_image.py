@@ -3,7 +3,7 @@ import unittest.mock
 
 import pytest
 
-from PokemonGo.image import BadgeImage
+from PokemonGo.image import BadgeImage, split_cells, parse_cells
 from PokemonGo.utils import are_similar
 from PokemonGo.exceptions import UnsupportedPhoneModel, InputError
 
@@ -47,6 +47,16 @@ class ImageTests(unittest.TestCase):
         path = 'tests/images/SHAKA.PNG'
         self.assertRaises(UnsupportedPhoneModel, BadgeImage, path)
 
+        # Images already in memory are not read again.
+        with open('tests/images/IMG_0002.PNG', 'rb') as f:
+            data = f.read()
+        img = BadgeImage('upload.PNG', image=data)
+        self.assertEqual(img.params.model, 'i11')
+        self.assertTrue((img.image == self.img02.image).all())
+        img = BadgeImage('upload.PNG', image=self.img03.image)
+        self.assertEqual(img.params.model, 'i15')
+        self.assertRaises(ValueError, BadgeImage, 'x.PNG', image=b'text')
+
     #==========================================================================
 
     @pytest.mark.order(3)
@@ -128,6 +138,57 @@ class ImageTests(unittest.TestCase):
             InputError, self.img02.get_activity_vals, activityTxt
             )
 
+    #==========================================================================
+
+    @pytest.mark.order(7)
+    def test_activity_cells(self):
+        """
+        Verify the activity band is split into one cell per stat value 
+        and cell texts are converted without free text parsing.
+        """
+
+        for img in (self.img01, self.img02, self.img03):
+            img.set_activity_crop()
+            width = img.activityCrop.shape[1]
+            cells = split_cells(img.activityCrop)
+            self.assertEqual(len(cells), 3)
+            # Left to right, one per third of the band, values only.
+            for i, (top, bottom, left, right) in enumerate(cells):
+                self.assertTrue(i * width / 3 <= left < right <= (i+1) * width / 3)
+                self.assertTrue(top > img.activityCrop.shape[0] / 4)
+
+        answer = {
+            'victories':448, 'days':23, 'hours':6, 'minutes':16, 'treats':121
+            }
+        texts = {'victories': '448', 'defended': '23d 6h 16m', 'treats': '121'}
+        self.assertEqual(parse_cells(texts), answer)
+        self.assertEqual(
+            parse_cells(texts | {'defended': '19h'}), 
+            answer | {'days': 0, 'hours': 19, 'minutes': 0}
+            )
+        # Empty or misread cells are rejected.
+        self.assertIsNone(parse_cells(texts | {'victories': ''}))
+        self.assertIsNone(parse_cells(texts | {'defended': 'd6h'}))
+
+    #==========================================================================
+
+    @pytest.mark.order(8)
+    def test_activity_cells_read(self):
+        """
+        Verify stats are read from the stat cells with exact match.
+        """
+
+        self.img01.set_activity_crop()
+        self.assertEqual(
+            self.img01.read_cells().text, '448\n23d 6h 16m\n121'
+            )
+
+        self.img03.set_activity_crop()
+        self.assertEqual(
+            self.img03.read_stats(), 
+            {'victories':8, 'days':21, 'hours':19, 'minutes':0, 'treats':13}
+            )
+
 #==========================================================================
 
 if __name__ == '__main__':
@@ -0,0 +1,91 @@
+import sys
+import subprocess
+import unittest
+
+import pytest
+
+
+HEAVY = ['cv2', 'numpy', 'pandas', 'gspread', 'geopy', 'pytesseract']
+
+
+def loaded_modules(code: str) -> set:
+    """Run `code` in a fresh interpreter and list heavy modules loaded."""
+
+    check = code + '\nimport sys\nprint(*[m for m in {} if m in sys.modules])'
+    out = subprocess.run(
+        [sys.executable, '-c', check.format(HEAVY)],
+        capture_output=True, text=True, check=True
+        )
+    return set(out.stdout.split())
+
+
+class ImportTests(unittest.TestCase):
+    """
+    Test heavy dependencies are only loaded when needed. Startup time 
+    itself is measured by `tests/bench_imports.py`.
+    """
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_package(self):
+        """
+        Verify importing the package loads no heavy dependency.
+        """
+
+        self.assertEqual(loaded_modules('import PokemonGo'), set())
+
+    @pytest.mark.order(2)
+    def test_light_modules(self):
+        """
+        Verify the helpers used before any image is read stay light.
+        """
+
+        code = '\n'.join([
+            'import PokemonGo.utils',
+            'import PokemonGo.ingest',
+            'import PokemonGo.pipeline',
+            'import PokemonGo.journal',
+            'import PokemonGo.watch',
+            ])
+        self.assertEqual(loaded_modules(code), set())
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_scanner_help(self):
+        """
+        Verify `scanner.py -h` exits without importing heavy dependencies.
+        """
+
+        out = subprocess.run(
+            [sys.executable, '-X', 'importtime', 'scanner.py', '-h'],
+            capture_output=True, text=True
+            )
+        self.assertEqual(out.returncode, 0)
+        imported = {line.split('|')[-1].strip() for line in out.stderr.splitlines()}
+        self.assertFalse(imported & set(HEAVY))
+
+    #==========================================================================
+
+    @pytest.mark.order(4)
+    def test_lazy_attribute(self):
+        """
+        Verify package classes resolve on first access, loading only 
+        their own dependencies.
+        """
+
+        self.assertEqual(
+            loaded_modules('from PokemonGo import GoldGym'), {'geopy', 'numpy'}
+            )
+        import PokemonGo
+        from PokemonGo.gym import GoldGym
+        self.assertIs(PokemonGo.GoldGym, GoldGym)
+        self.assertIn('GymSheet', dir(PokemonGo))
+        with self.assertRaises(AttributeError):
+            PokemonGo.Missing
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
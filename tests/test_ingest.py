@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from PokemonGo.phones import SUPPORTED_DIMENSIONS
+from PokemonGo.ingest import ImageQueue, read_png_size, interleave
+
+
+class IngestTests(unittest.TestCase):
+    """
+    Test the process of finding images to scan.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        files = [
+            ('IMG_0003.PNG', 'first.PNG'),
+            ('IMG_0001.PNG', 'second.png'),
+            ('SHAKA.PNG', 'shaka.PNG'),
+            ('IMG_0002.PNG', 'notes.txt'),
+            ]
+        for i, (src, dst) in enumerate(files):
+            path = os.path.join(self.tmp, dst)
+            shutil.copy(os.path.join('tests/images', src), path)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # Not an image despite its name.
+        fake = os.path.join(self.tmp, 'fake.PNG')
+        open(fake, 'w').write('hello')
+        os.utime(fake, (999, 999))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_png_size(self):
+        """
+        Verify dimensions are read from the PNG header only.
+        """
+
+        path = 'tests/images/IMG_0001.PNG'
+        self.assertEqual(read_png_size(path), (1334, 750))
+        self.assertIsNone(read_png_size(os.path.join(self.tmp, 'fake.PNG')))
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_queue_order_and_filter(self):
+        """
+        Verify supported images are yielded oldest first and others
+        are skipped.
+        """
+
+        queue = ImageQueue([self.tmp], dimensions=SUPPORTED_DIMENSIONS)
+        self.assertEqual(len(queue), 4)   # Candidates by name only.
+
+        names = [os.path.basename(x) for x in queue]
+        self.assertEqual(names, ['first.PNG', 'second.png'])
+
+    @pytest.mark.order(3)
+    def test_queue_patterns(self):
+        """
+        Verify file name patterns are configurable and case-sensitive.
+        """
+
+        queue = ImageQueue([self.tmp], patterns=['*.PNG'])
+        names = [os.path.basename(x) for x in queue]
+        self.assertEqual(names, ['first.PNG', 'shaka.PNG'])
+
+    @pytest.mark.order(4)
+    def test_interleave(self):
+        """
+        Verify queues of several players are merged round robin.
+        """
+
+        merged = interleave([['a1', 'a2', 'a3', 'a4'], [], ['b1', 'b2']])
+        self.assertEqual(list(merged), ['a1', 'b1', 'a2', 'b2', 'a3', 'a4'])
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
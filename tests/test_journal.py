@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from PokemonGo.journal import RunJournal
+
+
+class JournalTests(unittest.TestCase):
+    """
+    Test the process of recording and replaying scan progress.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'journal.jsonl')
+        self.journal = RunJournal(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_replay(self):
+        """
+        Verify a resumed journal returns all recorded stages per image.
+        """
+
+        self.journal.record('a.PNG', 'extracted', titleTxt='starbucks')
+        self.journal.record('a.PNG', 'assigned', uid=12)
+        self.journal.record('b.PNG', 'assigned', uid=13)
+
+        progress = RunJournal(self.path, resume=True).progress()
+        self.assertEqual(set(progress), {'a.PNG', 'b.PNG'})
+        self.assertEqual(progress['a.PNG']['extracted']['titleTxt'], 'starbucks')
+        self.assertEqual(self.journal.max_uid(), 13)
+
+        # A reset image starts over.
+        self.journal.reset('b.PNG')
+        self.assertEqual(list(self.journal.progress()), ['a.PNG'])
+        self.assertEqual(self.journal.max_uid(), 12)
+
+    @pytest.mark.order(2)
+    def test_partial_line(self):
+        """
+        Verify a line cut short by a crash is ignored.
+        """
+
+        self.journal.record('a.PNG', 'assigned', uid=12)
+        with open(self.path, 'a') as f:
+            f.write('{"path": "b.PNG", "sta')
+
+        journal = RunJournal(self.path, resume=True)
+        self.assertEqual(list(journal.progress()), ['a.PNG'])
+
+        # Records after the crash are kept.
+        journal.record('c.PNG', 'assigned', uid=13)
+        self.assertEqual(list(journal.progress()), ['a.PNG', 'c.PNG'])
+        self.assertEqual(journal.max_uid(), 13)
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_new_run(self):
+        """
+        Verify a new run starts from an empty journal and unknown stages
+        raise error.
+        """
+
+        self.journal.record('a.PNG', 'moved', uid=12)
+        self.assertEqual(RunJournal(self.path).progress(), {})
+        self.assertEqual(self.journal.max_uid(), 0)
+
+        self.assertRaises(
+            ValueError, self.journal.record, 'a.PNG', 'sorted'
+            )
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import unittest
+import unittest.mock
+
+import pytest
+
+from PokemonGo.image import BadgeImage, TITLE_VARIANTS, UPSCALE
+from PokemonGo.ocr import OcrResult, Escalation, vote, rank
+
+
+def tesseract_data(words: list, boxes: list = None) -> dict:
+    """
+    Build `image_to_data` output from (word, conf, line) tuples and, 
+    optionally, their (left, top, width, height) boxes.
+    """
+
+    data = {k: [] for k in ('text', 'conf', 'block_num', 'par_num', 'line_num')}
+    for word, conf, line in words:
+        data['text'].append(word)
+        data['conf'].append(conf)
+        data['block_num'].append(1)
+        data['par_num'].append(1)
+        data['line_num'].append(line)
+    if boxes is not None:
+        for i, k in enumerate(('left', 'top', 'width', 'height')):
+            data[k] = [box[i] for box in boxes]
+    return data
+
+
+class OcrTests(unittest.TestCase):
+    """
+    Test the process of scoring and escalating text reads.
+    """
+
+    def setUp(self):
+        self.img01 = BadgeImage('tests/images/IMG_0001.PNG')
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_from_data(self):
+        """
+        Verify tesseract data is grouped by line and layout rows dropped.
+        """
+
+        data = tesseract_data([
+            ('', -1, 0), ('The', 95.1, 1), ('Church', 91, 1), 
+            (' ', 95, 1), ('Of', '42.7', 2)
+            ])
+        res = OcrResult.from_data(data, str.lower)
+        self.assertEqual(res.text, 'the church\nof')
+        self.assertEqual(res.confidence, 42.7)
+        self.assertEqual(res.uncertain(), ['of'])
+        self.assertFalse(res.is_confident())
+        self.assertTrue(res.is_confident(40))
+
+        self.assertEqual(OcrResult().confidence, 0)
+        self.assertFalse(OcrResult().is_confident(0))
+        self.assertEqual(str(OcrResult.from_text('8\n21d 19h\n\n13')), '8\n21d 19h\n13')
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_escalation(self):
+        """
+        Verify reads stop at the first confident result and the most 
+        confident read is kept otherwise.
+        """
+
+        calls = []
+        def step(text, conf):
+            def read():
+                calls.append(text)
+                return OcrResult.from_text(text, conf)
+            return read
+
+        esc = Escalation([step('starbucks', 96), step('unused', 99)])
+        self.assertEqual(esc.best().text, 'starbucks')
+        self.assertEqual(calls, ['starbucks'])
+
+        calls.clear()
+        esc = Escalation([step('5tar', 30), step('starb', 60), step('sta', 50)])
+        self.assertEqual(esc.best().text, 'starb')
+        self.assertEqual(len(esc), 3)
+        self.assertIsNone(esc.next_read())
+
+        calls.clear()
+        esc = Escalation([step('a', 99), step('b', 99)], skip=1)
+        self.assertEqual(esc.next_read().text, 'b')
+        self.assertEqual(calls, ['b'])
+
+        # Only valid reads are accepted, the first one if none is confident.
+        calls.clear()
+        valid = lambda x: x.text.isdigit()
+        esc = Escalation([step('12', 50), step('l2 ok', 99), step('13', 60)])
+        self.assertEqual(esc.first(valid).text, '12')
+        self.assertEqual(len(calls), 3)
+        esc = Escalation([step('x', 50), step('12', 90), step('unused', 99)])
+        self.assertEqual(esc.first(valid).text, '12')
+        self.assertIsNone(Escalation([step('x', 99)]).first(valid))
+
+        # Reads of one step are handed out one at a time.
+        calls.clear()
+        many = lambda: [step('a', 40)(), step('b', 50)()]
+        esc = Escalation([step('x', 10), many])
+        self.assertEqual([esc.next_read().text for _ in range(3)], ['x', 'a', 'b'])
+        self.assertEqual((len(calls), len(esc), esc.ran), (3, 3, 2))
+        self.assertTrue(esc.exhausted)
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_badge_reads(self):
+        """
+        Verify a confident title costs a single OCR call.
+        """
+
+        data = tesseract_data([('Starbucks', 96, 1)])
+        with unittest.mock.patch(
+                'pytesseract.image_to_data', return_value=data) as ocr:
+            esc = Escalation(self.img01.title_steps())
+            self.assertEqual(esc.best().text, 'starbucks')
+            self.assertEqual(ocr.call_count, 1)
+
+            # No word is doubtful, so none is read again.
+            self.assertEqual(esc.next_read().text, 'starbucks')
+            self.assertEqual(ocr.call_count, 1)
+
+            # Hard titles read every variant of the two line crop.
+            esc.next_read()
+            self.assertEqual(ocr.call_count, 1 + len(TITLE_VARIANTS))
+            self.assertEqual(self.img01.titleCrop.shape[0], 130)
+            self.assertTrue(esc.exhausted)
+
+            esc = Escalation(self.img01.title_steps(voting=False))
+            for _ in range(3):
+                esc.next_read()
+            self.assertEqual(ocr.call_count, 3 + len(TITLE_VARIANTS))
+
+    @pytest.mark.order(4)
+    def test_reread_words(self):
+        """
+        Verify only doubtful words are read again, each from its own box.
+        """
+
+        first = tesseract_data(
+            [('Mill', 95, 1), ('P0nd', 41, 1), ('Park', 93, 1)], 
+            [(10, 20, 80, 40), (100, 20, 90, 40), (200, 20, 80, 40)]
+            )
+        word = tesseract_data([('Pond', 90, 1)], [(5, 5, 90, 40)])
+        with unittest.mock.patch(
+                'pytesseract.image_to_data', side_effect=[first, word]
+                ) as ocr:
+            esc = Escalation(self.img01.title_steps())
+            self.assertEqual(esc.next_read().text, 'mill p0nd park')
+            res = esc.next_read()
+            self.assertEqual(ocr.call_count, 2)
+
+        self.assertEqual(res.text, 'mill pond park')
+        self.assertEqual(res.confidence, 90)
+        # The word alone was read, upscaled, as a single word.
+        image = ocr.call_args.args[0]
+        scale = self.img01.params.scale
+        self.assertLess(image.shape[1], 2 * 200 / scale * UPSCALE)
+        self.assertEqual(ocr.call_args.kwargs['config'], '--psm 8')
+
+    #==========================================================================
+
+    @pytest.mark.order(5)
+    def test_vote(self):
+        """
+        Verify the consensus read wins over a single confident outlier.
+        """
+
+        reads = [
+            OcrResult.from_text('portland head light', 70),
+            OcrResult.from_text('portland head iight', 60),
+            OcrResult.from_text('portland head light', 65),
+            OcrResult.from_text('p0rtl4nd', 99),
+            OcrResult(),
+            ]
+        self.assertEqual(vote(reads).text, 'portland head light')
+        self.assertEqual(vote([OcrResult()]).text, '')
+        # Every distinct text is kept for lookups, the consensus first.
+        self.assertEqual(
+            [x.text for x in rank(reads)], 
+            ['portland head light', 'portland head iight', 'p0rtl4nd']
+            )
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
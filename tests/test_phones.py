@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import pytest
+
+from PokemonGo.phones import DeviceRegistry, SUPPORTED_DIMENSIONS
+from PokemonGo.image import BadgeImage
+
+
+class RegistryTest(unittest.TestCase):
+    """
+    Test the lookup of device crop geometry.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'devices.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_builtin(self):
+        """
+        Verify built-in devices keep their hand-tuned geometry.
+        """
+
+        registry = DeviceRegistry()
+        for dimensions in SUPPORTED_DIMENSIONS:
+            self.assertIn(dimensions, registry)
+
+        device = registry.lookup((1334, 750))
+        self.assertEqual(device['model'], 'iSE')
+        self.assertEqual(device['scale'], 1.75)
+        self.assertEqual(device['title'], (50, 140))
+        self.assertEqual(device['activity'], (975, 1100))
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_normalized(self):
+        """
+        Verify unknown sizes are normalized by aspect ratio.
+        """
+
+        registry = DeviceRegistry()
+        device = registry.lookup((2001, 1125))   # 1.5x an iPhone SE.
+        self.assertEqual(device['model'], '2001x1125')
+        self.assertAlmostEqual(device['scale'] * 1125, 1.75 * 750, places=1)
+        self.assertEqual(device['title'], (75, 210))
+        self.assertEqual(device['activity'], (1462, 1650))
+
+        # An iPad ratio matches no phone.
+        self.assertNotIn((2160, 1620), registry)
+        self.assertIsNone(registry.lookup((2160, 1620)))
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_calibrated(self):
+        """
+        Verify calibrated devices are saved and loaded again.
+        """
+
+        registry = DeviceRegistry(self.path)
+        registry.add('ipad9', (2160, 1620), 0.77, (95, 185), (1460, 1640))
+        with self.assertRaises(ValueError):
+            registry.add('iSE', (1, 1), 1, (0, 1), (0, 1))
+
+        with open(self.path) as f:
+            self.assertEqual(list(json.load(f)), ['ipad9'])
+
+        device = DeviceRegistry(self.path).lookup((2160, 1620))
+        self.assertEqual(device['model'], 'ipad9')
+        self.assertEqual(device['title'], (95, 185))
+        # Other iPad sizes are normalized to it.
+        self.assertEqual(
+            DeviceRegistry(self.path).lookup((1080, 810))['activity'], 
+            (730, 820)
+            )
+
+    #==========================================================================
+
+    @pytest.mark.order(4)
+    def test_scaled_image(self):
+        """
+        Verify crops of a rescaled screenshot match the original.
+        """
+
+        image = cv2.imread('tests/images/IMG_0001.PNG')
+        path = os.path.join(self.tmp, 'big.PNG')
+        cv2.imwrite(path, cv2.resize(image, (1125, 2001)))
+
+        original, scaled = BadgeImage('tests/images/IMG_0001.PNG'), BadgeImage(path)
+        for img in (original, scaled):
+            img.set_title_crop()
+            img.set_activity_crop()
+
+        self.assertEqual(scaled.params.model, '2001x1125')
+        for region in ('titleCrop', 'activityCrop'):
+            a, b = getattr(original, region), getattr(scaled, region)
+            self.assertEqual(b.shape[0], round(1.5 * a.shape[0]))
+            # Text reaches OCR at the same size.
+            self.assertAlmostEqual(
+                b.shape[1] * scaled.params.scale, 
+                a.shape[1] * original.params.scale, 
+                delta=1
+                )
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
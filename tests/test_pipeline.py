@@ -0,0 +1,93 @@
+import threading
+import unittest
+
+import pytest
+
+from PokemonGo.pipeline import Pipeline
+
+
+class PipelineTests(unittest.TestCase):
+    """
+    Test the process of running items through pipeline stages.
+    """
+
+    def setUp(self):
+        self.results = list()
+        self.pipe = Pipeline()
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_all_items_processed(self):
+        """
+        Verify every item passes through every stage and `None` results
+        are dropped.
+        """
+
+        self.pipe.add_stage('double', lambda x: 2 * x, workers=3)
+        self.pipe.add_stage('odd', lambda x: x if x % 4 else None)
+        self.pipe.add_stage('collect', self.results.append)
+        self.pipe.run(range(10))
+
+        self.assertEqual(sorted(self.results), [2, 6, 10, 14, 18])
+        self.assertEqual(self.pipe.stages[0].done, 10)
+        self.assertEqual(self.pipe.stages[2].done, 5)
+
+    @pytest.mark.order(2)
+    def test_stages_overlap(self):
+        """
+        Verify the workers of a stage run at once and a stage takes 
+        items while the one before it is still busy.
+        """
+
+        barrier = threading.Barrier(5, timeout=5)
+        def wide(x):
+            barrier.wait()   # Broken unless five calls run at once.
+            return x
+
+        self.pipe.add_stage('wide', wide, workers=5, maxsize=1)
+        self.pipe.add_stage('collect', self.results.append)
+        self.pipe.run(range(10))
+        self.assertEqual(sorted(self.results), list(range(10)))
+
+        collected = threading.Event()
+        def first(x):
+            if x == 1:
+                # Item 0 must be collected while this stage holds item 1.
+                self.assertTrue(collected.wait(5))
+            return x
+
+        def collect(x):
+            self.results.append(x)
+            collected.set()
+
+        pipe = Pipeline()
+        pipe.add_stage('first', first)
+        pipe.add_stage('collect', collect)
+        pipe.run(range(3))
+        self.assertEqual(self.results[10:], [0, 1, 2])
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_stage_error(self):
+        """
+        Verify an error in any stage stops the pipeline and is raised.
+        """
+
+        def fail(x):
+            if x == 3:
+                raise ValueError
+            return x
+
+        self.pipe.add_stage('fail', fail)
+        self.pipe.add_stage('collect', self.results.append)
+
+        self.assertRaises(ValueError, self.pipe.run, range(100))
+        self.assertNotIn(3, self.results)
+        self.assertLess(len(self.results), 100)
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
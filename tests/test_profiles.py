@@ -0,0 +1,112 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from PokemonGo.profiles import Profile, load_profiles
+
+
+class ProfileTest(unittest.TestCase):
+    """
+    Test loading the profiles of several players.
+    """
+
+    def setUp(self):
+        self.top = tempfile.mkdtemp()
+        self.requirements = os.path.join(self.top, 'requirements')
+        os.makedirs(self.requirements)
+        for name in ('main.json', 'misty.json'):
+            open(os.path.join(self.requirements, name), 'w').close()
+
+        self.base = Profile(
+            '', os.path.join(self.requirements, 'main.json'), 'main gyms', 
+            'main@mail.com', ['~/Downloads'], ['*.PNG'], 'badges', 
+            'review', 'journal.jsonl', 'snapshot.csv', 'gyms.arrow', 
+            'pogo.log'
+            )
+        self.path = os.path.join(self.requirements, 'profiles.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.top)
+
+    def write(self, configs: dict) -> None:
+        with open(self.path, 'w') as f:
+            json.dump(configs, f)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_defaults(self):
+        """
+        Verify omitted settings fall back to the default profile and 
+        run state is kept per profile.
+        """
+
+        self.write({
+            'ash': {'SOURCES': '/tmp/ash', 'SHEET_NAME': 'ash gyms'}, 
+            'misty': {
+                'SOURCES': '/tmp/misty, /tmp/misty2', 
+                'JSON_KEY': 'misty.json', 
+                'EMAIL': 'misty@mail.com', 
+                'BADGES': 'store/misty'
+                }, 
+            })
+
+        ash, misty = load_profiles(self.path, base=self.base)
+        self.assertEqual(ash.sheetName, 'ash gyms')
+        self.assertEqual(ash.email, 'main@mail.com')
+        self.assertEqual(ash.keyPath, self.base.keyPath)
+        self.assertEqual(ash.patterns, ['*.PNG'])
+        self.assertEqual(ash.badges, os.path.join(self.top, 'badges', 'ash'))
+        self.assertEqual(
+            ash.journal, 
+            os.path.join(self.requirements, 'profiles', 'ash', 'journal.jsonl')
+            )
+
+        self.assertEqual(misty.sources, ['/tmp/misty', '/tmp/misty2'])
+        self.assertEqual(misty.sheetName, 'main gyms')
+        self.assertEqual(misty.email, 'misty@mail.com')
+        self.assertTrue(misty.keyPath.endswith('misty.json'))
+        self.assertEqual(misty.badges, os.path.join(self.top, 'store', 'misty'))
+
+        # The first run of a profile creates its state, log included.
+        ash.prepare()
+        self.assertTrue(os.path.isdir(os.path.dirname(ash.logFile)))
+        self.assertTrue(os.path.isdir(ash.badges))
+
+        # Selected profiles only, in the order given.
+        names = [x.name for x in load_profiles(self.path, ['misty'], self.base)]
+        self.assertEqual(names, ['misty'])
+        with self.assertRaises(KeyError):
+            load_profiles(self.path, ['brock'], self.base)
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_invalid(self):
+        """
+        Verify profiles must name their own source folders and keys.
+        """
+
+        self.write({'ash': {'SHEET_NAME': 'ash gyms'}})
+        with self.assertRaises(EnvironmentError):
+            load_profiles(self.path, base=self.base)
+
+        self.write({'ash': {'SOURCES': '/tmp/x', 'JSON_KEY': 'none.json'}})
+        with self.assertRaises(FileNotFoundError):
+            load_profiles(self.path, base=self.base)
+
+        self.write({
+            'ash': {'SOURCES': '/tmp/shared'}, 
+            'misty': {'SOURCES': '/tmp/shared/'}, 
+            })
+        with self.assertRaises(ValueError):
+            load_profiles(self.path, base=self.base)
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
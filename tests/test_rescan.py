@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+import rescan
+from PokemonGo.sheet import GymSheet
+
+
+class RescanTests(unittest.TestCase):
+    """
+    Test the process of comparing rescanned badges with the spreadsheet.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'snapshot.csv')
+        with open(path, 'w') as f:
+            f.write('uid,title,style,victories,days,hours,minutes,defended,treats\n')
+            f.write('1,verizon,gold,10,30,0,0,30.0,5\n')
+            f.write('2,starbucks,gold,448,23,6,16,23.2611,121\n')
+            f.write(',mill pond,,,,,,,\n')
+        self.gs = GymSheet.from_snapshot(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_extract_errors(self):
+        """
+        Verify unreadable badges are recorded instead of stopping the run.
+        """
+
+        notImage = os.path.join(self.tmp, 'IMG_0003.PNG')
+        with open(notImage, 'w') as f:
+            f.write('not an image')
+
+        res = rescan.extract_stats((3, notImage, (1334, 750)))
+        self.assertEqual(res['uid'], 3)
+        self.assertIn('AttributeError', res['error'])
+
+        res = rescan.extract_stats((4, 'tests/images/SHAKA.PNG', None))
+        self.assertEqual(res, {'uid': 4, 'error': 'MODEL'})
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_diff(self):
+        """
+        Verify only changed cells of readable, processed badges are
+        reported.
+        """
+
+        results = [
+            {'uid': 1, 'error': '', 'victories': 12, 'days': 30, 'hours': 0,
+             'minutes': 0, 'treats': 5},
+            {'uid': 2, 'error': '', 'victories': 448, 'days': 23, 'hours': 6,
+             'minutes': 16, 'treats': 121},
+            {'uid': 3, 'error': 'STATS'},
+            {'uid': 9, 'error': '', 'victories': 1, 'days': 0, 'hours': 1,
+             'minutes': 0, 'treats': 0},
+            ]
+        rescan.derive(results)
+        self.assertEqual(results[1]['style'], 'gold')
+
+        changes = rescan.diff(self.gs, results)
+        self.assertEqual(changes, [{
+            'uid': 1, 'row': 2, 'field': 'victories', 'old': 10, 'new': 12
+            }])
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_diff_defended(self):
+        """
+        Verify a changed defended time rewrites the cells it is computed 
+        from too.
+        """
+
+        results = [
+            {'uid': 2, 'error': '', 'victories': 448, 'days': 24, 'hours': 1,
+             'minutes': 0, 'treats': 121},
+            ]
+        rescan.derive(results)
+
+        changes = rescan.diff(self.gs, results)
+        self.assertEqual(
+            {x['field']: x['new'] for x in changes},
+            {'days': 24, 'hours': 1, 'minutes': 0, 'defended': 24.0417}
+            )
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import numpy as np
+import pytest
+
+from PokemonGo import utils
+from PokemonGo.review import ReviewQueue
+from PokemonGo.exceptions import ReviewRequired
+
+
+class ReviewTests(unittest.TestCase):
+    """
+    Test the process of deferring prompts to the review queue.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.image = os.path.join(self.tmp, 'IMG_0001.PNG')
+        shutil.copy('tests/images/IMG_0001.PNG', self.image)
+        self.rq = ReviewQueue(os.path.join(self.tmp, 'review'))
+
+    def tearDown(self):
+        utils.defer_prompts(False)
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_deferred_prompt(self):
+        """
+        Verify prompts raise `ReviewRequired` only while deferred.
+        """
+
+        utils.defer_prompts()
+        with self.assertRaises(ReviewRequired) as cm:
+            utils.ask('Enter CITY:\t', 'CITY', ['a', 'b'])
+        self.assertEqual(cm.exception.reason, 'CITY')
+        self.assertEqual(cm.exception.candidates, ['a', 'b'])
+
+        utils.defer_prompts(False)
+        unittest.mock.builtins.input = lambda _: "some town"
+        self.assertEqual(utils.ask('Enter CITY:\t', 'CITY'), 'some town')
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_add_and_resolve(self):
+        """
+        Verify queued badges persist with their crops and are removed
+        once resolved.
+        """
+
+        crop = np.zeros((10, 20, 3), dtype=np.uint8)
+        entry = self.rq.add(
+            self.image, 'TITLE', 'Enter TITLE:', ['starbucks'],
+            texts={'title': 'starbuck5'}, crops={'title': crop}
+            )
+
+        # Image is moved out of the source folder.
+        self.assertFalse(os.path.isfile(self.image))
+        self.assertTrue(os.path.isfile(entry['path']))
+        self.assertTrue(os.path.isfile(entry['crops']['title']))
+
+        # A new instance reads the same queue.
+        entries = ReviewQueue(self.rq.directory).entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['candidates'], ['starbucks'])
+        self.assertEqual(entries[0]['texts']['title'], 'starbuck5')
+
+        self.rq.resolve(entries)
+        self.assertEqual(len(self.rq), 0)
+        self.assertFalse(os.path.isfile(entry['crops']['title']))
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
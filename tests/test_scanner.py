@@ -0,0 +1,359 @@
+import io
+import os
+import json
+import shutil
+import argparse
+import threading
+import tempfile
+import unittest
+import unittest.mock
+
+import pytest
+
+import scanner
+from PokemonGo.sheet import GymSheet
+from PokemonGo.profiles import Profile
+from PokemonGo.review import ReviewQueue
+from PokemonGo.journal import RunJournal
+from PokemonGo.archive import BadgeArchive
+from PokemonGo.dedupe import HashIndex
+from PokemonGo.ocr import OcrResult, Escalation
+from PokemonGo.exceptions import ReviewRequired
+
+
+HEADER = (
+    'uid,title,model,style,victories,days,hours,minutes,defended,treats,'
+    'latlon,city,county,state\n'
+    )
+
+
+class ScannerTests(unittest.TestCase):
+    """
+    Test the scanner stages against an offline sheet.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        snapshot = os.path.join(self.tmp, 'snapshot.csv')
+        with open(snapshot, 'w') as f:
+            f.write(HEADER)
+            f.write('1,verizon,iSE,gold,10,30,0,0,30,5,"40.7,-73.9",a,b,c\n')
+            f.write(',starbucks,,,,,,,,,"40.8,-73.9",,,\n')
+        self.gs = GymSheet.from_snapshot(snapshot)
+        self.gs.sheet = unittest.mock.Mock()
+
+        self.downloads = os.path.join(self.tmp, 'Downloads')
+        os.makedirs(self.downloads)
+        self.profile = Profile(
+            '', None, None, None, [self.downloads], ['IMG_*.PNG'],
+            os.path.join(self.tmp, 'badges'),
+            os.path.join(self.tmp, 'review'),
+            os.path.join(self.tmp, 'journal.jsonl'),
+            snapshot, None, None
+            )
+        self.args = argparse.Namespace(verbose=False, updates=False)
+        self.reviews = ReviewQueue(self.profile.review)
+        self.archive = BadgeArchive(self.profile.badges)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def badge(self, name):
+        path = os.path.join(self.downloads, name)
+        shutil.copy('tests/images/IMG_0001.PNG', path)
+        return path
+
+    def scanner(self, resume=False):
+        journal = RunJournal(self.profile.journal, resume)
+        return scanner.Scanner(
+            self.gs, self.args, self.reviews, journal,
+            archive=self.archive, profile=self.profile
+            )
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_review_collision(self):
+        """
+        Verify two queued badges resolving to the same row are not both
+        written; the second stays queued.
+        """
+
+        for name in ('IMG_0101.PNG', 'IMG_0102.PNG'):
+            self.reviews.add(
+                self.badge(name), 'TITLE', 'Enter TITLE:',
+                texts={'title': 'verizon', 'activity': '12 31d 0h 0m 6'},
+                isUpdate=True
+                )
+
+        s = self.scanner(resume=True)
+        s.review()
+
+        self.assertEqual(self.gs.sheet.batch_update.call_count, 1)
+        entry, = self.reviews.entries()
+        self.assertTrue(entry['path'].endswith('IMG_0102.PNG'))
+        self.assertTrue(os.path.isfile(entry['path']))
+        # Nothing of the queued badge is restored by the next review.
+        self.assertNotIn(entry['path'], s.journal.progress())
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_resume_after_write(self):
+        """
+        Verify a new gym whose row was written before a crash is stored 
+        on resume without writing or assigning again.
+        """
+
+        path = self.badge('IMG_0103.PNG')
+        activity = {
+            'victories': 12, 'days': 31, 'hours': 0, 'minutes': 0, 'treats': 6
+            }
+        journal = RunJournal(self.profile.journal)
+        journal.record(path, 'extracted', 
+            titleTxt='starbucks', activityTxt='12 31d 0h 0m 6')
+        journal.record(path, 'matched', 
+            title='starbucks', rowIndex=3, activity=activity, errors=[])
+        journal.record(path, 'geocoded', city='x', county='y', state='z')
+        journal.record(path, 'assigned', uid=2)
+        journal.record(path, 'written', uid=2)
+        # The row already holds the new gym.
+        self.gs.write_to_row(3, {'uid': 2, 'title': 'starbucks'})
+        self.gs.sheet.reset_mock()
+
+        s = self.scanner(resume=True)
+        s.run([path])
+
+        self.gs.sheet.update.assert_not_called()
+        self.assertEqual(s.nextId, 3)
+        self.assertIn(2, self.archive)
+        self.assertFalse(os.path.isfile(path))
+        self.assertEqual(s.journal.progress()[path]['moved'], {'uid': 2})
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_duplicates(self):
+        """
+        Verify copies of a stored badge are skipped, but not updates, and 
+        badges which are not stored release their reserved hash.
+        """
+
+        stored = os.path.join(self.tmp, 'stored')
+        os.makedirs(stored)
+        shutil.copy('tests/images/IMG_0001.PNG', stored)
+        hashes = HashIndex(stored)
+        hashes.refresh()
+
+        s = self.scanner()
+        s.hashes = hashes
+
+        copy = self.badge('IMG_0104.PNG')
+        self.assertIsNone(s.ingest(s.new_scan(copy)))
+        self.assertFalse(os.path.isfile(copy))
+        # A second copy of the same name is kept too.
+        copy = self.badge('IMG_0104.PNG')
+        self.assertIsNone(s.ingest(s.new_scan(copy)))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.profile.badges, 'duplicates'))), 
+            ['IMG_0104.PNG', 'IMG_0104_1.PNG']
+            )
+
+        # An update may hash like its stored badge; its stats are kept.
+        path = self.badge('IMG_0105.PNG')
+        scan = s.ingest(s.new_scan(path, isUpdate=True))
+        self.assertIsNotNone(scan)
+        self.assertTrue(os.path.isfile(path))
+        self.assertIn(path, hashes.pending)
+
+        s.skip(scan, ValueError('unreadable'))
+        self.assertEqual(hashes.pending, {})
+
+        scan = s.ingest(s.new_scan(path, isUpdate=True))
+        s.defer(scan, ReviewRequired('TITLE', 'Enter TITLE:'))
+        self.assertEqual(hashes.pending, {})
+        self.assertEqual(len(self.reviews), 1)
+
+    #==========================================================================
+
+    @pytest.mark.order(4)
+    def test_update_cells(self):
+        """
+        Verify updates write their changed cells in one batch and 
+        unchanged updates write nothing.
+        """
+
+        s = self.scanner()
+        for name, activity in (
+                ('IMG_0106.PNG', '12 30d 0h 0m 5'), 
+                ('IMG_0107.PNG', '12 30d 0h 0m 5'), 
+                ):
+            scan = s.ingest(s.new_scan(self.badge(name), isUpdate=True))
+            scan.titleTxt, scan.activityTxt = 'verizon', activity
+            s.commit(s._match(scan))
+
+        self.gs.sheet.batch_update.assert_called_once_with([
+            {'range': 'E2', 'values': [[12]]}
+            ])
+        self.assertEqual(
+            s.updateStats, {'changed': 1, 'unchanged': 1, 'avoided': 19}
+            )
+        self.assertEqual(self.archive.uids(), [1])
+
+    #==========================================================================
+
+    @pytest.mark.order(5)
+    def test_dry_run_errors(self):
+        """
+        Verify a dry run reports images which cannot be read and goes on.
+        """
+
+        unsupported = os.path.join(self.downloads, 'IMG_0108.PNG')
+        shutil.copy('tests/images/SHAKA.PNG', unsupported)
+        notImage = os.path.join(self.downloads, 'IMG_0109.PNG')
+        with open(notImage, 'w') as f:
+            f.write('not an image')
+
+        out = io.StringIO()
+        with unittest.mock.patch.object(
+                scanner.Profile, 'from_env', return_value=self.profile
+                ):
+            s = scanner.DryRunScanner(self.gs, self.args, out)
+        s.run([unsupported, notImage])
+
+        records = [json.loads(x) for x in out.getvalue().splitlines()]
+        self.assertEqual(
+            [x['path'] for x in records], [unsupported, notImage]
+            )
+        self.assertIn('UnsupportedPhoneModel', records[0]['errors'][0])
+        self.assertIn('AttributeError', records[1]['errors'][0])
+        # Nothing is moved.
+        self.assertTrue(os.path.isfile(unsupported))
+
+    #==========================================================================
+
+    @pytest.mark.order(6)
+    def test_title_reads(self):
+        """
+        Verify every title read is looked up before the user is asked.
+        """
+
+        def steps(*texts):
+            return [lambda x=x: OcrResult.from_text(x) for x in texts]
+
+        s = self.scanner()
+        scan = s.new_scan('IMG_0110.PNG')
+        # Similar to a title, so the user would be asked to accept it.
+        scan.titleTxt = 'starbucksx'
+        scan.titleEsc = Escalation(steps('starbucks', 'unused'))
+
+        unittest.mock.builtins.input = lambda _: self.fail('prompted')
+        self.assertEqual(s._find_title(scan), ('starbucks', 3))
+        self.assertEqual(len(scan.titleEsc), 1)
+        self.assertEqual(scan.titleTxt, 'starbucks')
+
+        # Only once every read missed.
+        scan.titleTxt = 'starbucksx'
+        scan.titleEsc = Escalation(steps('5t4r', 'starbucksx'))
+        asked = list()
+        unittest.mock.builtins.input = lambda x: asked.append(x) or 'y'
+        self.assertEqual(s._find_title(scan), ('starbucks', 3))
+        self.assertTrue(scan.titleEsc.exhausted)
+        self.assertEqual(len(asked), 1)
+
+        # Including variants behind the consensus of a vote.
+        scan.titleTxt = '5t4r'
+        scan.titleEsc = Escalation([lambda: [
+            OcrResult.from_text('5t4rbucks', 90), 
+            OcrResult.from_text('starbucks', 40),
+            ]])
+        unittest.mock.builtins.input = lambda _: self.fail('prompted')
+        self.assertEqual(s._find_title(scan), ('starbucks', 3))
+
+    #==========================================================================
+
+    @pytest.mark.order(7)
+    def test_multi_profile_errors(self):
+        """
+        Verify a failed scan is reported to the scanner of its own 
+        profile, which releases its reserved hash.
+        """
+
+        misty = os.path.join(self.tmp, 'misty')
+        os.makedirs(misty)
+        profile = Profile(
+            'misty', None, None, None, [misty], ['IMG_*.PNG'],
+            os.path.join(self.tmp, 'badges_misty'),
+            os.path.join(self.tmp, 'review_misty'), 
+            os.path.join(self.tmp, 'misty.jsonl'), None, None, None
+            )
+        profile.prepare()
+
+        pipeline = scanner.Pipeline()
+        scanners = list()
+        for each in (self.profile, profile):
+            os.makedirs(each.badges, exist_ok=True)
+            scanners.append(scanner.Scanner(
+                self.gs, self.args, ReviewQueue(each.review), None, 
+                HashIndex(each.badges), BadgeArchive(each.badges), each, 
+                pipeline
+                ))
+        multi = scanner.MultiScanner(scanners, pipeline)
+
+        def extract(scan):
+            raise ValueError('unreadable')
+        scanners[1].extract = extract
+
+        path = os.path.join(misty, 'IMG_0111.PNG')
+        shutil.copy('tests/images/IMG_0001.PNG', path)
+        with unittest.mock.patch.object(
+                scanner, 'watch_folder', return_value=iter([path])
+                ):
+            multi.watch()
+
+        self.assertEqual(scanners[1].hashes.pending, {})
+        self.assertTrue(os.path.isfile(path))
+
+    #==========================================================================
+
+    @pytest.mark.order(8)
+    def test_rereads_unlocked(self):
+        """
+        Verify rereads do not wait while another scan prompts the user.
+        """
+
+        s = self.scanner()
+        scan = s.new_scan('IMG_0112.PNG')
+        scan.titleTxt = '5t4r'
+        scan.titleEsc = Escalation([lambda: OcrResult.from_text('starbucks')])
+        scan.activityTxt = 'unreadable'
+        scan.activityEsc = Escalation(
+            [lambda: OcrResult.from_text('12 31d 0h 0m 6')]
+            )
+
+        held, done = threading.Event(), threading.Event()
+        def prompt():
+            with scanner.PROMPT_LOCK:
+                held.set()
+                done.wait(5)
+        other = threading.Thread(target=prompt)
+        other.start()
+        held.wait()
+
+        found = list()
+        matcher = threading.Thread(target=lambda: found.append(s._find(scan)))
+        matcher.start()
+        matcher.join(2)
+        blocked = matcher.is_alive()
+        done.set()
+        other.join()
+        matcher.join()
+
+        self.assertFalse(blocked)
+        self.assertEqual(found[0][:2], ('starbucks', 3))
+        self.assertEqual(found[0][2]['victories'], 12)
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from PokemonGo.service import UploadService, parse_address, split_multipart
+
+
+def post(url, body, contentType):
+    request = urllib.request.Request(
+        url, data=body, headers={'Content-Type': contentType}
+        )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def multipart(files):
+    boundary = 'badgeboundary'
+    body = b''
+    for name, data in files:
+        body += (
+            '--{}\r\nContent-Disposition: form-data; name="file"; '
+            'filename="{}"\r\nContent-Type: image/png\r\n\r\n'
+            ).format(boundary, name).encode() + data + b'\r\n'
+    body += '--{}--\r\n'.format(boundary).encode()
+    return body, 'multipart/form-data; boundary=' + boundary
+
+
+class ServiceTests(unittest.TestCase):
+    """
+    Test the process of receiving badges over HTTP.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.folders = {
+            'ash': os.path.join(self.tmp, 'ash'),
+            'misty': os.path.join(self.tmp, 'misty')
+            }
+        for folder in self.folders.values():
+            os.makedirs(folder)
+
+        self.service = UploadService(self.folders, port=0, timeout=5).start()
+        # Stands in for the scanner: answers each upload with its profile.
+        self.seen = list()
+        def scan():
+            for upload in self.service.uploads():
+                self.seen.append(upload)
+                upload.resolve({
+                    'status': 'matched', 'profile': upload.profile,
+                    'shape': list(upload.image.shape[:2])
+                    })
+        self.worker = threading.Thread(target=scan)
+        self.worker.start()
+
+        with open('tests/images/IMG_0001.PNG', 'rb') as f:
+            self.badge = f.read()
+
+    def tearDown(self):
+        self.service.stop()
+        self.worker.join()
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_parse_address(self):
+        """
+        Verify the host is optional in a service address.
+        """
+
+        self.assertEqual(parse_address('9000'), ('127.0.0.1', 9000))
+        self.assertEqual(parse_address('0.0.0.0:80'), ('0.0.0.0', 80))
+        self.assertRaises(ValueError, parse_address, 'localhost')
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_single_upload(self):
+        """
+        Verify a posted badge is saved to its profile's folder, decoded
+        once and answered with its record.
+        """
+
+        url = self.service.url + '/badges/misty'
+        body = post(url, self.badge, 'image/png')
+
+        record, = body['badges']
+        self.assertEqual(record['status'], 'matched')
+        self.assertEqual(record['profile'], 'misty')
+        self.assertEqual(record['shape'], [1334, 750])
+
+        upload, = self.seen
+        self.assertEqual(os.path.dirname(upload.path), self.folders['misty'])
+        with open(upload.path, 'rb') as f:
+            self.assertEqual(f.read(), self.badge)
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_batch_upload(self):
+        """
+        Verify a multipart batch gets one record per file, in order, and
+        files which are not badges are rejected alone.
+        """
+
+        with open('tests/images/IMG_0002.PNG', 'rb') as f:
+            second = f.read()
+        with open('tests/images/SHAKA.PNG', 'rb') as f:
+            unsupported = f.read()
+
+        body, contentType = multipart([
+            ('IMG_0001.PNG', self.badge), ('notes.txt', b'not an image'),
+            ('IMG_0002.PNG', second), ('SHAKA.PNG', unsupported)
+            ])
+        files = split_multipart(contentType, body)
+        self.assertEqual([x[0] for x in files], [
+            'IMG_0001.PNG', 'notes.txt', 'IMG_0002.PNG', 'SHAKA.PNG'
+            ])
+        self.assertEqual(files[0][1], self.badge)
+
+        url = self.service.url + '/badges/ash'
+        records = post(url, body, contentType)['badges']
+        self.assertEqual(
+            [x['status'] for x in records],
+            ['matched', 'rejected', 'matched', 'rejected']
+            )
+        self.assertEqual(records[2]['name'], 'IMG_0002.PNG')
+        self.assertEqual(len(os.listdir(self.folders['ash'])), 2)
+
+    #==========================================================================
+
+    @pytest.mark.order(4)
+    def test_bad_requests(self):
+        """
+        Verify unknown profiles, content types and malformed lengths are 
+        refused.
+        """
+
+        # Several profiles are served, so one must be named.
+        for path, contentType, status in (
+                ('/badges', 'image/png', 404),
+                ('/badges/brock', 'image/png', 404),
+                ('/badges/ash', 'text/plain', 415),
+                ):
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                post(self.service.url + path, self.badge, contentType)
+            self.assertEqual(cm.exception.code, status)
+
+        for length in ('abc', '-1'):
+            request = urllib.request.Request(
+                self.service.url + '/badges/ash', data=b'x', headers={
+                    'Content-Type': 'image/png', 'Content-Length': length
+                    }
+                )
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(request)
+            self.assertEqual(cm.exception.code, 400)
+        self.assertEqual(self.seen, [])
+
+    #==========================================================================
+
+    @pytest.mark.order(5)
+    def test_concurrent_uploads(self):
+        """
+        Verify concurrent requests are all queued and answered.
+        """
+
+        url = self.service.url + '/badges/ash'
+        with ThreadPoolExecutor(8) as ex:
+            bodies = list(ex.map(
+                lambda _: post(url, self.badge, 'image/png'), range(16)
+                ))
+
+        self.assertTrue(all(
+            x['badges'][0]['status'] == 'matched' for x in bodies
+            ))
+        self.assertEqual(self.service.received, 16)
+        # Each upload keeps its own file.
+        self.assertEqual(len(os.listdir(self.folders['ash'])), 16)
+
+        with urllib.request.urlopen(self.service.url + '/status') as response:
+            status = json.load(response)
+        self.assertEqual(status['profiles'], ['ash', 'misty'])
+        self.assertEqual(status['received'], 16)
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
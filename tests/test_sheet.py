@@ -1,3 +1,9 @@
+import io
+import os
+import shutil
+import contextlib
+import threading
+import tempfile
 import unittest
 import unittest.mock
 
@@ -96,6 +102,261 @@ class SheetTests(unittest.TestCase):
             'verizon', True
         )
 
+class UpdateTests(unittest.TestCase):
+    """
+    Test the process of writing only the cells an update changes.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'snapshot.csv')
+        with open(path, 'w') as f:
+            f.write('uid,title,victories,defended\n')
+            f.write('1,verizon,10,3.1701\n')
+        self.gs = GymSheet.from_snapshot(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_changed_cells(self):
+        """
+        Verify only values which differ from the cached row are returned.
+        """
+
+        cells = self.gs.changed_cells(
+            2, {'uid': 1, 'victories': 12, 'defended': 3.17010000001}
+            )
+        self.assertEqual(cells, [(2, 'victories', 12)])
+
+class SnapshotTests(unittest.TestCase):
+    """
+    Test the process of working offline from a local sheet snapshot.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'snapshot.csv')
+        with open(self.path, 'w') as f:
+            f.write('uid,title,victories,defended,latlon\n')
+            f.write('1,verizon,10,3.1701,"40.7,-73.9"\n')
+            f.write(',starbucks,,,"40.8,-73.9"\n')
+        self.gs = GymSheet.from_snapshot(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_from_snapshot(self):
+        """
+        Verify snapshot values are typed like sheet records.
+        """
+
+        self.assertIsNone(self.gs.sheet)
+        self.assertEqual(list(self.gs.processed.index), [2])
+        self.assertEqual(list(self.gs.unprocessed.index), [3])
+        self.assertEqual(self.gs.processed.at[2, 'victories'], 10)
+        self.assertEqual(self.gs.find_title('starbucks'), ('starbucks', 3))
+
+        # Saving and loading again gives the same records.
+        self.gs.save_snapshot(self.path)
+        again = GymSheet.from_snapshot(self.path)
+        self.assertTrue(again.processed.equals(self.gs.processed))
+
+    @pytest.mark.order(3)
+    def test_find_normalized(self):
+        """
+        Verify misread and partial titles resolve without prompting.
+        """
+
+        with open(self.path, 'w') as f:
+            f.write('uid,title,latlon\n')
+            f.write(',st. mary\'s episcopal church of the holy cross,"1,2"\n')
+            f.write(',mill pond,"3,4"\n')
+            f.write(',old mill pond park,"5,6"\n')
+        gs = GymSheet.from_snapshot(self.path)
+
+        unittest.mock.builtins.input = lambda _: self.fail('prompted')
+        self.assertEqual(gs.find_title('m1ll p0nd')[1], 3)
+        self.assertEqual(
+            gs.find_title('st. mary’s episcopal\nchurch of the'), 
+            ("st. mary's episcopal church of the holy cross", 2)
+            )
+        self.assertEqual(gs.errors, ['PARTIAL'])
+        self.assertEqual(gs.find_title('church of the holy cr0ss')[1], 2)
+        self.assertEqual(gs.find_title('m1ll p0nd')[1], 3)
+        self.assertEqual(gs.errors, [])
+
+        # A fragment in several titles, or a small part of one, is not 
+        # resolved.
+        unittest.mock.builtins.input = lambda _: 'n'
+        self.assertEqual(gs.find_title('ll pond'), ('', -1))
+        self.assertEqual(gs.find_title('the holy'), ('', -1))
+
+    @pytest.mark.order(4)
+    def test_live_table(self):
+        """
+        Verify writes update processed rows, the largest uid and title 
+        lookups without reloading.
+        """
+
+        self.gs.sheet = unittest.mock.Mock()
+        self.assertEqual(self.gs.maxUid, 1)
+
+        self.gs.write_to_row(3, {
+            'uid': 2, 'title': 'starbucks', 'victories': 5, 
+            'defended': 1.5, 'latlon': '40.8,-73.9'
+            })
+        self.assertEqual(self.gs.maxUid, 2)
+        self.assertEqual(list(self.gs.processed.index), [2, 3])
+        self.assertEqual(self.gs.processed.at[3, 'victories'], 5)
+        # A second badge of the same gym is an update, not a new gym.
+        self.assertEqual(self.gs.find_title('starbucks', True), ('starbucks', 3))
+        self.assertEqual(self.gs.find_title('starbucks'), ('', -1))
+
+        # Title corrections are found at once, also by fragment.
+        self.gs.write_cells([(2, 'title', 'verizon wireless')])
+        self.assertEqual(
+            self.gs.find_title('verizon wireless', True), ('verizon wireless', 2)
+            )
+        self.assertEqual(
+            self.gs.find_title('wire1ess', True), ('verizon wireless', 2)
+            )
+        self.assertEqual(self.gs.sheet.batch_update.call_count, 1)
+
+    @pytest.mark.order(5)
+    def test_live_table_scale(self):
+        """
+        Verify writes and lookups neither rebuild nor copy the table, 
+        also while other threads look titles up.
+        """
+
+        with open(self.path, 'w') as f:
+            f.write('uid,title,victories,latlon\n')
+            for i in range(2000):
+                f.write(',gym number {},,"1,2"\n'.format(i))
+        gs = GymSheet.from_snapshot(self.path)
+        gs.sheet = unittest.mock.Mock()
+        table = gs.table
+        gs.title_index()   # Built once, before any write.
+
+        def lookups(stop):
+            while not stop.is_set():
+                for i in range(0, 500, 7):
+                    title, rowIndex = gs.find_title(
+                        'gym number {}'.format(i), True, similar=False
+                        )
+                    if rowIndex != -1:
+                        self.assertTrue(gs.is_processed(rowIndex))
+
+        stop = threading.Event()
+        reader = threading.Thread(target=lookups, args=(stop,))
+        with unittest.mock.patch.object(
+                GymSheet, '_partition') as partition, \
+                unittest.mock.patch('PokemonGo.sheet.TitleIndex') as index:
+            reader.start()
+            for i in range(500):
+                title, rowIndex = gs.find_title('gym number {}'.format(i))
+                gs.write_to_row(rowIndex, {
+                    'uid': gs.maxUid + 1, 'title': title, 'victories': i
+                    })
+            stop.set()
+            reader.join()
+
+        partition.assert_not_called()
+        index.assert_not_called()
+        self.assertIs(gs.table, table)
+        self.assertEqual(gs.maxUid, 500)
+        self.assertEqual(len(gs.processed), 500)
+
+    @pytest.mark.order(6)
+    def test_write_cells(self):
+        """
+        Verify cells are written in one request, also past column Z.
+        """
+
+        header = ['uid', 'title'] + ['c{}'.format(i) for i in range(30)]
+        with open(self.path, 'w') as f:
+            f.write(','.join(header) + '\n')
+            f.write('1,verizon' + ',0' * 30 + '\n')
+        gs = GymSheet.from_snapshot(self.path)
+        gs.sheet = unittest.mock.Mock()
+
+        gs.write_cells([(2, 'title', 'verizon wireless'), (2, 'c27', 5)])
+        gs.sheet.batch_update.assert_called_once_with([
+            {'range': 'B2', 'values': [['verizon wireless']]}, 
+            {'range': 'AD2', 'values': [[5]]}
+            ])
+        self.assertEqual(gs.table.at[2, 'c27'], 5)
+
+    @pytest.mark.order(7)
+    def test_geo_sort(self):
+        """
+        Verify sorting keeps the table in sheet order without downloading
+        the sheet again.
+        """
+
+        with open(self.path, 'w') as f:
+            f.write('uid,title,latlon,city,county,state\n')
+            f.write('1,verizon,"40.7,-73.9",nyc,new york,new york\n')
+            f.write(',starbucks,"40.8,-73.9",,,\n')
+            f.write('2,big ben,"51.5,-0.1",portland,cumberland,maine\n')
+        gs = GymSheet.from_snapshot(self.path)
+        gs.sheet = unittest.mock.Mock()
+        gs.sheet.row_values.return_value = list(gs.table.columns)
+
+        gs.geo_sort('address')
+        self.assertEqual(
+            list(gs.table['title']), ['big ben', 'verizon', 'starbucks']
+            )
+        self.assertEqual(gs.find_title('starbucks'), ('starbucks', 4))
+        self.assertEqual(list(gs.processed.index), [2, 3])
+
+        gs.geo_sort('hilbert')
+        values = gs.sheet.update.call_args.args[1]
+        self.assertEqual([x[1] for x in values], list(gs.table['title']))
+        self.assertEqual(gs.maxUid, 2)
+        gs.sheet.get_all_records.assert_not_called()
+
+    @pytest.mark.order(8)
+    def test_cached_dataset(self):
+        """
+        Verify a saved dataset is only used while every cell matches the 
+        sheet.
+        """
+
+        dataset = os.path.join(self.tmp, 'sheet.arrow')
+        self.gs.save_dataset(dataset)
+        values = [
+            ['uid', 'title', 'victories', 'defended', 'latlon'],
+            ['1', 'verizon', '10', '3.1701', '40.7,-73.9'],
+            ['', 'starbucks', '', '', '40.8,-73.9'],
+            ]
+        sheet = unittest.mock.Mock()
+        sheet.get_values.return_value = values
+        client = unittest.mock.Mock()
+        client.open.return_value.sheet1 = sheet
+
+        out = io.StringIO()
+        with unittest.mock.patch(
+                'PokemonGo.sheet.get_client', return_value=client
+                ), contextlib.redirect_stdout(out):
+            gs = GymSheet('key.json', 'gyms', True, dataset)
+            self.assertIn('loaded from', out.getvalue())
+            self.assertEqual(gs.table.at[2, 'victories'], 10)
+
+            # Coordinates were entered by hand since the dataset was saved.
+            values[2][4] = '40.9,-73.8'
+            gs = GymSheet('key.json', 'gyms', True, dataset)
+            self.assertIn('out of date', out.getvalue())
+            self.assertEqual(gs.table.at[3, 'latlon'], '40.9,-73.8')
+
+        sheet.get_all_records.assert_not_called()
+
 #==========================================================================
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+import random
+import string
+import unittest
+
+import pytest
+
+from PokemonGo.titles import normalize, TitleIndex
+
+
+def random_titles(n: int, seed: int = 0) -> list:
+    """Build `n` titles of random words."""
+
+    rng = random.Random(seed)
+    return [
+        ' '.join(
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+            for _ in range(rng.randint(2, 6))
+            )
+        for _ in range(n)
+        ]
+
+
+class TitleTest(unittest.TestCase):
+    """
+    Test folding OCR confusions and finding partial titles.
+    """
+
+    @pytest.mark.order(1)
+    def test_normalize(self):
+        """
+        Verify confusable characters fold together and stray symbols go.
+        """
+
+        self.assertEqual(normalize('Mill Pond'), normalize('m1ll p0nd'))
+        self.assertEqual(normalize('|ron Horse'), normalize('iron horse'))
+        self.assertEqual(normalize('Joe’s  Diner\n'), normalize("joe's diner"))
+        self.assertEqual(normalize('▼ starbucks ⚡'), 'starbucks')
+        self.assertNotEqual(normalize('oak park'), normalize('oak perk'))
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_index(self):
+        """
+        Verify fragments find every title containing them, and only them.
+        """
+
+        index = TitleIndex(['Starbucks Coffee', 'mural of St. Ann', 'park', 
+            'Starbucks Coffee', 'coffee park'])
+
+        self.assertEqual(index.find('bucks c0ffee'), [0, 3])
+        self.assertEqual(index.find('coffee'), [0, 3, 4])
+        self.assertEqual(index.find('of st. ann'), [1])
+        self.assertEqual(index.find('park'), [])   # Too short.
+        self.assertEqual(index.find('museum of art'), [])
+        # Fragments never span two titles.
+        self.assertEqual(index.find('ann park'), [])
+
+        self.assertEqual(index.equal('PARK'), [2])
+        self.assertEqual(index.equal('coffee'), [])
+
+    #==========================================================================
+
+    @pytest.mark.order(3)
+    def test_large_index(self):
+        """
+        Verify lookups on a large sheet. See `tests/bench_titles.py` for 
+        their timing.
+        """
+
+        titles = random_titles(5000)
+        index = TitleIndex(titles)
+
+        for i in range(0, 5000, 50):
+            self.assertIn(i, index.find(titles[i][1:]))
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+import pytest
+
+from PokemonGo.video import extract_badges, frame_path
+from PokemonGo.exceptions import UnsupportedPhoneModel
+
+
+FPS = 30
+
+
+class VideoTests(unittest.TestCase):
+    """
+    Test the process of finding badges in a screen recording.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'rec.mp4')
+
+        # Starbucks, and another gym drawn over it.
+        self.badge = cv2.imread('tests/images/IMG_0001.PNG')
+        self.other = self.badge.copy()
+        cv2.rectangle(self.other, (0, 50), (750, 140), (250, 252, 245), -1)
+        cv2.putText(
+            self.other, 'Mill Pond Park', (150, 110), 
+            cv2.FONT_HERSHEY_SIMPLEX, 1.5, (60, 60, 60), 3
+            )
+        for left, value in ((120, '97'), (540, '305')):
+            cv2.rectangle(
+                self.other, (left, 1035), (left + 110, 1080), (250, 252, 245), -1
+                )
+            cv2.putText(
+                self.other, value, (left + 10, 1070), 
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (90, 80, 60), 3
+                )
+        self.menu = np.full_like(self.badge, 235)
+        cv2.putText(
+            self.menu, 'GYM BADGES', (200, 200), cv2.FONT_HERSHEY_SIMPLEX, 
+            1.5, (40, 40, 40), 3
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def record(self, shots: list, dimensions: tuple = (1334, 750)) -> None:
+        """Write a recording holding each ``(image, seconds)`` in turn."""
+
+        height, width = dimensions
+        writer = cv2.VideoWriter(
+            self.path, cv2.VideoWriter_fourcc(*'mp4v'), FPS, (width, height)
+            )
+        for image, seconds in shots:
+            for i in range(round(seconds * FPS)):
+                frame = image
+                if image is None:   # Scrolling.
+                    frame = np.roll(self.badge, 40 * i, axis=0)
+                writer.write(cv2.resize(frame, (width, height)))
+        writer.release()
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_extract_badges(self):
+        """
+        Verify each distinct badge is taken once from a still stretch, 
+        while scrolling and other screens are skipped.
+        """
+
+        self.record([
+            (self.menu, 0.6), (None, 0.5), (self.badge, 0.8), 
+            (None, 0.5), (self.badge, 0.8),   # Scrolled back.
+            (None, 0.5), (self.other, 0.8)
+            ])
+
+        frames = list(extract_badges(self.path))
+        self.assertEqual(len(frames), 2)
+        self.assertTrue(all(x.video == self.path for x in frames))
+        self.assertLess(frames[0].time, frames[1].time)
+        # Named after the recording; no files are written.
+        self.assertEqual(
+            frames[0].path, frame_path(self.path, round(frames[0].time * FPS))
+            )
+        self.assertEqual(os.listdir(self.tmp), ['rec.mp4'])
+
+        # Frames are the badges, up to compression.
+        for frame, image in zip(frames, (self.badge, self.other)):
+            self.assertEqual(frame.image.shape, image.shape)
+            diff = np.abs(frame.image.astype(int) - image).mean()
+            self.assertLess(diff, 5)
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_unsupported(self):
+        """
+        Verify recordings of unknown devices and missing files raise errors.
+        """
+
+        self.record([(self.badge, 0.2)], dimensions=(1024, 768))
+        self.assertRaises(UnsupportedPhoneModel, next, extract_badges(self.path))
+        self.assertRaises(
+            FileNotFoundError, next, extract_badges(self.path + '.mov')
+            )
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+import pytest
+
+from PokemonGo.watch import watch_folder
+
+
+class WatchTests(unittest.TestCase):
+    """
+    Test the process of monitoring a folder for new images.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.gen = watch_folder(self.tmp, interval=0.05, settle=0.2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    #==========================================================================
+
+    @pytest.mark.order(1)
+    def test_existing_files(self):
+        """
+        Verify files already present are reported and others ignored.
+        """
+
+        for name in ('IMG_0001.PNG', 'notes.txt'):
+            open(os.path.join(self.tmp, name), 'wb').write(b'data')
+
+        path = next(self.gen)
+        self.assertEqual(path, os.path.join(self.tmp, 'IMG_0001.PNG'))
+
+    #==========================================================================
+
+    @pytest.mark.order(2)
+    def test_debounce_partial_write(self):
+        """
+        Verify a file is reported only after writing has finished.
+        """
+
+        path = os.path.join(self.tmp, 'IMG_0002.PNG')
+
+        def slow_write():
+            with open(path, 'wb') as f:
+                for i in range(6):
+                    if i:
+                        time.sleep(0.1)
+                    f.write(b'x' * 100)
+                    f.flush()
+
+        writer = threading.Thread(target=slow_write)
+        writer.start()
+        self.assertEqual(next(self.gen), path)
+        # Checked before joining, so an early report fails.
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(os.path.getsize(path), 600)
+        writer.join()
+
+#==========================================================================
+
+if __name__ == '__main__':
+    unittest.main()